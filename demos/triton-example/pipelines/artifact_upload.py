@@ -0,0 +1,201 @@
+"""
+Upload en streaming d'un répertoire de modèle vers S3/MinIO
+L'archive tar est compressée (gzip ou zstd) à la volée et écrite directement
+dans un upload multipart: pas d'archive temporaire, mémoire bornée à
+part_size × (max_inflight + 1), parties envoyées en parallèle
+
+La clé est adressée par contenu (empreinte SHA-256 des fichiers): si l'objet
+existe déjà avec la même empreinte, l'upload est ignoré
+"""
+
+import hashlib
+import os
+import tarfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+# Taille minimale d'une partie S3 (hors dernière partie)
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+DIGEST_METADATA = "content-sha256"
+
+COMPRESSIONS = {"gzip": "tar.gz", "zstd": "tar.zst"}
+
+CHUNK_SIZE = 1024 * 1024
+
+def content_digest(path: str) -> str:
+    """
+    Empreinte SHA-256 des fichiers d'un répertoire (chemins relatifs et
+    contenus, ordre trié), indépendante de la compression et des dates
+    """
+    digest = hashlib.sha256()
+    files = sorted(
+        (os.path.relpath(os.path.join(root, name), path), os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+    for relative, full in files:
+        digest.update(relative.replace(os.sep, "/").encode("utf-8") + b"\0")
+        with open(full, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def s3_client():
+    """
+    Client S3 configuré comme le reste de la démo (AWS_S3_ENDPOINT, MinIO)
+    """
+    import boto3
+    from botocore.config import Config
+
+    endpoint = os.getenv("AWS_S3_ENDPOINT")
+    if endpoint and not endpoint.startswith(("http://", "https://")):
+        endpoint = f"http://{endpoint}"
+    addressing = "path" if os.getenv("AWS_S3_FORCE_PATH_STYLE", "").lower() == "true" else "auto"
+    return boto3.client("s3", endpoint_url=endpoint or None,
+                        config=Config(s3={"addressing_style": addressing}))
+
+class MultipartWriter:
+    """
+    Flux binaire en écriture seule vers un upload multipart S3
+
+    Les octets sont découpés en parties de part_size envoyées par un pool de
+    threads; write() bloque tant que max_inflight parties sont en vol
+    """
+
+    def __init__(self, client, bucket: str, key: str, part_size: int = 8 * 1024 * 1024,
+                 max_inflight: int = 4, metadata: Optional[Dict[str, str]] = None,
+                 content_type: str = "application/octet-stream"):
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size doit être >= {MIN_PART_SIZE} octets")
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.buffer = bytearray()
+        self.parts: List[Dict[str, Any]] = []
+        self.futures = []
+        self.bytes_written = 0
+        self.closed = False
+        self.slots = threading.BoundedSemaphore(max_inflight)
+        self.executor = ThreadPoolExecutor(max_workers=max_inflight)
+        self.upload_id = client.create_multipart_upload(
+            Bucket=bucket, Key=key, Metadata=metadata or {}, ContentType=content_type
+        )["UploadId"]
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.buffer += data
+        self.bytes_written += len(data)
+        while len(self.buffer) >= self.part_size:
+            part = bytes(self.buffer[:self.part_size])
+            del self.buffer[:self.part_size]
+            self._submit(part)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def _submit(self, body: bytes):
+        part_number = len(self.futures) + 1
+        self.slots.acquire()
+        future = self.executor.submit(self._upload_part, part_number, body)
+        future.add_done_callback(lambda _: self.slots.release())
+        self.futures.append(future)
+
+    def _upload_part(self, part_number: int, body: bytes) -> Dict[str, Any]:
+        response = self.client.upload_part(Bucket=self.bucket, Key=self.key,
+                                           UploadId=self.upload_id,
+                                           PartNumber=part_number, Body=body)
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    def close(self):
+        """
+        Envoie la dernière partie et finalise l'upload
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self.buffer or not self.futures:
+                self._submit(bytes(self.buffer))
+                self.buffer = bytearray()
+            self.parts = [future.result() for future in self.futures]
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                MultipartUpload={"Parts": self.parts}
+            )
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self.executor.shutdown(wait=True)
+
+    def abort(self):
+        self.closed = True
+        for future in self.futures:
+            future.cancel()
+        self.executor.shutdown(wait=True)
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key,
+                                           UploadId=self.upload_id)
+
+def existing_digest(client, bucket: str, key: str) -> Optional[str]:
+    """
+    Empreinte enregistrée sur l'objet existant, None s'il est absent
+    """
+    try:
+        response = client.head_object(Bucket=bucket, Key=key)
+    except client.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise
+    return response.get("Metadata", {}).get(DIGEST_METADATA)
+
+def upload_directory(source_dir: str, arcname: str, bucket: str, prefix: str,
+                     compression: str = "gzip", level: int = 6,
+                     part_size: int = 8 * 1024 * 1024, max_inflight: int = 4,
+                     client=None) -> Dict[str, Any]:
+    """
+    Archive source_dir (tar + gzip/zstd) en streaming vers
+    s3://bucket/prefix/<empreinte>/model.<ext>
+
+    Retourne l'URL, l'empreinte, les octets envoyés et uploaded=False si
+    l'objet existait déjà avec la même empreinte
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Compression inconnue: {compression} ({', '.join(COMPRESSIONS)})")
+    client = client or s3_client()
+    digest = content_digest(source_dir)
+    key = "/".join(part for part in (prefix.strip("/"), digest[:16],
+                                     f"model.{COMPRESSIONS[compression]}") if part)
+    result = {"s3_url": f"s3://{bucket}/{key}", "digest": digest,
+              "compression": compression, "uploaded": False, "bytes": 0, "parts": 0}
+
+    if existing_digest(client, bucket, key) == digest:
+        return result
+
+    writer = MultipartWriter(client, bucket, key, part_size=part_size,
+                             max_inflight=max_inflight,
+                             metadata={DIGEST_METADATA: digest})
+    try:
+        if compression == "zstd":
+            import zstandard
+
+            compressed = zstandard.ZstdCompressor(level=level).stream_writer(writer, closefd=False)
+        else:
+            import gzip
+
+            compressed = gzip.GzipFile(fileobj=writer, mode="wb", compresslevel=level, mtime=0)
+        with tarfile.open(fileobj=compressed, mode="w|") as tar:
+            tar.add(source_dir, arcname=arcname)
+        compressed.close()
+    except Exception:
+        writer.abort()
+        raise
+    writer.close()
+
+    result.update(uploaded=True, bytes=writer.bytes_written, parts=len(writer.parts))
+    return result
@@ -0,0 +1,112 @@
+"""
+Preprocessing hors mémoire par morceaux pour data_preprocessing
+Deux passes sur les morceaux d'entrée (relus depuis des .npy en mémoire mappée):
+  1. split train/test déterministe par hachage de l'identifiant de ligne,
+     StandardScaler.partial_fit sur les lignes train
+  2. normalisation et écriture de chaque morceau à sa place dans
+     X_train.npy / X_test.npy / y_train.npy / y_test.npy (pré-alloués sur disque)
+
+La mémoire crête est bornée par chunk_rows, pas par la taille du jeu de données;
+les fichiers produits sont ceux lus par model_training et candidate_training
+"""
+
+import os
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+import numpy as np
+
+# Résolution du split par hachage (test_size arrondi à 1/SPLIT_BUCKETS)
+SPLIT_BUCKETS = 10000
+
+Chunks = Iterator[Tuple[np.ndarray, np.ndarray]]
+
+def hash_split(row_ids: np.ndarray, test_size: float, seed: int = 42) -> np.ndarray:
+    """
+    Masque test d'un ensemble d'identifiants de ligne (hachage splitmix64)
+    Indépendant de l'ordre et du découpage en morceaux
+    """
+    with np.errstate(over="ignore"):
+        h = row_ids.astype(np.uint64) + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15)
+        h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        h = h ^ (h >> np.uint64(31))
+    return (h % np.uint64(SPLIT_BUCKETS)) < np.uint64(round(test_size * SPLIT_BUCKETS))
+
+def npy_chunks(X_path: str, y_path: str, chunk_rows: int) -> Callable[[], Chunks]:
+    """
+    Fabrique d'itérateurs (X, y) par tranches de .npy en mémoire mappée
+    """
+    def iterate() -> Chunks:
+        X = np.load(X_path, mmap_mode="r")
+        y = np.load(y_path, mmap_mode="r")
+        for start in range(0, len(X), chunk_rows):
+            yield np.asarray(X[start:start + chunk_rows]), np.asarray(y[start:start + chunk_rows])
+    return iterate
+
+def preprocess_chunks(make_chunks: Callable[[], Chunks], output_dir: str,
+                      test_size: float = 0.2, seed: int = 42,
+                      dtype=np.float32) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Split, normalisation et écriture des shards; make_chunks est appelé une
+    fois par passe et doit produire les mêmes morceaux dans le même ordre
+
+    Retourne (scaler, statistiques)
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    # Passe 1: split et statistiques du scaler
+    scaler = StandardScaler()
+    n_train = n_test = n_chunks = 0
+    max_chunk = n_features = 0
+    y_dtype = np.int64
+    row_start = 0
+    for X, y in make_chunks():
+        test = hash_split(np.arange(row_start, row_start + len(X)), test_size, seed)
+        row_start += len(X)
+        if (~test).any():
+            scaler.partial_fit(X[~test])
+        n_test += int(test.sum())
+        n_train += int((~test).sum())
+        n_chunks += 1
+        max_chunk = max(max_chunk, len(X))
+        n_features = X.shape[1]
+        y_dtype = y.dtype
+    if n_train == 0 or n_test == 0:
+        raise ValueError(f"Split vide: {n_train} lignes train, {n_test} lignes test")
+
+    # Passe 2: normalisation, écriture de chaque morceau à sa position
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = {
+        "X_train": np.lib.format.open_memmap(f"{output_dir}/X_train.npy", mode="w+",
+                                             dtype=dtype, shape=(n_train, n_features)),
+        "X_test": np.lib.format.open_memmap(f"{output_dir}/X_test.npy", mode="w+",
+                                            dtype=dtype, shape=(n_test, n_features)),
+        "y_train": np.lib.format.open_memmap(f"{output_dir}/y_train.npy", mode="w+",
+                                             dtype=y_dtype, shape=(n_train,)),
+        "y_test": np.lib.format.open_memmap(f"{output_dir}/y_test.npy", mode="w+",
+                                            dtype=y_dtype, shape=(n_test,))
+    }
+    train_at = test_at = row_start = 0
+    for X, y in make_chunks():
+        test = hash_split(np.arange(row_start, row_start + len(X)), test_size, seed)
+        row_start += len(X)
+        scaled = scaler.transform(X).astype(dtype, copy=False)
+        train_rows, test_rows = int((~test).sum()), int(test.sum())
+        outputs["X_train"][train_at:train_at + train_rows] = scaled[~test]
+        outputs["y_train"][train_at:train_at + train_rows] = y[~test]
+        outputs["X_test"][test_at:test_at + test_rows] = scaled[test]
+        outputs["y_test"][test_at:test_at + test_rows] = y[test]
+        train_at += train_rows
+        test_at += test_rows
+    for array in outputs.values():
+        array.flush()
+    del outputs
+
+    stats = {
+        "train_size": n_train,
+        "test_size": n_test,
+        "n_features": n_features,
+        "chunks": n_chunks,
+        "max_chunk_rows": max_chunk
+    }
+    return scaler, stats
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Représentation compacte d'une forêt scikit-learn pour l'inférence CPU
+Tous les arbres sont concaténés dans des tableaux NumPy contigus (feature,
+seuil, enfants, valeurs des feuilles) évalués en une passe vectorisée sur le
+batch, sans objet Python par arbre ni par nœud
+
+Précision "reduced": seuils float16 et probabilités des feuilles en uint8
+(quantifiées sur 255 niveaux), pour diviser l'empreinte mémoire. Une entrée
+comprise entre le seuil exact et son arrondi float16 part à gauche au lieu
+de droite: rounding_report mesure cet écart, publié dans les métriques d'export
+
+Export "python": copié à côté du model.py du backend python de Triton
+
+Utilisation:
+    python compact_forest.py --n-estimators 100
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+PRECISIONS = ("full", "reduced")
+
+# Tableaux sauvegardés (un fichier .npy chacun, ouvrables en mémoire mappée)
+ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+SCALER_ARRAYS = ("mean", "scale")
+
+LEAF_LEVELS = 255
+
+# Écarts tolérés face à sklearn: exacts en pleine précision. En précision
+# réduite, la quantification des feuilles coûte au plus 1/(2*LEAF_LEVELS) par
+# probabilité, mais une entrée à moins d'un ulp float16 d'un seuil peut changer
+# de feuille et déplacer sa probabilité bien au-delà: aucun écart maximal ne
+# distingue ce cas d'un changement de classe, seul l'accord des argmax le fait
+PARITY_TOLERANCES = {
+    "full": {"max_abs_diff": 1e-5, "mean_abs_diff": 1e-6, "class_agreement": 1.0},
+    "reduced": {"max_abs_diff": 0.15, "mean_abs_diff": 1 / (2 * LEAF_LEVELS),
+                "class_agreement": 1.0}
+}
+
+def _index_dtype(max_value: int) -> np.dtype:
+    for dtype in (np.uint8, np.int16, np.int32):
+        if max_value <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+def scaling_dtype(scaler) -> type:
+    """
+    Précision des opérations de StandardScaler.transform sur une entrée float32:
+    float64 avec scikit-learn 1.3 (épinglée par le pipeline), float32 dans les versions
+    récentes; sondée sur des valeurs aléatoires
+    """
+    probe = np.random.default_rng(0).normal(size=(256, len(scaler.mean_))).astype(np.float32)
+    probe = probe * scaler.scale_.astype(np.float32) + scaler.mean_.astype(np.float32)
+    in_float32 = (probe - scaler.mean_.astype(np.float32)) / scaler.scale_.astype(np.float32)
+    return np.float32 if np.array_equal(scaler.transform(probe), in_float32) else np.float64
+
+class CompactForest:
+    """
+    Forêt de classification à plat: les nœuds de tous les arbres partagent des
+    indices globaux, les feuilles bouclent sur elles-mêmes (traversée à profondeur
+    fixe) et portent les probabilités de classe normalisées
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], depth: int, classes: np.ndarray,
+                 precision: str = "full"):
+        self.arrays = arrays
+        self.depth = depth
+        self.classes = classes
+        self.precision = precision
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.arrays["roots"])
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.arrays["feature"])
+
+    @property
+    def has_scaler(self) -> bool:
+        return "mean" in self.arrays
+
+    @classmethod
+    def from_sklearn(cls, forest, scaler=None, precision: str = "full") -> "CompactForest":
+        """
+        Construit la forêt compacte d'un RandomForestClassifier entraîné
+        Avec un StandardScaler, predict_proba attend des entrées brutes
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Précision inconnue: {precision} (attendu: {PRECISIONS})")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(tree.node_count)
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            leaf_values = tree.value[:, 0, :]
+            values.append(leaf_values / leaf_values.sum(axis=1, keepdims=True))
+            offset += tree.node_count
+
+        node_dtype = _index_dtype(offset - 1)
+        if node_dtype == np.uint8:
+            node_dtype = np.dtype(np.int16)
+        value = np.concatenate(values)
+        if precision == "reduced":
+            # Arrondi vers le haut: les valeurs égales au seuil (fréquentes, sklearn
+            # place certains seuils sur une valeur d'entraînement) restent à gauche
+            threshold = np.concatenate(thresholds)
+            threshold_16 = threshold.astype(np.float16)
+            below = threshold_16.astype(np.float64) < threshold
+            threshold_16[below] = np.nextafter(threshold_16[below], np.float16(np.inf))
+            threshold = threshold_16
+            value = np.round(value * LEAF_LEVELS).astype(np.uint8)
+        else:
+            threshold = np.concatenate(thresholds).astype(np.float64)
+            value = value.astype(np.float64)
+
+        arrays = {
+            "feature": np.concatenate(features).astype(_index_dtype(forest.n_features_in_ - 1)),
+            "threshold": threshold,
+            "left": np.concatenate(lefts).astype(node_dtype),
+            "right": np.concatenate(rights).astype(node_dtype),
+            "value": value,
+            "roots": np.array(roots, dtype=node_dtype)
+        }
+        if scaler is not None:
+            dtype = scaling_dtype(scaler)
+            arrays["mean"] = scaler.mean_.astype(dtype)
+            arrays["scale"] = scaler.scale_.astype(dtype)
+
+        depth = max(estimator.tree_.max_depth for estimator in forest.estimators_)
+        return cls(arrays, int(depth), np.asarray(forest.classes_), precision)
+
+    def transform(self, x: np.ndarray) -> np.ndarray:
+        """
+        Normalisation avec les mêmes arrondis que StandardScaler.transform (entrée float32)
+        """
+        dtype = self.arrays["mean"].dtype
+        x = np.asarray(x, dtype=np.float32)
+        x_scaled = (x.astype(dtype) - self.arrays["mean"]).astype(np.float32)
+        return (x_scaled.astype(dtype) / self.arrays["scale"]).astype(np.float32)
+
+    def apply(self, x: np.ndarray) -> np.ndarray:
+        """
+        Feuilles atteintes (indices globaux), (n, n_trees); tous les arbres
+        avancés d'un niveau par itération sur le batch complet
+        """
+        if self.has_scaler:
+            x = self.transform(x)
+        compare_dtype = np.float32 if self.precision == "reduced" else np.float64
+        x = np.asarray(x, dtype=np.float32).astype(compare_dtype)
+        feature = self.arrays["feature"]
+        threshold = self.arrays["threshold"]
+        left = self.arrays["left"]
+        right = self.arrays["right"]
+
+        nodes = np.broadcast_to(self.arrays["roots"], (len(x), self.n_trees))
+        for _ in range(self.depth):
+            feature_values = np.take_along_axis(x, feature[nodes].astype(np.intp), axis=1)
+            go_left = feature_values <= threshold[nodes]
+            nodes = np.where(go_left, left[nodes], right[nodes])
+        return nodes
+
+    def predict_proba(self, x: np.ndarray) -> np.ndarray:
+        """
+        Probabilités (n, n_classes) en float32
+        """
+        leaves = self.arrays["value"][self.apply(x)]
+        if self.precision == "reduced":
+            return (leaves.mean(axis=1, dtype=np.float64) / LEAF_LEVELS).astype(np.float32)
+        return leaves.mean(axis=1).astype(np.float32)
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        return self.classes[self.predict_proba(x).argmax(axis=1)]
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+        with open(os.path.join(directory, "forest.json"), "w") as f:
+            json.dump({"depth": self.depth, "precision": self.precision,
+                       "classes": self.classes.tolist(), "n_trees": self.n_trees,
+                       "n_nodes": self.n_nodes}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "CompactForest":
+        """
+        Recharge une forêt sauvegardée; en mémoire mappée (lecture seule) par
+        défaut, pour que plusieurs processus partagent les mêmes pages
+        """
+        with open(os.path.join(directory, "forest.json")) as f:
+            info = json.load(f)
+        names = ARRAYS + (SCALER_ARRAYS if os.path.exists(
+            os.path.join(directory, "mean.npy")) else ())
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"),
+                                mmap_mode="r" if mmap else None)
+                  for name in names}
+        return cls(arrays, info["depth"], np.asarray(info["classes"]), info["precision"])
+
+    def memory_report(self, forest=None) -> Dict[str, Any]:
+        """
+        Octets par tableau; avec la forêt sklearn d'origine, taille de son pickle
+        en comparaison
+        """
+        report: Dict[str, Any] = {
+            "precision": self.precision,
+            "n_trees": self.n_trees,
+            "n_nodes": self.n_nodes,
+            "arrays": {name: int(array.nbytes) for name, array in self.arrays.items()}
+        }
+        report["total_bytes"] = sum(report["arrays"].values())
+        if forest is not None:
+            import pickle
+            report["sklearn_pickle_bytes"] = len(pickle.dumps(forest))
+        return report
+
+def rounding_report(reduced: "CompactForest", full: "CompactForest",
+                    x: np.ndarray) -> Dict[str, Any]:
+    """
+    Coût des seuils float16 sur des entrées x (mêmes forêt et scaler en
+    précisions "reduced" et "full"): arrondi maximal d'un seuil et part des
+    lignes dont au moins un arbre aboutit à une autre feuille
+    """
+    split = np.isfinite(full.arrays["threshold"])
+    rounding = (np.asarray(reduced.arrays["threshold"][split], dtype=np.float64)
+                - full.arrays["threshold"][split])
+    rerouted = (reduced.apply(x) != full.apply(x)).any(axis=1)
+    return {
+        "threshold_max_rounding": float(rounding.max()) if rounding.size else 0.0,
+        "rerouted_rows": int(rerouted.sum()),
+        "rerouted_fraction": float(rerouted.mean()) if len(rerouted) else 0.0
+    }
+
+def check_parity(probabilities: np.ndarray, expected: np.ndarray,
+                 precision: str = "full") -> Dict[str, Any]:
+    """
+    Compare des probabilités à celles de sklearn selon PARITY_TOLERANCES
+    (rappelées dans le rapport sous "tolerance")
+    """
+    tolerance = PARITY_TOLERANCES[precision]
+    diff = np.abs(np.asarray(probabilities, dtype=np.float64) - expected)
+    report = {
+        "max_abs_diff": float(diff.max()) if diff.size else 0.0,
+        "mean_abs_diff": float(diff.mean()) if diff.size else 0.0,
+        "class_agreement": float((np.argmax(probabilities, axis=1) ==
+                                  np.argmax(expected, axis=1)).mean()) if diff.size else 1.0
+    }
+    report["tolerance"] = dict(tolerance)
+    report["ok"] = (report["max_abs_diff"] <= tolerance["max_abs_diff"] and
+                    report["mean_abs_diff"] <= tolerance["mean_abs_diff"] and
+                    report["class_agreement"] >= tolerance["class_agreement"])
+    return report
+
+def print_memory_report(report: Dict[str, Any]) -> None:
+    print(f"\n💾 Forêt compacte ({report['precision']}): {report['n_trees']} arbres, "
+          f"{report['n_nodes']} nœuds")
+    for name, size in report["arrays"].items():
+        print(f"   {name:<10} {size / 1024:>8.1f} Ko")
+    print(f"   {'total':<10} {report['total_bytes'] / 1024:>8.1f} Ko")
+    if "sklearn_pickle_bytes" in report:
+        ratio = report["sklearn_pickle_bytes"] / max(report["total_bytes"], 1)
+        print(f"   sklearn (pickle): {report['sklearn_pickle_bytes'] / 1024:.1f} Ko "
+              f"(×{ratio:.1f})")
+
+def main(argv: Optional[list] = None):
+    import argparse
+    import time
+
+    from sklearn.datasets import load_iris
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    parser = argparse.ArgumentParser(description="Forêt compacte: parité, mémoire et latence")
+    parser.add_argument("--n-estimators", type=int, default=100,
+                       help="Nombre d'arbres")
+    parser.add_argument("--batch-size", type=int, default=8,
+                       help="Taille de batch pour la mesure de latence")
+    parser.add_argument("--iterations", type=int, default=200,
+                       help="Nombre d'appels mesurés")
+    args = parser.parse_args(argv)
+
+    iris = load_iris()
+    X_train, X_test, y_train, _ = train_test_split(
+        iris.data, iris.target, test_size=0.2, random_state=42, stratify=iris.target
+    )
+    scaler = StandardScaler()
+    model = RandomForestClassifier(n_estimators=args.n_estimators, random_state=42)
+    model.fit(scaler.fit_transform(X_train), y_train)
+    raw_test = X_test.astype(np.float32)
+    expected = model.predict_proba(scaler.transform(raw_test)).astype(np.float32)
+    batch = np.resize(raw_test, (args.batch_size, raw_test.shape[1]))
+
+    def time_calls(function):
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            function(batch)
+        return (time.perf_counter() - start) / args.iterations * 1000
+
+    sklearn_ms = time_calls(lambda x: model.predict_proba(scaler.transform(x)))
+    print(f"⏱️  sklearn predict_proba (batch {args.batch_size}): {sklearn_ms:.3f} ms")
+    for precision in PRECISIONS:
+        compact = CompactForest.from_sklearn(model, scaler, precision)
+        parity = check_parity(compact.predict_proba(raw_test), expected, precision)
+        print_memory_report(compact.memory_report(model))
+        print(f"   {'✅' if parity['ok'] else '❌'} écart max {parity['max_abs_diff']:.2e}, "
+              f"accord des classes {parity['class_agreement'] * 100:.1f}%, "
+              f"{time_calls(compact.predict_proba):.3f} ms")
+        if precision == "reduced":
+            rounding = rounding_report(compact, CompactForest.from_sklearn(model, scaler),
+                                       raw_test)
+            print(f"   seuils arrondis de {rounding['threshold_max_rounding']:.1e} au plus, "
+                  f"{rounding['rerouted_fraction'] * 100:.1f}% des lignes changent de feuille")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 import os
-import pickle
 import numpy as np
 from sklearn.datasets import load_iris
 from sklearn.model_selection import train_test_split
 
+from dataset_bundle import BUNDLE_FILE, save_bundle
+from synthetic_data import DEFAULT_CHUNK_ROWS, write_dataset
+
 print("🔧 Préparation des données Iris")
 print("=" * 40)
 
@@ -11,44 +13,64 @@ print("=" * 40)
 PROJECT_NAME = os.getenv('PROJECT_NAME', 'iris')
 S3_DATA_PATH = f"{PROJECT_NAME}-data"
 
-# Charger et préparer les données
-iris = load_iris()
-X, y = iris.data, iris.target
-
-# S'assurer que feature_names et target_names sont des listes Python
-feature_names = list(iris.feature_names) if hasattr(iris, 'feature_names') else []
-target_names = list(iris.target_names) if hasattr(iris, 'target_names') else []
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=float(os.getenv('TEST_SIZE', 0.2)),
-    random_state=int(os.getenv('RANDOM_STATE', 42))
-)
-
-# Sauvegarder les données (sera uploadé vers S3/triton-data/iris-data/)
-with open('X_train.pkl', 'wb') as f:
-    pickle.dump(X_train, f)
-with open('X_test.pkl', 'wb') as f:
-    pickle.dump(X_test, f)
-with open('y_train.pkl', 'wb') as f:
-    pickle.dump(y_train, f)
-with open('y_test.pkl', 'wb') as f:
-    pickle.dump(y_test, f)
-
-# Sauvegarder les métadonnées
+# Mode synthétique: SYNTHETIC_ROWS > 0 remplace Iris par un jeu généré à grande échelle
+SYNTHETIC_ROWS = int(os.getenv('SYNTHETIC_ROWS', 0))
+SYNTHETIC_FEATURES = int(os.getenv('SYNTHETIC_FEATURES', 4))
+SYNTHETIC_CHUNK_ROWS = int(os.getenv('SYNTHETIC_CHUNK_ROWS', DEFAULT_CHUNK_ROWS))
+TEST_SIZE = float(os.getenv('TEST_SIZE', 0.2))
+
+if SYNTHETIC_ROWS > 0:
+    print(f"🧪 Génération de {SYNTHETIC_ROWS} lignes synthétiques ({SYNTHETIC_FEATURES} features)")
+    synthetic_metadata = write_dataset('synthetic', SYNTHETIC_ROWS, SYNTHETIC_FEATURES,
+                                       SYNTHETIC_CHUNK_ROWS,
+                                       int(os.getenv('RANDOM_STATE', 42)))
+    X = np.load('synthetic/X.npy', mmap_mode='r')
+    y = np.load('synthetic/y.npy', mmap_mode='r')
+    feature_names = synthetic_metadata["feature_names"]
+    target_names = synthetic_metadata["target_names"]
+    # Lu dans les métadonnées: np.unique parcourrait tout y (mémoire mappée)
+    n_classes = synthetic_metadata["n_classes"]
+
+    # Lignes i.i.d.: un découpage contigu vaut un split aléatoire, sans copie
+    n_train = len(X) - int(round(len(X) * TEST_SIZE))
+    X_train, X_test = X[:n_train], X[n_train:]
+    y_train, y_test = y[:n_train], y[n_train:]
+else:
+    # Charger et préparer les données
+    iris = load_iris()
+    X, y = iris.data, iris.target
+
+    # S'assurer que feature_names et target_names sont des listes Python
+    feature_names = list(iris.feature_names) if hasattr(iris, 'feature_names') else []
+    target_names = list(iris.target_names) if hasattr(iris, 'target_names') else []
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=TEST_SIZE,
+        random_state=int(os.getenv('RANDOM_STATE', 42))
+    )
+    n_classes = len(np.unique(y))
+
+# Métadonnées embarquées dans le bundle
 metadata = {
     "feature_names": feature_names,
     "target_names": target_names,
     "n_features": X.shape[1],
-    "n_classes": len(np.unique(y)),
+    "n_classes": n_classes,
     "train_size": len(X_train),
     "test_size": len(X_test)
 }
 
-with open('metadata.pkl', 'wb') as f:
-    pickle.dump(metadata, f)
+# Sauvegarder les splits en un seul bundle (sera uploadé vers S3/triton-data/iris-data/)
+save_bundle(BUNDLE_FILE, {
+    "X_train": X_train,
+    "X_test": X_test,
+    "y_train": y_train,
+    "y_test": y_test
+}, metadata)
 
 print(f"✅ Données préparées: {X_train.shape[0]} train, {X_test.shape[0]} test")
 print(f"📊 Features: {X_train.shape[1]}")
-print(f"🎯 Classes: {len(np.unique(y))}")
+print(f"🎯 Classes: {n_classes}")
+print(f"📦 Bundle: {BUNDLE_FILE} ({os.path.getsize(BUNDLE_FILE) / 1024:.1f} Ko)")
 print(f"📁 S3 Path: triton-data/{S3_DATA_PATH}/")
 print(f"📋 Métadonnées sauvegardées: {len(feature_names)} features, {len(target_names)} classes")
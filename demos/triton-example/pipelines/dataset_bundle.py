@@ -0,0 +1,76 @@
+"""
+Bundle de données du pipeline Elyra: un seul fichier .npz non compressé
+(X_train, X_test, y_train, y_test) avec les métadonnées en JSON embarqué
+
+Un objet S3 par exécution au lieu d'un par split, pas de pickle: les
+tableaux sont relus en mémoire mappée directement dans l'archive (membres
+stockés sans compression)
+
+Dépendance des nœuds data_preprocessing.py, model_training.py et
+model_registry.py (voir iris.pipeline)
+"""
+
+import json
+import struct
+import zipfile
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+BUNDLE_FILE = "iris_dataset.npz"
+BUNDLE_VERSION = 1
+
+METADATA_KEY = "__metadata__"
+
+# En-tête local d'un membre zip: signature, ..., longueur du nom, longueur de l'extra
+LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+
+def save_bundle(path: str, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]) -> None:
+    """
+    Écrit les tableaux et les métadonnées (JSON) dans un .npz non compressé
+    """
+    payload = {"bundle_version": BUNDLE_VERSION, **metadata}
+    np.savez(path, **{name: np.ascontiguousarray(array) for name, array in arrays.items()},
+             **{METADATA_KEY: np.array(json.dumps(payload))})
+
+def _member_array(path: str, archive: zipfile.ZipFile, info: zipfile.ZipInfo,
+                  mmap: bool) -> np.ndarray:
+    if not mmap or info.compress_type != zipfile.ZIP_STORED:
+        with archive.open(info) as f:
+            return np.lib.format.read_array(f, allow_pickle=False)
+
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        fields = LOCAL_HEADER.unpack(f.read(LOCAL_HEADER.size))
+        f.seek(fields[-2] + fields[-1], 1)
+        version = np.lib.format.read_magic(f)
+        read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                       else np.lib.format.read_array_header_2_0)
+        shape, fortran_order, dtype = read_header(f)
+        offset = f.tell()
+    if dtype.hasobject:
+        raise ValueError(f"{info.filename}: tableaux d'objets non supportés")
+    if not shape or int(np.prod(shape)) == 0:
+        with archive.open(info) as member:
+            return np.lib.format.read_array(member, allow_pickle=False)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape,
+                     order="F" if fortran_order else "C")
+
+def load_bundle(path: str = BUNDLE_FILE,
+                mmap: bool = True) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Relit un bundle: (tableaux, métadonnées); tableaux en mémoire mappée
+    (lecture seule) si mmap
+    """
+    arrays, metadata = {}, {}
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            name = info.filename[:-len(".npy")]
+            if name == METADATA_KEY:
+                with archive.open(info) as f:
+                    metadata = json.loads(str(np.lib.format.read_array(f, allow_pickle=False)))
+            else:
+                arrays[name] = _member_array(path, archive, info, mmap)
+    if metadata.get("bundle_version") != BUNDLE_VERSION:
+        raise ValueError(f"Version de bundle non supportée: {metadata.get('bundle_version')}")
+    return arrays, metadata
@@ -5,59 +5,145 @@ Pipeline complet d'entraînement et déploiement d'un modèle Iris avec NVIDIA T
 """
 
 from kfp import dsl, compiler
-from kfp.dsl import component, pipeline, Input, Output, Artifact, Model
+from kfp.dsl import component, pipeline, Input, Output, Artifact, Model, Metrics
+from typing import List
+import atexit
+import hashlib
+import inspect
 import os
+import shutil
+import tempfile
 
 # Images de base pour les composants
 BASE_IMAGE = "quay.io/modh/runtime-images:runtime-cuda-tensorflow-ubi9-python-3.9-2023b-20240301"
 
+PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules partagés embarqués dans chaque composant (chemins relatifs à pipelines/)
+PREPROCESSING_MODULES = ("step_cache.py", "synthetic_data.py", "chunked_preprocessing.py")
+CANDIDATE_MODULES = ("compact_forest.py", "model_export.py")
+TRAINING_MODULES = ("step_cache.py", "compact_forest.py", "model_export.py",
+                    "triton_python_backend/model.py")
+VERIFICATION_MODULES = ("compact_forest.py",)
+REGISTRY_MODULES = ("artifact_upload.py",)
+
+def component_modules(paths) -> str:
+    """
+    Répertoire à embarquer dans un composant (embedded_artifact_path): copie
+    des seuls modules qu'il importe; KFP l'extrait et l'ajoute au sys.path à
+    l'exécution, les composants font un import ordinaire
+    """
+    staging = tempfile.mkdtemp(prefix="iris-pipeline-modules-")
+    atexit.register(shutil.rmtree, staging, True)
+    for path in paths:
+        target = os.path.join(staging, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(os.path.join(PIPELINE_DIR, path), target)
+    return staging
+
+# Grille d'hyperparamètres par défaut du balayage (null = valeur sklearn None)
+DEFAULT_PARAM_GRID = '{"n_estimators": [50, 100, 200], "max_depth": [null, 4], "max_features": ["sqrt", null]}'
+
+# Nombre maximal de candidats entraînés en parallèle
+SWEEP_PARALLELISM = 4
+
 @component(
     base_image=BASE_IMAGE,
     packages_to_install=[
         "pandas==2.0.3",
         "numpy==1.24.3", 
-        "scikit-learn==1.3.0"
-    ]
+        "scikit-learn==1.3.0",
+        "boto3==1.28.25"
+    ],
+    embedded_artifact_path=component_modules(PREPROCESSING_MODULES)
 )
-def data_preprocessing(output_data: Output[Artifact]) -> str:
-    """Étape 1: Preprocessing des données Iris"""
+def data_preprocessing(output_data: Output[Artifact],
+                       synthetic_rows: int = 0,
+                       synthetic_features: int = 4,
+                       synthetic_chunk_rows: int = 1000000,
+                       cache_location: str = "",
+                       cache_bypass: bool = False,
+                       component_digest: str = "") -> str:
+    """Étape 1: Preprocessing des données Iris
+    
+    synthetic_rows > 0: jeu synthétique de distributions type Iris
+    (synthetic_data.py), synthetic_features features, généré sur disque
+    par morceaux de synthetic_chunk_rows lignes, à la place des 150 lignes d'Iris
+    
+    Les deux sources sont écrites en .npy puis prétraitées hors mémoire
+    (chunked_preprocessing.py) par morceaux de synthetic_chunk_rows lignes:
+    split par hachage des lignes, StandardScaler.partial_fit, shards
+    normalisés FP32 sur disque, relus en mémoire mappée par les étapes
+    suivantes. La forêt aléatoire n'est pas incrémentale: model_training et
+    candidate_training l'entraînent sur X_train mappé (sans copie), la
+    mémoire résidente suit alors le cache de pages et non le tas Python
+    
+    cache_location: préfixe s3://bucket/prefix ou répertoire local du cache
+    d'étapes (vide = désactivé); cache_bypass force l'exécution et rafraîchit l'entrée
+    """
     
-    import pandas as pd
     import numpy as np
-    from sklearn.datasets import load_iris
-    from sklearn.model_selection import train_test_split
-    from sklearn.preprocessing import StandardScaler
     import pickle
     import os
+    import shutil
+    import tempfile
     
-    print("🔄 [Preprocessing] Chargement des données Iris...")
-    
-    # Charger le dataset Iris
-    iris = load_iris()
-    X, y = iris.data, iris.target
-    feature_names = iris.feature_names
-    target_names = iris.target_names
-    
-    print(f"📊 Dataset: {X.shape[0]} échantillons, {X.shape[1]} features")
-    
-    # Division train/test
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
-    
-    # Normalisation
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    import chunked_preprocessing
+    
+    # Cache d'étapes: clé = code du composant et de ses modules (component_digest)
+    # et paramètres du jeu de données
+    params = {"synthetic_rows": synthetic_rows, "synthetic_features": synthetic_features,
+              "synthetic_chunk_rows": synthetic_chunk_rows}
+    cache = None
+    if cache_location:
+        import step_cache
+        cache = step_cache.StepCache(cache_location)
+        cache_key = step_cache.cache_key("data_preprocessing", component_digest, params)
+        if cache_bypass:
+            step_cache.report("data_preprocessing", cache_key, "bypass")
+        elif cache.restore("data_preprocessing", cache_key, output_data.path):
+            step_cache.report("data_preprocessing", cache_key, "hit")
+            return output_data.path
+        else:
+            step_cache.report("data_preprocessing", cache_key, "miss")
     
-    # Sauvegarder dans le répertoire de sortie
     output_path = output_data.path
     os.makedirs(output_path, exist_ok=True)
     
-    np.save(f"{output_path}/X_train.npy", X_train_scaled)
-    np.save(f"{output_path}/X_test.npy", X_test_scaled)
-    np.save(f"{output_path}/y_train.npy", y_train)
-    np.save(f"{output_path}/y_test.npy", y_test)
+    # Jeu de données brut sur disque (X.npy float32, y.npy int64)
+    dataset_dir = tempfile.mkdtemp()
+    if synthetic_rows > 0:
+        print(f"🔄 [Preprocessing] Génération de {synthetic_rows} lignes synthétiques...")
+        import synthetic_data
+        
+        synthetic_metadata = synthetic_data.write_dataset(dataset_dir, synthetic_rows,
+                                                          synthetic_features,
+                                                          synthetic_chunk_rows)
+        feature_names = synthetic_metadata["feature_names"]
+        target_names = synthetic_metadata["target_names"]
+        print(f"📊 Dataset: {synthetic_rows} échantillons, {synthetic_features} features")
+    else:
+        print("🔄 [Preprocessing] Chargement des données Iris...")
+        from sklearn.datasets import load_iris
+        
+        iris = load_iris()
+        np.save(f"{dataset_dir}/X.npy", iris.data.astype(np.float32))
+        np.save(f"{dataset_dir}/y.npy", iris.target.astype(np.int64))
+        feature_names = iris.feature_names
+        target_names = iris.target_names
+        print(f"📊 Dataset: {iris.data.shape[0]} échantillons, {iris.data.shape[1]} features")
+    
+    # Split par hachage des identifiants de ligne, scaler incrémental et
+    # shards normalisés écrits sur disque: mémoire bornée par un morceau
+    scaler, stats = chunked_preprocessing.preprocess_chunks(
+        chunked_preprocessing.npy_chunks(f"{dataset_dir}/X.npy", f"{dataset_dir}/y.npy",
+                                         synthetic_chunk_rows),
+        output_path, test_size=0.2, seed=42
+    )
+    shutil.rmtree(dataset_dir)
+    n_features, train_size, test_size = (stats["n_features"], stats["train_size"],
+                                          stats["test_size"])
+    print(f"🧩 {stats['chunks']} morceau(x) de {stats['max_chunk_rows']} lignes max")
     
     with open(f"{output_path}/scaler.pkl", "wb") as f:
         pickle.dump(scaler, f)
@@ -65,57 +151,311 @@ def data_preprocessing(output_data: Output[Artifact]) -> str:
     metadata = {
         "feature_names": feature_names,  # feature_names est déjà une liste
         "target_names": target_names,    # target_names est déjà une liste
-        "n_features": X.shape[1],
+        "n_features": n_features,
         "n_classes": len(target_names),
-        "train_size": len(X_train),
-        "test_size": len(X_test)
+        "train_size": train_size,
+        "test_size": test_size
     }
     
     with open(f"{output_path}/metadata.pkl", "wb") as f:
         pickle.dump(metadata, f)
     
+    if cache is not None:
+        cache.store("data_preprocessing", cache_key, output_path)
+    
     print("✅ [Preprocessing] Terminé avec succès!")
     return output_path
 
+@component(
+    base_image=BASE_IMAGE,
+    packages_to_install=[]
+)
+def expand_param_grid(param_grid: str) -> list:
+    """Étape 2a: Produit cartésien de la grille d'hyperparamètres
+    
+    param_grid: JSON {"n_estimators": [...], "max_depth": [...], "max_features": [...]};
+    une clé absente garde la valeur par défaut de model_training
+    """
+    
+    import itertools
+    import json
+    
+    grid = json.loads(param_grid)
+    if not isinstance(grid, dict):
+        raise ValueError(f"param_grid doit être un objet JSON: {param_grid}")
+    unknown = set(grid) - {"n_estimators", "max_depth", "max_features"}
+    if unknown:
+        raise ValueError(f"Hyperparamètres non supportés: {sorted(unknown)}")
+    scalars = sorted(name for name, values in grid.items() if not isinstance(values, list))
+    if scalars:
+        raise ValueError(f"Les valeurs de param_grid doivent être des listes: {scalars}")
+    names = sorted(grid)
+    candidates = [dict(zip(names, values))
+                  for values in itertools.product(*(grid[name] for name in names))]
+    if not candidates:
+        raise ValueError("Grille d'hyperparamètres vide")
+    
+    print(f"🧮 [Sweep] {len(candidates)} candidat(s): {names}")
+    return candidates
+
 @component(
     base_image=BASE_IMAGE,
     packages_to_install=[
         "tensorflow==2.13.0",
         "scikit-learn==1.3.0",
-        "numpy==1.24.3"
-    ]
+        "numpy==1.24.3",
+        "onnx==1.14.1",
+        "skl2onnx==1.15.0",
+        "onnxruntime==1.15.1"
+    ],
+    embedded_artifact_path=component_modules(CANDIDATE_MODULES)
 )
-def model_training(input_data: Input[Artifact], output_model: Output[Model]) -> str:
-    """Étape 2: Entraînement du modèle et export Triton"""
+def candidate_training(input_data: Input[Artifact], candidate: dict,
+                       export_format: str = "native",
+                       forest_precision: str = "full",
+                       batch_size: int = 8,
+                       batching_config: str = "",
+                       iterations: int = 50) -> str:
+    """Étape 2b: Entraînement et mesure d'un candidat de la grille
+    
+    Accuracy et latence p99 par batch (entrées brutes, scaler compris) mesurées
+    avec le chemin d'inférence de export_format, construit comme dans
+    model_training (model_export.py, compact_forest.py); batching_config
+    remplace batch_size comme pour l'export. Retourne un JSON
+    {"hyperparameters", "accuracy", "latency_p99_ms", "forest_bytes"} pour
+    candidate_selection
+    """
+    
+    import json
+    import pickle
+    import time
+    import numpy as np
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
+    
+    import compact_forest
+    import model_export
+    
+    data_path = input_data.path
+    X_train = np.load(f"{data_path}/X_train.npy", mmap_mode="r")
+    X_test = np.load(f"{data_path}/X_test.npy", mmap_mode="r")
+    y_train = np.load(f"{data_path}/y_train.npy", mmap_mode="r")
+    y_test = np.load(f"{data_path}/y_test.npy", mmap_mode="r")
+    with open(f"{data_path}/scaler.pkl", "rb") as f:
+        scaler = pickle.load(f)
+    n_features = X_train.shape[1]
+    raw_test = scaler.inverse_transform(X_test).astype(np.float32)
     
+    if batching_config:
+        recommendation = json.loads(batching_config)
+        batch_size = int(recommendation.get("recommendation", recommendation)["max_batch_size"])
+    batch_size = max(batch_size, 1)
+    
+    print(f"🔄 [Sweep] Entraînement du candidat {candidate}...")
+    model = RandomForestClassifier(**candidate, random_state=42)
+    model.fit(X_train, y_train)
+    compact = compact_forest.CompactForest.from_sklearn(model)
+    
+    # Inférence du format exporté, sur entrées brutes
+    forest = compact
+    if export_format == "python":
+        forest = compact_forest.CompactForest.from_sklearn(model, scaler, forest_precision)
+        predict = forest.predict_proba
+    elif export_format == "onnx":
+        import onnxruntime as ort
+        session = ort.InferenceSession(model_export.export_onnx(model, scaler, n_features),
+                                       providers=["CPUExecutionProvider"])
+        predict = lambda batch: session.run(["probabilities"], {"x": batch})[0]
+    elif export_format in ("native", "py_function"):
+        import tensorflow as tf
+        module = (model_export.native_forest_module(compact, scaler, n_features)
+                  if export_format == "native"
+                  else model_export.py_function_wrapper(model, scaler, n_features))
+        predict = lambda batch: module(tf.constant(batch))["probabilities"].numpy()
+    else:
+        raise ValueError(f"export_format inconnu: {export_format}")
+    
+    accuracy = accuracy_score(y_test, model.classes_[predict(raw_test).argmax(axis=1)])
+    
+    batches = [raw_test[start:start + batch_size] for start in range(0, len(raw_test), batch_size)]
+    for batch in batches[:2]:
+        predict(batch)
+    timings = []
+    for _ in range(iterations):
+        for batch in batches:
+            start = time.perf_counter()
+            predict(batch)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    p99_ms = timings[min(int(len(timings) * 0.99), len(timings) - 1)] * 1000
+    
+    print(f"🎯 Accuracy {accuracy:.4f}, p99 {export_format} batch {batch_size}: {p99_ms:.3f} ms")
+    return json.dumps({
+        "hyperparameters": candidate,
+        "accuracy": float(accuracy),
+        "latency_p99_ms": p99_ms,
+        "forest_bytes": forest.memory_report()["total_bytes"]
+    })
+
+@component(
+    base_image=BASE_IMAGE,
+    packages_to_install=[]
+)
+def candidate_selection(results: List[str], metrics: Output[Metrics],
+                        accuracy_floor: float = 0.0,
+                        latency_ceiling_ms: float = 0.0) -> str:
+    """Étape 2c: Choix du candidat exporté
+    
+    Parmi les candidats au-dessus de accuracy_floor et sous latency_ceiling_ms
+    (0 = pas de plafond), retient la meilleure accuracy, puis la plus faible
+    latence p99, puis la plus petite forêt; retourne ses hyperparamètres en
+    JSON pour model_training
+    """
+    
+    import json
+    
+    candidates = [json.loads(result) for result in results]
+    eligible = [candidate for candidate in candidates
+                if candidate["accuracy"] >= accuracy_floor
+                and (not latency_ceiling_ms or candidate["latency_p99_ms"] <= latency_ceiling_ms)]
+    
+    def rank(candidate):
+        return -candidate["accuracy"], candidate["latency_p99_ms"], candidate["forest_bytes"]
+    
+    print(f"\n{'hyperparamètres':<60} {'accuracy':>9} {'p99':>10} {'forêt':>10}")
+    for candidate in sorted(candidates, key=rank):
+        marker = "✅" if candidate in eligible else "❌"
+        print(f"{marker} {json.dumps(candidate['hyperparameters'], sort_keys=True):<58} "
+              f"{candidate['accuracy']:>9.4f} {candidate['latency_p99_ms']:>8.3f}ms "
+              f"{candidate['forest_bytes'] / 1024:>7.1f} Ko")
+    
+    if not eligible:
+        raise RuntimeError(f"Aucun candidat sur {len(candidates)} ne respecte "
+                           f"accuracy >= {accuracy_floor} et p99 <= {latency_ceiling_ms or '∞'} ms")
+    
+    winner = min(eligible, key=rank)
+    metrics.log_metric("candidates", len(candidates))
+    metrics.log_metric("eligible_candidates", len(eligible))
+    metrics.log_metric("winner_accuracy", winner["accuracy"])
+    metrics.log_metric("winner_latency_p99_ms", winner["latency_p99_ms"])
+    metrics.log_metric("winner_forest_bytes", winner["forest_bytes"])
+    
+    print(f"🏆 [Sweep] Candidat retenu: {winner['hyperparameters']}")
+    return json.dumps(winner["hyperparameters"], sort_keys=True)
+
+@component(
+    base_image=BASE_IMAGE,
+    packages_to_install=[
+        "tensorflow==2.13.0",
+        "scikit-learn==1.3.0",
+        "numpy==1.24.3",
+        "onnx==1.14.1",
+        "skl2onnx==1.15.0",
+        "onnxruntime==1.15.1",
+        "tritonclient[grpc]==2.37.0",
+        "boto3==1.28.25"
+    ],
+    embedded_artifact_path=component_modules(TRAINING_MODULES)
+)
+def model_training(input_data: Input[Artifact], output_model: Output[Model],
+                   hyperparameters: str = "",
+                   export_format: str = "native",
+                   max_batch_size: int = 8,
+                   preferred_batch_sizes: str = "",
+                   max_queue_delay_us: int = 100,
+                   instance_count: int = 1,
+                   instance_kind: str = "KIND_CPU",
+                   warmup_batch_sizes: str = "1",
+                   batching_config: str = "",
+                   forest_precision: str = "full",
+                   cache_location: str = "",
+                   cache_bypass: bool = False,
+                   component_digest: str = "") -> str:
+    """Étape 3: Entraînement du modèle retenu et export Triton
+    
+    hyperparameters: JSON {"n_estimators", "max_depth", "max_features"} choisi
+    par candidate_selection (vide = n_estimators=100, valeurs sklearn par défaut)
+    
+    export_format: "native" (scaler et arbres compilés en ops TensorFlow,
+    SavedModel autonome), "py_function" (wrapper sklearn via tf.py_function)
+    ou "onnx" (scaler + forêt en un graphe ONNX, backend onnxruntime) ou
+    "python" (backend python de Triton: triton_python_backend/model.py + tableaux .npy)
+    
+    compact_forest.py (forêt en tableaux NumPy) sert à l'évaluation et aux
+    exports "native" et "python"; forest_precision "reduced" (seuils float16,
+    feuilles uint8) pour l'export "python"
+    
+    cache_location: cache d'étapes (voir data_preprocessing); la clé couvre le
+    code du composant et de ses modules, tous les paramètres d'export et le
+    contenu de input_data
+    
+    Le config.pbtxt est généré à partir des paramètres (tailles séparées par
+    des virgules) ou de batching_config: JSON produit par benchmark_sweep.py
+    (rapport complet ou sa clé "recommendation"), prioritaire sur
+    max_batch_size et preferred_batch_sizes
+    """
+    
+    # Paramètres de la clé de cache: tous les arguments hors artefacts et cache
+    params = {name: value for name, value in locals().items()
+              if name not in ("input_data", "output_model", "cache_location",
+                              "cache_bypass", "component_digest")}
+    
+    import json
     import numpy as np
     import pickle
     import os
+    import shutil
     import tensorflow as tf
     from sklearn.ensemble import RandomForestClassifier
     from sklearn.metrics import accuracy_score, classification_report
     
+    import compact_forest
+    import model_export
+    
+    cache = None
+    if cache_location:
+        import step_cache
+        cache = step_cache.StepCache(cache_location)
+        cache_key = step_cache.cache_key("model_training", component_digest, params,
+                                         [input_data.path])
+        if cache_bypass:
+            step_cache.report("model_training", cache_key, "bypass")
+        elif cache.restore("model_training", cache_key, output_model.path):
+            step_cache.report("model_training", cache_key, "hit")
+            return output_model.path
+        else:
+            step_cache.report("model_training", cache_key, "miss")
+    
     print("🔄 [Training] Chargement des données...")
     
     # Charger les données
     data_path = input_data.path
-    X_train = np.load(f"{data_path}/X_train.npy")
-    X_test = np.load(f"{data_path}/X_test.npy")
-    y_train = np.load(f"{data_path}/y_train.npy")
-    y_test = np.load(f"{data_path}/y_test.npy")
+    X_train = np.load(f"{data_path}/X_train.npy", mmap_mode="r")
+    X_test = np.load(f"{data_path}/X_test.npy", mmap_mode="r")
+    y_train = np.load(f"{data_path}/y_train.npy", mmap_mode="r")
+    y_test = np.load(f"{data_path}/y_test.npy", mmap_mode="r")
     
     with open(f"{data_path}/metadata.pkl", "rb") as f:
         metadata = pickle.load(f)
     
+    n_features = X_train.shape[1]
     print(f"📊 Train: {X_train.shape}, Test: {X_test.shape}")
     
     # Entraîner le modèle
-    print("🔄 [Training] Entraînement Random Forest...")
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
+    forest_params = {"n_estimators": 100, "max_depth": None, "max_features": "sqrt",
+                     **json.loads(hyperparameters or "{}")}
+    print(f"🔄 [Training] Entraînement Random Forest {forest_params}...")
+    model = RandomForestClassifier(**forest_params, random_state=42)
     model.fit(X_train, y_train)
     
-    # Évaluation
-    y_pred = model.predict(X_test)
+    # Forêt compacte: tableaux contigus évalués en une passe vectorisée
+    compact = compact_forest.CompactForest.from_sklearn(model)
+    compact_forest.print_memory_report(compact.memory_report(model))
+    
+    # Évaluation (forêt compacte, contrôlée contre sklearn)
+    y_pred = compact.predict(X_test)
+    if not np.array_equal(y_pred, model.predict(X_test)):
+        raise RuntimeError("Forêt compacte non conforme à sklearn")
     accuracy = accuracy_score(y_test, y_pred)
     print(f"🎯 Accuracy: {accuracy:.4f}")
     
@@ -125,64 +465,166 @@ def model_training(input_data: Input[Artifact], output_model: Output[Model]) ->
     triton_model_path = f"{model_path}/iris_classifier/1"
     os.makedirs(triton_model_path, exist_ok=True)
     
-    # Wrapper TensorFlow
-    class IrisClassifierWrapper(tf.Module):
-        def __init__(self, sklearn_model, scaler):
-            super().__init__()
-            self.sklearn_model = sklearn_model
-            self.scaler = scaler
-            
-        @tf.function(input_signature=[tf.TensorSpec(shape=[None, 4], dtype=tf.float32)])
-        def __call__(self, x):
-            x_scaled = tf.py_function(
-                lambda x: self.scaler.transform(x.numpy()).astype(np.float32),
-                [x], tf.float32
-            )
-            x_scaled.set_shape([None, 4])
-            
-            predictions = tf.py_function(
-                lambda x: self.sklearn_model.predict_proba(x.numpy()).astype(np.float32),
-                [x_scaled], tf.float32
-            )
-            predictions.set_shape([None, 3])
-            
-            return {"probabilities": predictions}
-    
     # Charger le scaler
     with open(f"{data_path}/scaler.pkl", "rb") as f:
         scaler = pickle.load(f)
     
-    wrapper = IrisClassifierWrapper(model, scaler)
-    tf.saved_model.save(wrapper, triton_model_path)
-    
-    # Configuration Triton
-    config_content = '''name: "iris_classifier"
-platform: "tensorflow_savedmodel"
-max_batch_size: 8
-input [
-  {
-    name: "x"
-    data_type: TYPE_FP32
-    dims: [ 4 ]
-  }
-]
-output [
-  {
-    name: "probabilities"
-    data_type: TYPE_FP32
-    dims: [ 3 ]
-  }
-]
-version_policy { all: {} }
-'''
+    raw_test = scaler.inverse_transform(X_test).astype(np.float32)
+    expected = model.predict_proba(scaler.transform(raw_test)).astype(np.float32)
+    rounding = None
+    
+    if export_format == "onnx":
+        import onnxruntime as ort
+        
+        with open(f"{triton_model_path}/model.onnx", "wb") as f:
+            f.write(model_export.export_onnx(model, scaler, n_features))
+        
+        session = ort.InferenceSession(f"{triton_model_path}/model.onnx",
+                                       providers=["CPUExecutionProvider"])
+        exported = session.run(["probabilities"], {"x": raw_test})[0]
+        platform = "onnxruntime_onnx"
+    elif export_format == "python":
+        # model.py du backend et compact_forest.py, embarqués avec le composant
+        module_dir = os.path.dirname(compact_forest.__file__)
+        shutil.copy(f"{module_dir}/triton_python_backend/model.py",
+                    f"{triton_model_path}/model.py")
+        shutil.copy(compact_forest.__file__, f"{triton_model_path}/compact_forest.py")
+        
+        # Forêt et scaler en tableaux .npy, relus en mémoire mappée comme par model.py
+        forest_dir = f"{triton_model_path}/forest"
+        exported_forest = compact_forest.CompactForest.from_sklearn(model, scaler,
+                                                                    forest_precision)
+        exported_forest.save(forest_dir)
+        compact_forest.print_memory_report(exported_forest.memory_report())
+        exported = compact_forest.CompactForest.load(forest_dir).predict_proba(raw_test)
+        if forest_precision == "reduced":
+            # Seuils float16: coût mesuré sur le jeu de test, publié dans les métriques
+            rounding = compact_forest.rounding_report(
+                exported_forest, compact_forest.CompactForest.from_sklearn(model, scaler),
+                raw_test
+            )
+            print(f"🔬 Seuils float16: arrondi max {rounding['threshold_max_rounding']:.1e}, "
+                  f"{rounding['rerouted_fraction'] * 100:.1f}% des lignes de test "
+                  f"changent de feuille dans au moins un arbre")
+        platform = "python"
+    else:
+        if export_format == "native":
+            wrapper = model_export.native_forest_module(compact, scaler, n_features)
+        elif export_format == "py_function":
+            wrapper = model_export.py_function_wrapper(model, scaler, n_features)
+        else:
+            raise ValueError(f"export_format inconnu: {export_format}")
+        tf.saved_model.save(wrapper, triton_model_path)
+        
+        reloaded = tf.saved_model.load(triton_model_path)
+        exported = reloaded(tf.constant(raw_test))["probabilities"].numpy()
+        platform = "tensorflow_savedmodel"
+    
+    # Parité du modèle exporté avec sklearn sur le jeu de test (entrées brutes);
+    # la précision réduite tolère la quantification des feuilles et des seuils
+    precision = forest_precision if export_format == "python" else "full"
+    parity = compact_forest.check_parity(exported, expected, precision)
+    print(f"🔍 Parité export {export_format} / sklearn: écart max {parity['max_abs_diff']:.2e}, "
+          f"accord des classes {parity['class_agreement'] * 100:.1f}%")
+    if not parity["ok"]:
+        raise RuntimeError(f"Export {export_format} non conforme à sklearn: {parity}")
+    
+    # Configuration Triton (batching dynamique, instances, warmup)
+    def parse_sizes(value):
+        return sorted({int(size) for size in value.split(",") if size.strip()})
+    
+    preferred = parse_sizes(preferred_batch_sizes)
+    if batching_config:
+        recommendation = json.loads(batching_config)
+        recommendation = recommendation.get("recommendation", recommendation)
+        max_batch_size = int(recommendation["max_batch_size"])
+        preferred = sorted(recommendation.get("preferred_batch_size", []))
+    # Sans batching (max_batch_size 0) les tailles préférées sont sans objet;
+    # sinon une taille hors de [1, max_batch_size] est une erreur de configuration
+    if max_batch_size <= 0:
+        preferred = []
+    invalid = [size for size in preferred if not 0 < size <= max_batch_size]
+    if invalid:
+        raise ValueError(f"preferred_batch_size {invalid} hors de [1, {max_batch_size}]")
+    warmup_sizes = [size for size in parse_sizes(warmup_batch_sizes)
+                    if size <= max(max_batch_size, 1)]
+    
+    # Échantillons de warmup: une ligne brute représentative par classe
+    # (fichiers binaires FP32 dans warmup/, répétés sur la taille du batch)
+    warmup_dir = f"{model_path}/iris_classifier/warmup"
+    os.makedirs(warmup_dir, exist_ok=True)
+    # Représentants lus sur un échantillon borné de X_train (mappé en mémoire)
+    warmup_rows = slice(0, 100000)
+    raw_train = scaler.inverse_transform(X_train[warmup_rows]).astype(np.float32)
+    labels = np.asarray(y_train[warmup_rows])
+    warmup_files = []
+    for label in np.unique(labels):
+        class_rows = raw_train[labels == label]
+        representative = class_rows[np.argmin(
+            np.abs(class_rows - np.median(class_rows, axis=0)).sum(axis=1))]
+        file_name = f"x_class_{int(label)}"
+        representative.astype("<f4").tofile(f"{warmup_dir}/{file_name}")
+        warmup_files.append(file_name)
+    
+    def build_triton_config(platform):
+        lines = [
+            'name: "iris_classifier"',
+            'backend: "python"' if platform == "python" else f'platform: "{platform}"',
+            f"max_batch_size: {max_batch_size}",
+            f'input [ {{ name: "x" data_type: TYPE_FP32 dims: [ {n_features} ] }} ]',
+            'output [ { name: "probabilities" data_type: TYPE_FP32 dims: [ 3 ] } ]',
+            "version_policy { all: {} }"
+        ]
+        if max_batch_size > 0:
+            sizes = f"preferred_batch_size: [ {', '.join(map(str, preferred))} ] " if preferred else ""
+            lines.append(f"dynamic_batching {{ {sizes}"
+                         f"max_queue_delay_microseconds: {max_queue_delay_us} }}")
+        lines.append(f"instance_group [ {{ count: {instance_count} kind: {instance_kind} }} ]")
+        warmups = []
+        for size in warmup_sizes:
+            for file_name in warmup_files:
+                warmups.append(
+                    f'  {{ name: "warmup_b{size}_{file_name}" batch_size: {size} '
+                    f'inputs {{ key: "x" value {{ data_type: TYPE_FP32 dims: [ {n_features} ] '
+                    f'input_data_file: "{file_name}" }} }} }}'
+                )
+        if warmups:
+            lines.append("model_warmup [\n" + ",\n".join(warmups) + "\n]")
+        return "\n".join(lines) + "\n"
+    
+    config_content = build_triton_config(platform)
+    
+    # Validation: relecture par le parseur protobuf de Triton
+    from google.protobuf import text_format
+    from tritonclient.grpc import model_config_pb2
+    
+    parsed_config = text_format.Parse(config_content, model_config_pb2.ModelConfig())
+    if parsed_config.max_batch_size != max_batch_size or \
+            list(parsed_config.dynamic_batching.preferred_batch_size) != preferred or \
+            len(parsed_config.model_warmup) != len(warmup_sizes) * len(warmup_files):
+        raise RuntimeError("config.pbtxt généré incohérent avec les paramètres")
     
     with open(f"{model_path}/iris_classifier/config.pbtxt", "w") as f:
         f.write(config_content)
+    print(f"⚙️  config.pbtxt: max_batch_size={max_batch_size}, preferred={preferred}, "
+          f"instances={instance_count} {instance_kind}, warmup={len(parsed_config.model_warmup)}")
+    
+    # Référence pour la vérification de l'export (hors du répertoire packagé)
+    os.makedirs(f"{model_path}/verification", exist_ok=True)
+    np.save(f"{model_path}/verification/X_test_raw.npy", raw_test)
+    np.save(f"{model_path}/verification/expected_probabilities.npy", expected)
     
     # Métriques
     metrics = {
         "accuracy": float(accuracy),
         "model_type": "RandomForestClassifier",
+        "hyperparameters": forest_params,
+        "export_format": export_format,
+        "forest_precision": precision,
+        "precision_rounding": rounding,
+        "export_parity": parity,
+        "max_batch_size": max_batch_size,
+        "forest_bytes": compact.memory_report()["total_bytes"],
         "features": metadata['feature_names'],
         "classes": metadata['target_names']
     }
@@ -190,25 +632,172 @@ version_policy { all: {} }
     with open(f"{model_path}/metrics.pkl", "wb") as f:
         pickle.dump(metrics, f)
     
+    if cache is not None:
+        cache.store("model_training", cache_key, model_path, {"accuracy": float(accuracy)})
+    
     print("✅ [Training] Modèle entraîné et exporté!")
     return model_path
 
+@component(
+    base_image=BASE_IMAGE,
+    packages_to_install=[
+        "tensorflow==2.13.0",
+        "numpy==1.24.3",
+        "onnxruntime==1.15.1"
+    ],
+    embedded_artifact_path=component_modules(VERIFICATION_MODULES)
+)
+def model_verification(input_model: Input[Model], metrics: Output[Metrics],
+                       batch_size: int = 0,
+                       iterations: int = 50,
+                       latency_budget_ms: float = 0.0,
+                       size_budget_mb: float = 0.0) -> str:
+    """Étape 4: Vérification de l'export (parité, latence, taille)
+    
+    Recharge le modèle exporté dans {model_path}/iris_classifier/1, passe le
+    jeu de test par batchs et compare aux probabilités sklearn enregistrées
+    à l'entraînement. Échoue si la parité n'est pas respectée ou si le p99
+    par batch / la taille dépassent leur budget (0 = pas de budget)
+    
+    batch_size: 0 = max_batch_size effectif de l'export (après batching_config)
+    
+    Chaque format est rechargé et exécuté ici, hors du processus
+    d'entraînement: un export "py_function", dont les fonctions Python ne
+    sont pas sérialisées dans le SavedModel, échoue donc comme il
+    échouerait dans Triton
+    """
+    
+    import os
+    import pickle
+    import time
+    import numpy as np
+    
+    import compact_forest
+    
+    print("🔄 [Verification] Chargement du modèle exporté...")
+    
+    model_path = input_model.path
+    model_dir = f"{model_path}/iris_classifier"
+    version_dir = f"{model_dir}/1"
+    
+    with open(f"{model_path}/metrics.pkl", "rb") as f:
+        training_metrics = pickle.load(f)
+    export_format = training_metrics["export_format"]
+    batch_size = batch_size or max(training_metrics.get("max_batch_size", 1), 1)
+    
+    X_test = np.load(f"{model_path}/verification/X_test_raw.npy")
+    expected = np.load(f"{model_path}/verification/expected_probabilities.npy")
+    
+    # Fonction d'inférence selon le format exporté
+    if export_format == "onnx":
+        import onnxruntime as ort
+        session = ort.InferenceSession(f"{version_dir}/model.onnx",
+                                       providers=["CPUExecutionProvider"])
+        predict = lambda batch: session.run(["probabilities"], {"x": batch})[0]
+    elif export_format == "python":
+        forest = compact_forest.CompactForest.load(f"{version_dir}/forest")
+        predict = forest.predict_proba
+    elif export_format in ("native", "py_function"):
+        import tensorflow as tf
+        loaded = tf.saved_model.load(version_dir)
+        predict = lambda batch: loaded(tf.constant(batch))["probabilities"].numpy()
+    else:
+        raise RuntimeError(f"Export {export_format} inconnu")
+    
+    # Parité par batchs
+    batches = [X_test[start:start + batch_size]
+               for start in range(0, len(X_test), batch_size)]
+    try:
+        probabilities = np.concatenate([predict(batch) for batch in batches])
+    except Exception as e:
+        raise RuntimeError(f"Vérification échouée: export {export_format} "
+                           f"non exécutable après rechargement: {e}") from e
+    parity = compact_forest.check_parity(probabilities, expected,
+                                         training_metrics.get("forest_precision", "full"))
+    
+    # Latence par batch et débit
+    for batch in batches[:2]:
+        predict(batch)
+    timings = []
+    for _ in range(iterations):
+        for batch in batches:
+            start = time.perf_counter()
+            predict(batch)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    p50_ms = timings[len(timings) // 2] * 1000
+    p99_ms = timings[min(int(len(timings) * 0.99), len(timings) - 1)] * 1000
+    throughput = iterations * len(X_test) / sum(timings)
+    print(f"⏱️  Batch {batch_size}: p50 {p50_ms:.3f} ms, p99 {p99_ms:.3f} ms, "
+          f"{throughput:.0f} éch/s")
+    print(f"🔍 Parité: écart max {parity['max_abs_diff']:.2e}, "
+          f"accord des classes {parity['class_agreement'] * 100:.1f}%")
+    
+    # Taille de l'artefact déployé
+    size_bytes = sum(os.path.getsize(os.path.join(root, name))
+                     for root, _, names in os.walk(model_dir) for name in names)
+    print(f"📦 Taille de l'export: {size_bytes / 1024 / 1024:.2f} Mo")
+    
+    # Écarts mesurés et seuils appliqués (accord des argmax: aucune classe changée)
+    metrics.log_metric("parity_max_abs_diff", parity["max_abs_diff"])
+    metrics.log_metric("parity_mean_abs_diff", parity["mean_abs_diff"])
+    metrics.log_metric("parity_class_agreement", parity["class_agreement"])
+    metrics.log_metric("parity_max_abs_diff_tolerance", parity["tolerance"]["max_abs_diff"])
+    metrics.log_metric("parity_mean_abs_diff_tolerance", parity["tolerance"]["mean_abs_diff"])
+    metrics.log_metric("parity_class_agreement_min", parity["tolerance"]["class_agreement"])
+    rounding = training_metrics.get("precision_rounding")
+    if rounding:
+        # Précision réduite: arrondi des seuils float16 et lignes déviées à l'entraînement
+        metrics.log_metric("threshold_max_rounding", rounding["threshold_max_rounding"])
+        metrics.log_metric("rerouted_rows_fraction", rounding["rerouted_fraction"])
+    metrics.log_metric("batch_size", batch_size)
+    metrics.log_metric("batch_latency_p50_ms", p50_ms)
+    metrics.log_metric("batch_latency_p99_ms", p99_ms)
+    metrics.log_metric("throughput_samples_per_s", throughput)
+    metrics.log_metric("model_size_mb", size_bytes / 1024 / 1024)
+    
+    failures = []
+    if not parity["ok"]:
+        failures.append(f"parité non respectée ({parity})")
+    if latency_budget_ms and p99_ms > latency_budget_ms:
+        failures.append(f"p99 {p99_ms:.3f} ms > budget {latency_budget_ms} ms")
+    if size_budget_mb and size_bytes > size_budget_mb * 1024 * 1024:
+        failures.append(f"taille {size_bytes / 1024 / 1024:.2f} Mo > budget {size_budget_mb} Mo")
+    if failures:
+        raise RuntimeError("Vérification échouée: " + "; ".join(failures))
+    
+    print("✅ [Verification] Export conforme!")
+    return f"p99={p99_ms:.3f}ms, size={size_bytes}B"
+
 @component(
     base_image=BASE_IMAGE,
     packages_to_install=[
         "model-registry==0.2.7a1",
-        "boto3==1.28.25"
-    ]
+        "boto3==1.28.25",
+        "zstandard==0.21.0"
+    ],
+    embedded_artifact_path=component_modules(REGISTRY_MODULES)
 )
-def model_registry_push(input_model: Input[Model]) -> str:
-    """Étape 3: Push vers Model Registry"""
+def model_registry_push(input_model: Input[Model],
+                        compression: str = "gzip",
+                        compression_level: int = 6,
+                        part_size_mb: int = 8,
+                        max_inflight_parts: int = 4) -> str:
+    """Étape 5: Push vers Model Registry
+    
+    L'archive est compressée (gzip ou zstd, compression_level) et envoyée en
+    streaming dans un upload multipart (parties en parallèle, mémoire bornée
+    à part_size_mb × (max_inflight_parts + 1)) vers
+    s3://$AWS_S3_BUCKET/iris_classifier/<empreinte>/; ignoré si la même
+    empreinte est déjà présente. Sans AWS_S3_ENDPOINT, l'upload est simulé
+    """
     
     import os
     import pickle
-    import tarfile
-    import tempfile
     from datetime import datetime
     
+    import artifact_upload
+    
     print("🔄 [Registry] Préparation du modèle...")
     
     model_path = input_model.path
@@ -219,25 +808,31 @@ def model_registry_push(input_model: Input[Model]) -> str:
     
     print(f"📊 Accuracy: {metrics['accuracy']:.4f}")
     
-    # Créer l'archive
-    with tempfile.NamedTemporaryFile(suffix=".tar.gz", delete=False) as temp_file:
-        archive_path = temp_file.name
-        
-    with tarfile.open(archive_path, "w:gz") as tar:
-        tar.add(f"{model_path}/iris_classifier", arcname="iris_classifier")
-    
-    print(f"📦 Archive créée: {archive_path}")
-    
-    # Simuler l'upload S3 (en attendant la vraie intégration)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    s3_url = f"s3://models/iris_classifier/{timestamp}/model.tar.gz"
+    source_dir = f"{model_path}/iris_classifier"
+    bucket = os.getenv("AWS_S3_BUCKET", "models")
+    
+    if os.getenv("AWS_S3_ENDPOINT"):
+        # Archive compressée à la volée dans l'upload multipart
+        upload = artifact_upload.upload_directory(
+            source_dir, "iris_classifier", bucket, "iris_classifier",
+            compression=compression, level=compression_level,
+            part_size=part_size_mb * 1024 * 1024, max_inflight=max_inflight_parts
+        )
+        s3_url = upload["s3_url"]
+        if upload["uploaded"]:
+            print(f"☁️ Upload vers: {s3_url} ({upload['bytes'] / 1024 / 1024:.2f} Mo, "
+                  f"{upload['parts']} partie(s))")
+        else:
+            print(f"♻️  Empreinte {upload['digest'][:16]} déjà présente: upload ignoré ({s3_url})")
+    else:
+        digest = artifact_upload.content_digest(source_dir)
+        s3_url = (f"s3://{bucket}/iris_classifier/{digest[:16]}/"
+                  f"model.{artifact_upload.COMPRESSIONS[compression]}")
+        print(f"☁️ [Simulation] AWS_S3_ENDPOINT non défini, upload vers: {s3_url}")
     
-    print(f"☁️ [Simulation] Upload vers: {s3_url}")
     print("📝 [Simulation] Enregistrement dans Model Registry...")
     
-    # Nettoyer
-    os.unlink(archive_path)
-    
     result = {
         "model_name": "iris-classifier",
         "version": f"v{timestamp}",
@@ -248,26 +843,104 @@ def model_registry_push(input_model: Input[Model]) -> str:
     print("✅ [Registry] Modèle enregistré avec succès!")
     return str(result)
 
+def component_digest(task_component, modules=()) -> str:
+    """
+    Empreinte du code source d'un composant et des modules qu'il embarque
+    (clé du cache d'étapes)
+    """
+    digest = hashlib.sha256(inspect.getsource(task_component.python_func).encode("utf-8"))
+    for path in modules:
+        with open(os.path.join(PIPELINE_DIR, path), "rb") as f:
+            digest.update(path.encode("utf-8") + b"\0" + f.read())
+    return digest.hexdigest()
+
 @pipeline(
     name="iris-classification-triton-pipeline",
     description="Pipeline complète d'entraînement Iris et déploiement Triton"
 )
-def iris_triton_pipeline():
-    """Pipeline principale Iris Classification avec Triton"""
+def iris_triton_pipeline(export_format: str = "native",
+                         max_batch_size: int = 8,
+                         preferred_batch_sizes: str = "4,8",
+                         max_queue_delay_us: int = 100,
+                         instance_count: int = 1,
+                         instance_kind: str = "KIND_CPU",
+                         batching_config: str = "",
+                         forest_precision: str = "full",
+                         latency_budget_ms: float = 0.0,
+                         size_budget_mb: float = 0.0,
+                         step_cache_location: str = "",
+                         step_cache_bypass: bool = False,
+                         param_grid: str = DEFAULT_PARAM_GRID,
+                         accuracy_floor: float = 0.9,
+                         latency_ceiling_ms: float = 0.0,
+                         artifact_compression: str = "gzip",
+                         artifact_compression_level: int = 6,
+                         synthetic_rows: int = 0,
+                         synthetic_features: int = 4):
+    """Pipeline principale Iris Classification avec Triton
+    
+    Les candidats de param_grid sont entraînés en parallèle; seul celui retenu
+    par candidate_selection est ré-entraîné, exporté et poussé au registry
+    """
     
     # Étape 1: Preprocessing
-    preprocess_task = data_preprocessing()
+    preprocess_task = data_preprocessing(synthetic_rows=synthetic_rows,
+                                         synthetic_features=synthetic_features,
+                                         cache_location=step_cache_location,
+                                         cache_bypass=step_cache_bypass,
+                                         component_digest=component_digest(
+                                             data_preprocessing, PREPROCESSING_MODULES))
     preprocess_task.set_display_name("Data Preprocessing")
     
-    # Étape 2: Training
-    train_task = model_training(input_data=preprocess_task.outputs["output_data"])
+    # Étape 2: Balayage des hyperparamètres
+    grid_task = expand_param_grid(param_grid=param_grid)
+    grid_task.set_display_name("Hyperparameter Grid")
+    
+    with dsl.ParallelFor(items=grid_task.output, parallelism=SWEEP_PARALLELISM) as candidate:
+        candidate_task = candidate_training(input_data=preprocess_task.outputs["output_data"],
+                                            candidate=candidate,
+                                            export_format=export_format,
+                                            forest_precision=forest_precision,
+                                            batch_size=max_batch_size,
+                                            batching_config=batching_config)
+        candidate_task.set_display_name("Candidate Training")
+    
+    selection_task = candidate_selection(results=dsl.Collected(candidate_task.output),
+                                         accuracy_floor=accuracy_floor,
+                                         latency_ceiling_ms=latency_ceiling_ms)
+    selection_task.set_display_name("Candidate Selection")
+    
+    # Étape 3: Training du candidat retenu
+    train_task = model_training(input_data=preprocess_task.outputs["output_data"],
+                                hyperparameters=selection_task.outputs["Output"],
+                                export_format=export_format,
+                                max_batch_size=max_batch_size,
+                                preferred_batch_sizes=preferred_batch_sizes,
+                                max_queue_delay_us=max_queue_delay_us,
+                                instance_count=instance_count,
+                                instance_kind=instance_kind,
+                                batching_config=batching_config,
+                                forest_precision=forest_precision,
+                                cache_location=step_cache_location,
+                                cache_bypass=step_cache_bypass,
+                                component_digest=component_digest(model_training,
+                                                                  TRAINING_MODULES))
     train_task.set_display_name("Model Training & Triton Export")
-    train_task.after(preprocess_task)
-    
-    # Étape 3: Registry
-    registry_task = model_registry_push(input_model=train_task.outputs["output_model"])
+    train_task.after(selection_task)
+    
+    # Étape 4: Vérification de l'export (parité, latence, taille)
+    verify_task = model_verification(input_model=train_task.outputs["output_model"],
+                                     latency_budget_ms=latency_budget_ms,
+                                     size_budget_mb=size_budget_mb)
+    verify_task.set_display_name("Export Verification")
+    verify_task.after(train_task)
+    
+    # Étape 5: Registry
+    registry_task = model_registry_push(input_model=train_task.outputs["output_model"],
+                                        compression=artifact_compression,
+                                        compression_level=artifact_compression_level)
     registry_task.set_display_name("Model Registry Push")
-    registry_task.after(train_task)
+    registry_task.after(verify_task)
 
 if __name__ == "__main__":
     # Compiler le pipeline
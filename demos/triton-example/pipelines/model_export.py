@@ -0,0 +1,130 @@
+"""
+Exports du modèle Iris pour Triton, partagés par model_training et
+scripts/benchmark_export.py
+  - export_onnx: scaler + forêt skl2onnx en un seul graphe ONNX
+  - native_forest_module: forêt compacte compilée en ops TensorFlow
+  - py_function_wrapper: sklearn appelé via tf.py_function
+
+Le scaler reproduit les arrondis de StandardScaler.transform sur une entrée
+float32, dans la précision sondée par compact_forest.scaling_dtype (le
+convertisseur skl2onnx diffère d'un ulp, ce qui suffit à changer de branche
+près des seuils)
+"""
+
+import numpy as np
+
+from compact_forest import scaling_dtype
+
+def export_onnx(model, scaler, n_features: int) -> bytes:
+    """
+    Graphe ONNX sérialisé: entrée "x" brute (FP32), sortie "probabilities"
+    """
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    # Forêt convertie par skl2onnx (probabilités en tenseur, sans ZipMap)
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[("x_scaled", FloatTensorType([None, n_features]))],
+        options={id(model): {"zipmap": False}},
+        target_opset={"": 15, "ai.onnx.ml": 3}
+    )
+
+    # Scaler en tête du même graphe
+    dtype = scaling_dtype(scaler)
+    compute = TensorProto.DOUBLE if dtype == np.float64 else TensorProto.FLOAT
+    graph = onnx_model.graph
+    graph.initializer.extend([
+        numpy_helper.from_array(scaler.mean_.astype(dtype), "scaler_mean"),
+        numpy_helper.from_array(scaler.scale_.astype(dtype), "scaler_scale")
+    ])
+    scaling_nodes = [
+        helper.make_node("Cast", ["x"], ["x_compute"], to=compute),
+        helper.make_node("Sub", ["x_compute", "scaler_mean"], ["centered_compute"]),
+        helper.make_node("Cast", ["centered_compute"], ["centered"], to=TensorProto.FLOAT),
+        helper.make_node("Cast", ["centered"], ["centered_compute_2"], to=compute),
+        helper.make_node("Div", ["centered_compute_2", "scaler_scale"], ["scaled_compute"]),
+        helper.make_node("Cast", ["scaled_compute"], ["x_scaled"], to=TensorProto.FLOAT)
+    ]
+    for position, node in enumerate(scaling_nodes):
+        graph.node.insert(position, node)
+    graph.input[0].name = "x"
+    onnx.checker.check_model(onnx_model)
+    return onnx_model.SerializeToString()
+
+def native_forest_module(forest, scaler, n_features: int):
+    """
+    tf.Module sans appel Python à l'inférence ni pickle sklearn
+    (forest: compact_forest.CompactForest en précision "full")
+    """
+    import tensorflow as tf
+
+    class NativeForestModule(tf.Module):
+        def __init__(self, forest, scaler):
+            super().__init__()
+            arrays = forest.arrays
+            self.scaling = tf.as_dtype(scaling_dtype(scaler))
+            self.mean = tf.constant(scaler.mean_, self.scaling)
+            self.scale = tf.constant(scaler.scale_, self.scaling)
+            self.feature = tf.constant(arrays["feature"].astype(np.int32))
+            self.threshold = tf.constant(arrays["threshold"], tf.float64)
+            self.left = tf.constant(arrays["left"].astype(np.int32))
+            self.right = tf.constant(arrays["right"].astype(np.int32))
+            self.value = tf.constant(arrays["value"], tf.float64)
+            self.roots = tf.constant(arrays["roots"].astype(np.int32))
+            self.depth = tf.constant(forest.depth, tf.int32)
+
+        @tf.function(input_signature=[tf.TensorSpec(shape=[None, n_features], dtype=tf.float32)])
+        def __call__(self, x):
+            # Mêmes arrondis que StandardScaler.transform sur une entrée float32
+            x_scaled = tf.cast(tf.cast(x, self.scaling) - self.mean, tf.float32)
+            x_scaled = tf.cast(tf.cast(x_scaled, self.scaling) / self.scale, tf.float32)
+            x_scaled = tf.cast(x_scaled, tf.float64)
+
+            # Un nœud courant par (échantillon, arbre), avancé d'un niveau par itération
+            nodes = tf.tile(self.roots[tf.newaxis, :], [tf.shape(x)[0], 1])
+            for _ in tf.range(self.depth):
+                feature_values = tf.gather(x_scaled, tf.gather(self.feature, nodes), batch_dims=1)
+                go_left = feature_values <= tf.gather(self.threshold, nodes)
+                nodes = tf.where(go_left, tf.gather(self.left, nodes),
+                                 tf.gather(self.right, nodes))
+
+            probabilities = tf.reduce_mean(tf.gather(self.value, nodes), axis=1)
+            return {"probabilities": tf.cast(probabilities, tf.float32)}
+
+    return NativeForestModule(forest, scaler)
+
+def py_function_wrapper(model, scaler, n_features: int):
+    """
+    tf.Module appelant sklearn dans l'interpréteur Python, sous le GIL;
+    référence des objets du processus: non rechargeable ailleurs
+    """
+    import tensorflow as tf
+
+    n_classes = len(model.classes_)
+
+    class IrisClassifierWrapper(tf.Module):
+        def __init__(self, sklearn_model, scaler):
+            super().__init__()
+            self.sklearn_model = sklearn_model
+            self.scaler = scaler
+
+        @tf.function(input_signature=[tf.TensorSpec(shape=[None, n_features], dtype=tf.float32)])
+        def __call__(self, x):
+            x_scaled = tf.py_function(
+                lambda x: self.scaler.transform(x.numpy()).astype(np.float32),
+                [x], tf.float32
+            )
+            x_scaled.set_shape([None, n_features])
+
+            predictions = tf.py_function(
+                lambda x: self.sklearn_model.predict_proba(x.numpy()).astype(np.float32),
+                [x_scaled], tf.float32
+            )
+            predictions.set_shape([None, n_classes])
+
+            return {"probabilities": predictions}
+
+    return IrisClassifierWrapper(model, scaler)
@@ -3,6 +3,8 @@ import pickle
 import json
 from sklearn.metrics import accuracy_score, classification_report
 
+from dataset_bundle import BUNDLE_FILE, load_bundle
+
 print("📊 Évaluation du modèle")
 print("=" * 30)
 
@@ -13,10 +15,8 @@ S3_MODELS_PATH = f"{PROJECT_NAME}-models"
 # Charger le modèle et les données
 with open('iris_model.pkl', 'rb') as f:
     model = pickle.load(f)
-with open('X_test.pkl', 'rb') as f:
-    X_test = pickle.load(f)
-with open('y_test.pkl', 'rb') as f:
-    y_test = pickle.load(f)
+arrays, metadata = load_bundle(BUNDLE_FILE)
+X_test, y_test = arrays["X_test"], arrays["y_test"]
 
 # Évaluation
 y_pred = model.predict(X_test)
@@ -2,6 +2,8 @@ import os
 import pickle
 from sklearn.ensemble import RandomForestClassifier
 
+from dataset_bundle import BUNDLE_FILE, load_bundle
+
 print("🤖 Entraînement du modèle Random Forest")
 print("=" * 40)
 
@@ -9,11 +11,9 @@ print("=" * 40)
 PROJECT_NAME = os.getenv('PROJECT_NAME', 'iris')
 S3_MODELS_PATH = f"{PROJECT_NAME}-models"
 
-# Charger les données
-with open('X_train.pkl', 'rb') as f:
-    X_train = pickle.load(f)
-with open('y_train.pkl', 'rb') as f:
-    y_train = pickle.load(f)
+# Charger les données (bundle en mémoire mappée)
+arrays, metadata = load_bundle(BUNDLE_FILE)
+X_train, y_train = arrays["X_train"], arrays["y_train"]
 
 # Entraîner le modèle
 model = RandomForestClassifier(
@@ -0,0 +1,148 @@
+"""
+Cache d'étapes adressé par contenu pour les composants du pipeline Iris
+Clé: empreinte du code source du composant, de ses paramètres et du contenu
+de ses artefacts d'entrée. Les sorties sont stockées sous un préfixe d'object
+store (s3://bucket/prefix, MinIO via AWS_S3_ENDPOINT) ou dans un répertoire
+local; une étape dont la clé est présente restaure ses sorties sans s'exécuter
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+
+# Marqueur écrit en dernier: une entrée sans marqueur est incomplète et ignorée
+COMPLETE_MARKER = "_COMPLETE"
+MANIFEST = "_manifest.json"
+
+CHUNK_SIZE = 1024 * 1024
+
+def directory_digest(path: str) -> str:
+    """
+    Empreinte SHA-256 d'un répertoire (chemins relatifs et contenus, ordre trié)
+    ou d'un fichier
+    """
+    digest = hashlib.sha256()
+    if os.path.isfile(path):
+        files = [(os.path.basename(path), path)]
+    else:
+        files = sorted(
+            (os.path.relpath(os.path.join(root, name), path), os.path.join(root, name))
+            for root, _, names in os.walk(path) for name in names
+        )
+    for relative, full in files:
+        digest.update(relative.encode("utf-8") + b"\0")
+        with open(full, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def cache_key(step: str, component_digest: str, params: Dict[str, Any],
+              input_paths: Optional[List[str]] = None) -> str:
+    """
+    Clé d'une exécution: étape, code du composant, paramètres, entrées
+    """
+    payload = {
+        "step": step,
+        "component": component_digest,
+        "params": params,
+        "inputs": [directory_digest(path) for path in (input_paths or [])]
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+def _s3_client():
+    import boto3
+
+    endpoint = os.getenv("AWS_S3_ENDPOINT")
+    if endpoint and not endpoint.startswith(("http://", "https://")):
+        endpoint = f"http://{endpoint}"
+    return boto3.client("s3", endpoint_url=endpoint or None)
+
+class StepCache:
+    """
+    Stockage des sorties d'étapes sous location/<étape>/<clé>/
+    """
+
+    def __init__(self, location: str):
+        self.location = location.rstrip("/")
+        self.is_s3 = self.location.startswith("s3://")
+        if self.is_s3:
+            bucket, _, prefix = self.location[len("s3://"):].partition("/")
+            self.bucket = bucket
+            self.prefix = prefix
+            self.client = _s3_client()
+
+    def _entry(self, step: str, key: str) -> str:
+        if self.is_s3:
+            return "/".join(part for part in (self.prefix, step, key) if part)
+        return os.path.join(self.location, step, key)
+
+    def restore(self, step: str, key: str, output_dir: str) -> bool:
+        """
+        Copie les sorties en cache dans output_dir; False si la clé est absente
+        """
+        entry = self._entry(step, key)
+        os.makedirs(output_dir, exist_ok=True)
+        if not self.is_s3:
+            if not os.path.exists(os.path.join(entry, COMPLETE_MARKER)):
+                return False
+            shutil.copytree(entry, output_dir, dirs_exist_ok=True,
+                            ignore=shutil.ignore_patterns(COMPLETE_MARKER, MANIFEST))
+            return True
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=f"{entry}/{COMPLETE_MARKER}")
+        except self.client.exceptions.ClientError:
+            return False
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{entry}/"):
+            for item in page.get("Contents", []):
+                relative = item["Key"][len(entry) + 1:]
+                if relative in (COMPLETE_MARKER, MANIFEST):
+                    continue
+                target = os.path.join(output_dir, relative)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                self.client.download_file(self.bucket, item["Key"], target)
+        return True
+
+    def store(self, step: str, key: str, output_dir: str,
+              metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Enregistre output_dir sous la clé (manifeste puis marqueur en dernier)
+        """
+        entry = self._entry(step, key)
+        manifest = json.dumps({"step": step, "key": key, "created": time.time(),
+                               **(metadata or {})}).encode("utf-8")
+        if not self.is_s3:
+            staging = f"{entry}.tmp-{os.getpid()}"
+            shutil.rmtree(staging, ignore_errors=True)
+            shutil.copytree(output_dir, staging)
+            with open(os.path.join(staging, MANIFEST), "wb") as f:
+                f.write(manifest)
+            with open(os.path.join(staging, COMPLETE_MARKER), "w") as f:
+                f.write(key)
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(staging, entry)
+            return
+
+        for root, _, names in os.walk(output_dir):
+            for name in names:
+                full = os.path.join(root, name)
+                relative = os.path.relpath(full, output_dir)
+                self.client.upload_file(full, self.bucket,
+                                        f"{entry}/{relative.replace(os.sep, '/')}")
+        self.client.put_object(Bucket=self.bucket, Key=f"{entry}/{MANIFEST}", Body=manifest)
+        self.client.put_object(Bucket=self.bucket, Key=f"{entry}/{COMPLETE_MARKER}",
+                               Body=key.encode("utf-8"))
+
+def report(step: str, key: str, status: str) -> Dict[str, str]:
+    """
+    Trace du cache d'étapes: hit, miss ou bypass
+    """
+    icons = {"hit": "♻️ ", "miss": "🆕", "bypass": "⏭️ "}
+    print(f"{icons.get(status, '')} [Cache] {step}: {status.upper()} (clé {key[:12]})")
+    return {"step": step, "key": key, "status": status}
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Génération d'un jeu de données synthétique à grande échelle, de distributions
+proches d'Iris: classe tirée uniformément, features gaussiennes par classe
+(moyennes et écarts-types d'Iris), features supplémentaires obtenues par
+combinaisons linéaires bruitées des quatre features d'origine
+
+Les lignes sont produites par morceaux et écrites dans des .npy en mémoire
+mappée (X.npy float32, y.npy int64): la mémoire reste bornée par la taille
+d'un morceau, de 10^6 à 10^8 lignes. X.npy est directement utilisable par
+scripts/bulk_score.py
+
+Utilisation:
+    python synthetic_data.py --rows 10000000 --features 16 --output /tmp/synthetic
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+FEATURE_NAMES = ["sepal length (cm)", "sepal width (cm)",
+                 "petal length (cm)", "petal width (cm)"]
+TARGET_NAMES = ["setosa", "versicolor", "virginica"]
+
+# Moyennes et écarts-types par classe du jeu Iris (150 lignes)
+CLASS_MEANS = np.array([
+    [5.006, 3.428, 1.462, 0.246],
+    [5.936, 2.770, 4.260, 1.326],
+    [6.588, 2.974, 5.552, 2.026]
+])
+CLASS_STDS = np.array([
+    [0.352, 0.379, 0.174, 0.105],
+    [0.516, 0.314, 0.470, 0.198],
+    [0.636, 0.322, 0.552, 0.275]
+])
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+def feature_names(n_features: int) -> List[str]:
+    """
+    Noms Iris pour les quatre premières features, feature_<i> ensuite
+    """
+    return (FEATURE_NAMES + [f"feature_{i}" for i in range(4, n_features)])[:n_features]
+
+def _mixing(n_features: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Poids et bruit des features supplémentaires (fixés par la graine)
+    """
+    rng = np.random.default_rng([seed, 0])
+    extra = max(n_features - 4, 0)
+    return rng.normal(0.0, 1.0, size=(4, extra)), rng.uniform(0.1, 1.0, size=extra)
+
+def generate_chunks(n_rows: int, n_features: int = 4, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                    seed: int = 42) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Produit (X float32, y int64) par morceaux de chunk_rows lignes
+    Chaque morceau a son propre générateur: le résultat ne dépend que de la
+    graine et de chunk_rows
+    """
+    if n_features < 1:
+        raise ValueError("n_features doit être >= 1")
+    weights, noise = _mixing(n_features, seed)
+    for index, start in enumerate(range(0, n_rows, chunk_rows)):
+        rows = min(chunk_rows, n_rows - start)
+        rng = np.random.default_rng([seed, index + 1])
+        y = rng.integers(0, len(TARGET_NAMES), size=rows)
+        base = rng.standard_normal((rows, 4)) * CLASS_STDS[y] + CLASS_MEANS[y]
+        if n_features > 4:
+            extra = base @ weights + rng.standard_normal((rows, n_features - 4)) * noise
+            X = np.hstack([base, extra])
+        else:
+            X = base[:, :n_features]
+        yield X.astype(np.float32), y.astype(np.int64)
+
+def write_dataset(output_dir: str, n_rows: int, n_features: int = 4,
+                  chunk_rows: int = DEFAULT_CHUNK_ROWS, seed: int = 42) -> Dict[str, Any]:
+    """
+    Écrit output_dir/X.npy et output_dir/y.npy morceau par morceau
+    Retourne les métadonnées (aussi écrites dans output_dir/metadata.json)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    X_out = np.lib.format.open_memmap(os.path.join(output_dir, "X.npy"), mode="w+",
+                                      dtype=np.float32, shape=(n_rows, n_features))
+    y_out = np.lib.format.open_memmap(os.path.join(output_dir, "y.npy"), mode="w+",
+                                      dtype=np.int64, shape=(n_rows,))
+    start = 0
+    for X, y in generate_chunks(n_rows, n_features, chunk_rows, seed):
+        X_out[start:start + len(X)] = X
+        y_out[start:start + len(y)] = y
+        start += len(X)
+        X_out.flush()
+        y_out.flush()
+    del X_out, y_out
+
+    metadata = {
+        "synthetic": True,
+        "feature_names": feature_names(n_features),
+        "target_names": TARGET_NAMES,
+        "n_features": n_features,
+        "n_classes": len(TARGET_NAMES),
+        "n_rows": n_rows,
+        "chunk_rows": chunk_rows,
+        "seed": seed
+    }
+    with open(os.path.join(output_dir, "metadata.json"), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
+def main():
+    parser = argparse.ArgumentParser(description="Jeu de données synthétique type Iris")
+    parser.add_argument("--rows", type=int, required=True,
+                       help="Nombre de lignes")
+    parser.add_argument("--features", type=int, default=4,
+                       help="Nombre de features")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                       help="Lignes par morceau généré")
+    parser.add_argument("--seed", type=int, default=42,
+                       help="Graine aléatoire")
+    parser.add_argument("--output", "-o", required=True,
+                       help="Répertoire de sortie (X.npy, y.npy, metadata.json)")
+
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    metadata = write_dataset(args.output, args.rows, args.features, args.chunk_rows, args.seed)
+    elapsed = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(args.output, name)) for name in ("X.npy", "y.npy"))
+    print(f"✅ {metadata['n_rows']} lignes × {metadata['n_features']} features en {elapsed:.1f}s "
+          f"({size / 1024 / 1024:.1f} Mo, {metadata['n_rows'] / elapsed:.0f} lignes/s)")
+    print(f"📁 {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Modèle Triton (backend python) pour la classification Iris
+Scaler et forêt évalués en NumPy sur le batch complet de l'appel execute();
+les tableaux de la forêt (forest/*.npy) sont ouverts en mémoire mappée pour
+que les instances du modèle partagent les mêmes pages
+
+Ce fichier est copié tel quel dans {model_repository}/iris_classifier/1/
+par model_training (export_format="python"), avec compact_forest.py
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import triton_python_backend_utils as pb_utils
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from compact_forest import CompactForest
+
+FOREST_DIR = "forest"
+
+class TritonPythonModel:
+    """
+    Interface du backend python de Triton
+    """
+
+    def initialize(self, args):
+        model_config = json.loads(args["model_config"])
+        output_config = pb_utils.get_output_config_by_name(model_config, "probabilities")
+        self.output_dtype = pb_utils.triton_string_to_numpy(output_config["data_type"])
+        model_dir = os.path.join(args["model_repository"], args["model_version"])
+        self.forest = CompactForest.load(os.path.join(model_dir, FOREST_DIR), mmap=True)
+
+    def execute(self, requests):
+        """
+        Toutes les requêtes de l'appel (batch dynamique) sont évaluées en un seul batch
+        """
+        inputs = [pb_utils.get_input_tensor_by_name(request, "x").as_numpy()
+                  for request in requests]
+        probabilities = self.forest.predict_proba(np.concatenate(inputs))
+
+        responses = []
+        start = 0
+        for batch in inputs:
+            output = probabilities[start:start + len(batch)].astype(self.output_dtype)
+            start += len(batch)
+            responses.append(pb_utils.InferenceResponse(
+                output_tensors=[pb_utils.Tensor("probabilities", output)]
+            ))
+        return responses
+
+    def finalize(self):
+        self.forest = None
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark local des formats d'export du modèle Iris, sur les mêmes entrées:
+onnxruntime (CPU) contre le wrapper TensorFlow tf.py_function du pipeline,
+avec sklearn comme référence de parité
+
+Les exports viennent de pipelines/model_export.py, comme dans model_training:
+le scaler du graphe ONNX suit la précision de StandardScaler.transform de la
+version de scikit-learn installée (float64 en 1.3, float32 ensuite)
+
+Utilisation:
+    python benchmark_export.py --batch-sizes 1 8 64 --iterations 500
+    python benchmark_export.py --onnx-model /chemin/iris_classifier/1/model.onnx
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from test_inference import percentile
+
+# Exports du pipeline (pipelines/model_export.py), partagés avec model_training
+PIPELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pipelines")
+sys.path.insert(0, PIPELINES_DIR)
+
+from model_export import export_onnx, py_function_wrapper
+
+DEFAULT_BATCH_SIZES = [1, 8, 32, 128]
+
+def train_reference():
+    """
+    Modèle et scaler entraînés comme dans le pipeline (split stratifié 80/20)
+    Retourne aussi le jeu de test en entrées brutes float32
+    """
+    from sklearn.datasets import load_iris
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    iris = load_iris()
+    X_train, X_test, y_train, _ = train_test_split(
+        iris.data, iris.target, test_size=0.2, random_state=42, stratify=iris.target
+    )
+    scaler = StandardScaler()
+    model = RandomForestClassifier(n_estimators=100, random_state=42)
+    model.fit(scaler.fit_transform(X_train), y_train)
+    return model, scaler, X_test.astype(np.float32)
+
+def onnxruntime_backend(onnx_bytes: bytes, threads: int) -> Callable[[np.ndarray], np.ndarray]:
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+    session = ort.InferenceSession(onnx_bytes, options, providers=["CPUExecutionProvider"])
+    return lambda batch: session.run(["probabilities"], {"x": batch})[0]
+
+def tensorflow_wrapper_backend(model, scaler) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+    """
+    Wrapper tf.py_function de model_training (export_format="py_function")
+    None si TensorFlow n'est pas installé
+    """
+    try:
+        import tensorflow as tf
+    except ImportError:
+        return None
+
+    wrapper = py_function_wrapper(model, scaler, len(scaler.mean_))
+    return lambda batch: wrapper(tf.constant(batch))["probabilities"].numpy()
+
+def make_batch(rows: np.ndarray, batch_size: int) -> np.ndarray:
+    return np.ascontiguousarray(np.resize(rows, (batch_size, rows.shape[1])))
+
+def benchmark_backend(predict: Callable[[np.ndarray], np.ndarray], batch: np.ndarray,
+                      iterations: int, warmup: int) -> Dict[str, float]:
+    for _ in range(warmup):
+        predict(batch)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        predict(batch)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+        "throughput": len(batch) * len(timings) / sum(timings)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark onnxruntime vs wrapper TensorFlow")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES,
+                       help="Tailles de batch à mesurer")
+    parser.add_argument("--iterations", type=int, default=300,
+                       help="Nombre d'appels mesurés par cellule")
+    parser.add_argument("--warmup", type=int, default=20,
+                       help="Nombre d'appels de chauffe par cellule")
+    parser.add_argument("--threads", type=int, default=0,
+                       help="Threads intra-op onnxruntime (0 = défaut)")
+    parser.add_argument("--onnx-model",
+                       help="model.onnx exporté par le pipeline (défaut: export en mémoire)")
+    parser.add_argument("--output", "-o",
+                       help="Écrire les résultats en JSON")
+
+    args = parser.parse_args()
+
+    model, scaler, test_rows = train_reference()
+    if args.onnx_model:
+        with open(args.onnx_model, "rb") as f:
+            onnx_bytes = f.read()
+    else:
+        onnx_bytes = export_onnx(model, scaler, test_rows.shape[1])
+
+    backends = {
+        "sklearn": lambda batch: model.predict_proba(scaler.transform(batch)).astype(np.float32),
+        "onnxruntime": onnxruntime_backend(onnx_bytes, args.threads)
+    }
+    tf_backend = tensorflow_wrapper_backend(model, scaler)
+    if tf_backend is None:
+        print("⚠️  TensorFlow non installé: wrapper tf.py_function ignoré")
+    else:
+        backends["tf_py_function"] = tf_backend
+
+    results: List[Dict[str, float]] = []
+    print(f"\n{'backend':<16} {'batch':>6} {'p50':>10} {'p99':>10} {'débit':>14} {'écart':>10}")
+    for batch_size in args.batch_sizes:
+        batch = make_batch(test_rows, batch_size)
+        expected = backends["sklearn"](batch)
+        for name, predict in backends.items():
+            max_diff = float(np.abs(predict(batch) - expected).max())
+            stats = benchmark_backend(predict, batch, args.iterations, args.warmup)
+            results.append({"backend": name, "batch_size": batch_size,
+                            "max_abs_diff": max_diff, **stats})
+            print(f"{name:<16} {batch_size:>6} {stats['p50_ms']:>8.3f}ms "
+                  f"{stats['p99_ms']:>8.3f}ms {stats['throughput']:>9.0f} éch/s {max_diff:>10.1e}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📁 Résultats: {args.output}")
+
+if __name__ == "__main__":
+    main()
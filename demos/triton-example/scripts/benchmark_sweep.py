@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Balayage taille de batch × concurrence (à la perf_analyzer) pour le modèle Iris Triton
+Chaque cellule de la grille est un test de charge; le rapport (CSV/JSON)
+donne débit et percentiles de latence par cellule, ainsi que le point de
+coude servant à dimensionner max_batch_size dans config.pbtxt
+
+Utilisation:
+    python benchmark_sweep.py --url http://<service> --batch-sizes 1 4 8 16 --concurrency 1 4 8
+    python benchmark_sweep.py --local --output sweep.json
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from test_inference import (
+    DEFAULT_MODEL_NAME,
+    DEFAULT_MODEL_VERSION,
+    SAMPLE_DATA,
+    TritonHttpClient,
+    fetch_model_metadata,
+    parse_duration,
+    prepare_triton_request,
+    run_load_test
+)
+
+DEFAULT_BATCH_SIZES = [1, 2, 4, 8, 16, 32]
+DEFAULT_CONCURRENCY = [1, 2, 4, 8]
+
+# Fraction du débit maximal à partir de laquelle une cellule est candidate au coude
+KNEE_THROUGHPUT_FRACTION = 0.9
+
+REPORT_FIELDS = ["batch_size", "concurrency", "requests", "errors", "error_rate",
+                 "qps", "throughput", "p50_ms", "p90_ms", "p99_ms", "p999_ms"]
+
+def make_batch(batch_size: int, seed: int = 0) -> np.ndarray:
+    """
+    Batch d'échantillons de type Iris (bruit autour des échantillons de référence)
+    """
+    rng = np.random.default_rng(seed)
+    centers = np.array(list(SAMPLE_DATA.values()), dtype=np.float32)
+    rows = centers[rng.integers(0, len(centers), size=batch_size)]
+    return (rows + rng.normal(0.0, 0.2, size=rows.shape)).astype(np.float32)
+
+def run_sweep(url: str, batch_sizes: List[int], concurrency_levels: List[int],
+              duration: float, model_name: str = DEFAULT_MODEL_NAME,
+              model_version: str = DEFAULT_MODEL_VERSION,
+              binary_data: bool = False) -> List[Dict[str, Any]]:
+    """
+    Exécute un test de charge par cellule (batch_size, concurrence)
+    """
+    inference_url = f"{url}/v2/models/{model_name}/versions/{model_version}/infer"
+    results = []
+
+    with TritonHttpClient(pool_size=max(concurrency_levels)) as client:
+        signature = fetch_model_metadata(url, model_name, model_version, client)
+        for batch_size in batch_sizes:
+            request = prepare_triton_request(make_batch(batch_size), model_name,
+                                             binary_data=binary_data, signature=signature)
+            for concurrency in concurrency_levels:
+                report = asyncio.run(run_load_test(inference_url, request, concurrency,
+                                                   duration, client=client))
+                cell = {
+                    "batch_size": batch_size,
+                    "concurrency": concurrency,
+                    "requests": report["requests"],
+                    "errors": report["errors"],
+                    "error_rate": report["error_rate"],
+                    "qps": report["qps"],
+                    "throughput": report["qps"] * batch_size,
+                    "p50_ms": report["p50"] * 1000,
+                    "p90_ms": report["p90"] * 1000,
+                    "p99_ms": report["p99"] * 1000,
+                    "p999_ms": report["p999"] * 1000
+                }
+                results.append(cell)
+                print(f"  batch={batch_size:<4} concurrence={concurrency:<4} "
+                      f"débit={cell['throughput']:>9.1f} éch/s  p99={cell['p99_ms']:>8.2f} ms  "
+                      f"erreurs={cell['error_rate']*100:.1f}%")
+    return results
+
+def find_knee(results: List[Dict[str, Any]],
+              latency_budget_ms: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Point de coude: parmi les cellules sans erreur (et sous le budget p99),
+    celle de plus faible p99 atteignant au moins 90% du débit maximal
+    """
+    candidates = [cell for cell in results if cell["errors"] == 0 and cell["requests"] > 0]
+    if latency_budget_ms is not None:
+        candidates = [cell for cell in candidates if cell["p99_ms"] <= latency_budget_ms]
+    if not candidates:
+        return None
+
+    best_throughput = max(cell["throughput"] for cell in candidates)
+    near_best = [cell for cell in candidates
+                 if cell["throughput"] >= KNEE_THROUGHPUT_FRACTION * best_throughput]
+    return min(near_best, key=lambda cell: (cell["p99_ms"], cell["batch_size"]))
+
+def recommend_config(results: List[Dict[str, Any]],
+                     knee: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Recommandation pour config.pbtxt: max_batch_size au coude, et tailles
+    préférées = tailles de batch sans erreur jusqu'au coude
+    """
+    if knee is None:
+        return {}
+    preferred = sorted({cell["batch_size"] for cell in results
+                        if cell["errors"] == 0 and cell["batch_size"] <= knee["batch_size"]
+                        and cell["batch_size"] > 1})
+    return {
+        "max_batch_size": knee["batch_size"],
+        "preferred_batch_size": preferred or [knee["batch_size"]],
+        "client_concurrency": knee["concurrency"]
+    }
+
+def write_report(path: str, results: List[Dict[str, Any]], knee: Optional[Dict[str, Any]],
+                 recommendation: Dict[str, Any]) -> None:
+    """
+    Écrit le rapport: JSON complet si l'extension est .json, sinon CSV des cellules
+    """
+    if path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"cells": results, "knee": knee, "recommendation": recommendation},
+                      f, indent=2)
+        return
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS + ["knee"])
+        writer.writeheader()
+        for cell in results:
+            writer.writerow({**{field: cell[field] for field in REPORT_FIELDS},
+                             "knee": cell is knee})
+
+def main():
+    parser = argparse.ArgumentParser(description="Balayage batch × concurrence pour Triton")
+    parser.add_argument("--url", "-u",
+                       help="URL de base du service d'inférence")
+    parser.add_argument("--local", action="store_true",
+                       help="Démarrer le serveur local (local_triton_server.py) en processus")
+    parser.add_argument("--model-name", "-m", default=DEFAULT_MODEL_NAME,
+                       help="Nom du modèle")
+    parser.add_argument("--model-version", "-v", default=DEFAULT_MODEL_VERSION,
+                       help="Version du modèle")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES,
+                       help="Tailles de batch à tester")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY,
+                       help="Niveaux de concurrence à tester")
+    parser.add_argument("--duration", default="10s",
+                       help="Durée de chaque cellule (ex: 500ms, 10s)")
+    parser.add_argument("--latency-budget-ms", type=float,
+                       help="Budget de latence p99 pour le choix du coude")
+    parser.add_argument("--binary-data", action="store_true",
+                       help="Utiliser l'extension binary data")
+    parser.add_argument("--output", "-o", default="sweep_report.csv",
+                       help="Rapport de sortie (.csv ou .json)")
+
+    args = parser.parse_args()
+
+    if not args.url and not args.local:
+        parser.error("--url ou --local est requis")
+
+    server = None
+    url = args.url
+    if args.local:
+        from local_triton_server import LocalTritonModel, load_sklearn_model, start_server
+        sklearn_model, scaler = load_sklearn_model(None)
+        model = LocalTritonModel(sklearn_model, scaler, name=args.model_name,
+                                 version=args.model_version,
+                                 max_batch_size=max(args.batch_sizes))
+        server, _ = start_server(model)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        print(f"🧪 Serveur local démarré: {url}")
+
+    duration = parse_duration(args.duration)
+    cells = len(args.batch_sizes) * len(args.concurrency)
+    print(f"🚀 Balayage: {cells} cellules × {duration:.1f}s")
+
+    try:
+        results = run_sweep(url, args.batch_sizes, args.concurrency, duration,
+                            args.model_name, args.model_version, args.binary_data)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    knee = find_knee(results, args.latency_budget_ms)
+    recommendation = recommend_config(results, knee)
+    write_report(args.output, results, knee, recommendation)
+
+    print(f"\n📁 Rapport: {args.output}")
+    if knee is None:
+        print("⚠️  Aucune cellule ne respecte les contraintes (erreurs ou budget de latence)")
+        sys.exit(1)
+    print(f"🎯 Coude: batch={knee['batch_size']}, concurrence={knee['concurrency']} "
+          f"({knee['throughput']:.1f} éch/s, p99 {knee['p99_ms']:.2f} ms)")
+    print(f"   config.pbtxt recommandé: max_batch_size: {recommendation['max_batch_size']}, "
+          f"preferred_batch_size: {recommendation['preferred_batch_size']}")
+
+if __name__ == "__main__":
+    main()
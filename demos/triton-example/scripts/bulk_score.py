@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Scoring en masse d'un fichier (CSV, NPY, Parquet) via l'endpoint d'inférence Triton
+Les lignes sont lues par morceaux, un nombre borné de requêtes reste en vol
+et les résultats sont écrits au fil de l'eau: la mémoire reste constante
+quelle que soit la taille du fichier
+
+Utilisation: python test_inference.py score --url <url> --input data.csv --output scores.csv
+"""
+
+import argparse
+import collections
+import os
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+from test_inference import (
+    DEFAULT_MODEL_NAME,
+    DEFAULT_MODEL_VERSION,
+    TritonHttpClient,
+    decode_predictions,
+    fetch_model_metadata,
+    parse_triton_response,
+    prepare_triton_request,
+    send_inference_request
+)
+
+DEFAULT_CHUNK_ROWS = 65536
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_MAX_INFLIGHT = 8
+N_FEATURES = 4
+
+def iter_npy_chunks(path: str, chunk_rows: int) -> Iterator[np.ndarray]:
+    """
+    Lit un .npy par tranches via memory mapping (aucun chargement complet)
+    """
+    array = np.load(path, mmap_mode="r")
+    for start in range(0, array.shape[0], chunk_rows):
+        yield np.asarray(array[start:start + chunk_rows], dtype=np.float32)
+
+def iter_csv_chunks(path: str, chunk_rows: int, columns: Optional[List[str]],
+                    header: bool = True) -> Iterator[np.ndarray]:
+    """
+    Lit un CSV par morceaux avec pandas; sans --columns, les 4 premières
+    colonnes numériques sont utilisées
+    """
+    import pandas as pd
+
+    reader = pd.read_csv(path, chunksize=chunk_rows, header=0 if header else None,
+                         usecols=columns)
+    for frame in reader:
+        if columns is None:
+            frame = frame.select_dtypes(include="number").iloc[:, :N_FEATURES]
+        yield frame.to_numpy(dtype=np.float32)
+
+def iter_parquet_chunks(path: str, chunk_rows: int,
+                        columns: Optional[List[str]]) -> Iterator[np.ndarray]:
+    """
+    Lit un Parquet par lots d'enregistrements avec pyarrow
+    """
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    if columns is None:
+        columns = parquet_file.schema_arrow.names[:N_FEATURES]
+    for record_batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+        yield np.column_stack([
+            record_batch.column(index).to_numpy(zero_copy_only=False)
+            for index in range(record_batch.num_columns)
+        ]).astype(np.float32, copy=False)
+
+def iter_input_chunks(path: str, chunk_rows: int, columns: Optional[List[str]] = None,
+                      header: bool = True) -> Iterator[np.ndarray]:
+    """
+    Sélectionne le lecteur selon l'extension du fichier
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        return iter_npy_chunks(path, chunk_rows)
+    if extension in (".parquet", ".pq"):
+        return iter_parquet_chunks(path, chunk_rows, columns)
+    if extension in (".csv", ".txt"):
+        return iter_csv_chunks(path, chunk_rows, columns, header)
+    raise ValueError(f"Format non supporté: {extension} (attendu: .csv, .npy, .parquet)")
+
+def _score_batch(client: TritonHttpClient, inference_url: str, model_name: str,
+                 batch: np.ndarray, binary_data: bool, timeout: int,
+                 signature: Dict[str, Any]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Envoie un batch et retourne (prédictions, probabilités) en tableaux NumPy
+    """
+    request = prepare_triton_request(batch, model_name, binary_data=binary_data,
+                                     signature=signature)
+    response = send_inference_request(inference_url, request, timeout,
+                                      exit_on_error=False, client=client)
+    decoded = decode_predictions(parse_triton_response(response, exit_on_error=False))
+    return decoded["class_indices"], decoded["probabilities"]
+
+def _write_results(output: TextIO, first_row: int,
+                   result: Tuple[np.ndarray, Optional[np.ndarray]],
+                   write_header: bool) -> None:
+    """
+    Ajoute les résultats d'un batch au CSV de sortie (row_id, prediction, prob_*)
+    """
+    predictions, probabilities = result
+    row_ids = np.arange(first_row, first_row + len(predictions))
+    columns = [row_ids, predictions.astype(np.int64)]
+    formats = ["%d", "%d"]
+    if probabilities is not None:
+        columns.extend(probabilities.T)
+        formats.extend(["%.6f"] * probabilities.shape[1])
+
+    if write_header:
+        names = ["row_id", "prediction"]
+        if probabilities is not None:
+            names.extend(f"prob_{index}" for index in range(probabilities.shape[1]))
+        output.write(",".join(names) + "\n")
+
+    np.savetxt(output, np.column_stack(columns), fmt=formats, delimiter=",")
+
+def score_file(url: str, input_path: str, output_path: str,
+               model_name: str = DEFAULT_MODEL_NAME,
+               model_version: str = DEFAULT_MODEL_VERSION,
+               chunk_rows: int = DEFAULT_CHUNK_ROWS,
+               batch_size: int = DEFAULT_BATCH_SIZE,
+               max_inflight: int = DEFAULT_MAX_INFLIGHT,
+               binary_data: bool = False,
+               columns: Optional[List[str]] = None,
+               header: bool = True,
+               timeout: int = 30) -> int:
+    """
+    Score un fichier complet et retourne le nombre de lignes traitées
+    Au plus max_inflight requêtes sont en vol; les résultats sont écrits dans l'ordre
+    La signature du modèle est lue une fois avant le premier batch
+    """
+    inference_url = f"{url}/v2/models/{model_name}/versions/{model_version}/infer"
+    pending: Deque[Tuple[int, Future]] = collections.deque()
+    next_row = 0
+    header_pending = True
+
+    with TritonHttpClient(pool_size=max_inflight) as client, \
+            ThreadPoolExecutor(max_workers=max_inflight) as executor, \
+            open(output_path, "w") as output:
+        signature = fetch_model_metadata(url, model_name, model_version, client)
+        for chunk in iter_input_chunks(input_path, chunk_rows, columns, header):
+            for start in range(0, len(chunk), batch_size):
+                batch = np.ascontiguousarray(chunk[start:start + batch_size])
+                pending.append((next_row, executor.submit(_score_batch, client, inference_url,
+                                                          model_name, batch, binary_data,
+                                                          timeout, signature)))
+                next_row += len(batch)
+
+                # Contre-pression: attendre le plus ancien batch avant d'en lancer d'autres
+                if len(pending) >= max_inflight:
+                    first_row, future = pending.popleft()
+                    _write_results(output, first_row, future.result(), header_pending)
+                    header_pending = False
+
+        while pending:
+            first_row, future = pending.popleft()
+            _write_results(output, first_row, future.result(), header_pending)
+            header_pending = False
+
+    return next_row
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="test_inference.py score",
+                                     description="Scoring en masse d'un fichier via Triton")
+    parser.add_argument("--url", "-u", required=True,
+                       help="URL de base du service d'inférence")
+    parser.add_argument("--model-name", "-m", default=DEFAULT_MODEL_NAME,
+                       help="Nom du modèle")
+    parser.add_argument("--model-version", "-v", default=DEFAULT_MODEL_VERSION,
+                       help="Version du modèle")
+    parser.add_argument("--input", "-i", required=True,
+                       help="Fichier d'entrée (.csv, .npy, .parquet)")
+    parser.add_argument("--output", "-o", required=True,
+                       help="Fichier CSV de sortie (row_id, prediction, prob_*)")
+    parser.add_argument("--columns", nargs="+",
+                       help="Colonnes de features (CSV/Parquet)")
+    parser.add_argument("--no-header", action="store_true",
+                       help="Le CSV d'entrée n'a pas de ligne d'en-tête")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                       help="Nombre de lignes lues par morceau")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                       help="Lignes par requête (≤ max_batch_size du modèle)")
+    parser.add_argument("--max-inflight", type=int, default=DEFAULT_MAX_INFLIGHT,
+                       help="Nombre maximal de requêtes en vol")
+    parser.add_argument("--binary-data", action="store_true",
+                       help="Utiliser l'extension binary data")
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+
+    print("🚀 SCORING EN MASSE")
+    print("=" * 50)
+    print(f"Entrée: {args.input}")
+    print(f"Sortie: {args.output}")
+
+    start = time.perf_counter()
+    try:
+        rows = score_file(args.url, args.input, args.output,
+                          model_name=args.model_name,
+                          model_version=args.model_version,
+                          chunk_rows=args.chunk_rows,
+                          batch_size=args.batch_size,
+                          max_inflight=args.max_inflight,
+                          binary_data=args.binary_data,
+                          columns=args.columns,
+                          header=not args.no_header)
+    except Exception as e:
+        print(f"❌ Erreur lors du scoring: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n✅ {rows} lignes scorées en {elapsed:.2f}s ({rows / elapsed:.1f} lignes/s)")
+
+if __name__ == "__main__":
+    main()
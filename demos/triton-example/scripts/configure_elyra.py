@@ -155,46 +155,52 @@ def process_data(
                 "name": "Triton Inference Test",
                 "description": "Test d'inférence avec Triton",
                 "code": '''
+import os
 import requests
 import json
 import numpy as np
 
-# Configuration
-triton_url = "http://iris-classifier-triton-triton-demo.apps.cluster.local"
+# Configuration (TRITON_URL=http://127.0.0.1:8000 avec scripts/local_triton_server.py)
+triton_url = os.getenv("TRITON_URL", "http://iris-classifier-triton-triton-demo.apps.cluster.local")
 model_name = "iris_classifier"
 model_version = "1"
 
 # Données de test
 test_data = [[5.1, 3.5, 1.4, 0.2]]  # Setosa
 
+# Signature du modèle (noms et types réels des entrées/sorties)
+model_url = f"{triton_url}/v2/models/{model_name}/versions/{model_version}"
+signature = requests.get(model_url, timeout=10).json()
+model_input = signature["inputs"][0]
+
 # Préparer la requête Triton
 payload = {
     "inputs": [
         {
-            "name": "input_features",
+            "name": model_input["name"],
             "shape": [len(test_data), 4],
-            "datatype": "FP32",
+            "datatype": model_input["datatype"],
             "data": [item for sublist in test_data for item in sublist]
         }
     ],
-    "outputs": [
-        {"name": "predictions"},
-        {"name": "probabilities"}
-    ]
+    "outputs": [{"name": output["name"]} for output in signature["outputs"]]
 }
 
 # Envoyer la requête
 response = requests.post(
-    f"{triton_url}/v2/models/{model_name}/versions/{model_version}/infer",
+    f"{model_url}/infer",
     headers={"Content-Type": "application/json"},
     data=json.dumps(payload)
 )
 
-# Afficher les résultats
+# Afficher les résultats (sorties lues par nom; classe = argmax sans sortie "predictions")
 if response.status_code == 200:
-    result = response.json()
-    prediction = result["outputs"][0]["data"][0]
-    probabilities = result["outputs"][1]["data"]
+    outputs = {output["name"]: output["data"] for output in response.json()["outputs"]}
+    probabilities = outputs.get("probabilities")
+    if "predictions" in outputs:
+        prediction = outputs["predictions"][0]
+    else:
+        prediction = int(np.argmax(probabilities[:len(probabilities) // len(test_data)]))
     print(f"Prédiction: {prediction}")
     print(f"Probabilités: {probabilities}")
 else:
@@ -0,0 +1,249 @@
+"""
+Décomposition de la latence d'inférence par phase côté client
+(sérialisation, connexion, time-to-first-byte, transfert du corps, décodage)
+agrégée dans des histogrammes de type HDR, exportables au format texte
+Prometheus ou en JSON
+"""
+
+import bisect
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from test_inference import (
+    TritonHttpClient,
+    encode_triton_request,
+    parse_triton_response
+)
+
+PHASES = ("serialize", "connect", "ttfb", "transfer", "decode", "total")
+
+# Bornes (secondes) des buckets exportés vers Prometheus
+PROMETHEUS_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                      0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class LatencyHistogram:
+    """
+    Histogramme log-linéaire façon HDR: les valeurs (en µs) sont regroupées
+    en conservant SIGNIFICANT_BITS bits significatifs, soit une erreur
+    relative < 1% quelle que soit la magnitude, en mémoire bornée
+    """
+
+    SIGNIFICANT_BITS = 7
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    @classmethod
+    def _bucket(cls, micros: int) -> Tuple[int, int]:
+        shift = max(micros.bit_length() - cls.SIGNIFICANT_BITS, 0)
+        lower = (micros >> shift) << shift
+        return lower, lower + (1 << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        lower, _ = self._bucket(max(int(seconds * 1e6), 0))
+        self.counts[lower] = self.counts.get(lower, 0) + 1
+        self.min = seconds if not self.count else min(self.min, seconds)
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """
+        Percentile en secondes (milieu du bucket contenant le rang demandé,
+        borné par les valeurs extrêmes observées)
+        """
+        if not self.count:
+            return 0.0
+        target = max(int(round(self.count * q / 100.0)), 1)
+        cumulative = 0
+        for lower in sorted(self.counts):
+            cumulative += self.counts[lower]
+            if cumulative >= target:
+                _, upper = self._bucket(lower)
+                return min(max((lower + upper) / 2 / 1e6, self.min), self.max)
+        return self.max
+
+    def cumulative_counts(self, bounds: Tuple[float, ...]) -> List[int]:
+        """
+        Comptes cumulés pour chaque borne supérieure (sémantique `le` de Prometheus)
+        Un bucket couvre [lower, upper + 1) µs: s'il chevauche une borne,
+        il est compté à partir de la borne suivante (au-delà: seulement +Inf)
+        """
+        bound_micros = [int(round(bound * 1e6)) for bound in bounds]
+        per_bound = [0] * (len(bounds) + 1)
+        for lower, count in self.counts.items():
+            _, upper = self._bucket(lower)
+            per_bound[bisect.bisect_left(bound_micros, upper + 1)] += count
+
+        results, cumulative = [], 0
+        for count in per_bound[:-1]:
+            cumulative += count
+            results.append(cumulative)
+        return results
+
+class LatencyRecorder:
+    """
+    Un histogramme par phase, alimenté depuis plusieurs threads
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {phase: LatencyHistogram() for phase in PHASES}
+
+    def record(self, timings: Dict[str, float]) -> None:
+        with self._lock:
+            for phase, seconds in timings.items():
+                self.histograms[phase].record(seconds)
+
+    def timed_inference(self, client: TritonHttpClient, url: str, data: Dict[str, Any],
+                        timeout: int = 30) -> Dict[str, Any]:
+        """
+        Inférence instrumentée; enregistre les durées de chaque phase et retourne
+        la réponse parsée (utilisable comme infer_fn du mode charge)
+        """
+        parsed, timings = timed_inference(client, url, data, timeout)
+        self.record(timings)
+        return parsed
+
+    def to_json(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                phase: {
+                    "count": histogram.count,
+                    "mean": histogram.sum / histogram.count if histogram.count else 0.0,
+                    "p50": histogram.percentile(50),
+                    "p90": histogram.percentile(90),
+                    "p99": histogram.percentile(99),
+                    "p999": histogram.percentile(99.9),
+                    "max": histogram.max
+                }
+                for phase, histogram in self.histograms.items()
+            }
+
+    def to_prometheus(self, metric: str = "triton_client_phase_latency_seconds",
+                      labels: Optional[Dict[str, str]] = None) -> str:
+        """
+        Exposition au format texte Prometheus (un histogramme, label phase)
+        """
+        extra = "".join(f',{key}="{value}"' for key, value in (labels or {}).items())
+        lines = [
+            f"# HELP {metric} Latence d'inférence côté client par phase",
+            f"# TYPE {metric} histogram"
+        ]
+        with self._lock:
+            for phase, histogram in self.histograms.items():
+                for bound, count in zip(PROMETHEUS_BUCKETS,
+                                        histogram.cumulative_counts(PROMETHEUS_BUCKETS)):
+                    lines.append(f'{metric}_bucket{{phase="{phase}"{extra},le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{phase="{phase}"{extra},le="+Inf"}} {histogram.count}')
+                lines.append(f'{metric}_sum{{phase="{phase}"{extra}}} {histogram.sum:.9f}')
+                lines.append(f'{metric}_count{{phase="{phase}"{extra}}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        """
+        Écrit les métriques: JSON si l'extension est .json, texte Prometheus sinon
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                json.dump(self.to_json(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
+
+    def print_summary(self) -> None:
+        print("\n⏱️  DÉCOMPOSITION DE LA LATENCE")
+        print("=" * 50)
+        print(f"{'phase':<10} {'p50':>10} {'p90':>10} {'p99':>10} {'max':>10}")
+        for phase, stats in self.to_json().items():
+            print(f"{phase:<10} {stats['p50']*1000:>8.3f}ms {stats['p90']*1000:>8.3f}ms "
+                  f"{stats['p99']*1000:>8.3f}ms {stats['max']*1000:>8.3f}ms")
+
+# ---------------------------------------------------------------------------
+# Mesure du temps de connexion (TCP + TLS) par thread
+# ---------------------------------------------------------------------------
+
+_connect_timer = threading.local()
+
+class _TimedConnectMixin:
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_timer.seconds = getattr(_connect_timer, "seconds", 0.0) + \
+                time.perf_counter() - start
+
+class TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    Adaptateur requests dont les connexions mesurent leur temps d'établissement
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool
+        }
+
+def install_timed_adapter(client: TritonHttpClient) -> None:
+    """
+    Remplace l'adaptateur de la session du client (même taille de pool)
+    """
+    if client.http2:
+        raise RuntimeError("La décomposition par phase nécessite le client requests (sans --http2)")
+    adapter = TimedHTTPAdapter(pool_connections=client.pool_size, pool_maxsize=client.pool_size)
+    client.session.mount("http://", adapter)
+    client.session.mount("https://", adapter)
+
+def timed_inference(client: TritonHttpClient, url: str, data: Dict[str, Any],
+                    timeout: int = 30) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Envoie une requête et mesure chaque phase
+    Le corps est lu séparément (stream=True) pour isoler le TTFB du transfert
+    """
+    start = time.perf_counter()
+    body, headers = encode_triton_request(data)
+    serialized = time.perf_counter()
+
+    _connect_timer.seconds = 0.0
+    response = client.session.post(url, data=body, headers=headers,
+                                   timeout=timeout, stream=True)
+    first_byte = time.perf_counter()
+    response.content
+    transferred = time.perf_counter()
+    response.raise_for_status()
+
+    parsed = parse_triton_response(response, exit_on_error=False)
+    decoded = time.perf_counter()
+
+    connect = _connect_timer.seconds
+    return parsed, {
+        "serialize": serialized - start,
+        "connect": connect,
+        "ttfb": max(first_byte - serialized - connect, 0.0),
+        "transfer": transferred - first_byte,
+        "decode": decoded - transferred,
+        "total": decoded - start
+    }
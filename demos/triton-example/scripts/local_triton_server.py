@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Serveur local implémentant les endpoints REST du protocole v2 (KServe/Triton)
+Sert le modèle scikit-learn produit par pipelines/model_training.py (iris_model.pkl)
+avec latence artificielle et batching dynamique configurables, pour
+benchmarker les clients (charge, batching, protocoles) sans cluster
+
+Utilisation:
+    python local_triton_server.py --model ../pipelines/iris_model.pkl --port 8000
+    python test_inference.py --url http://127.0.0.1:8000
+"""
+
+import argparse
+import json
+import pickle
+import queue
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from test_inference import DEFAULT_MODEL_NAME, DEFAULT_MODEL_VERSION, TRITON_DTYPES
+
+DEFAULT_PORT = 8000
+DEFAULT_MAX_BATCH_SIZE = 8
+
+MODEL_PATH_PATTERN = re.compile(
+    r"^/v2/models/(?P<name>[^/]+)(?:/versions/(?P<version>[^/]+))?(?P<action>/infer|/ready)?$"
+)
+
+def load_sklearn_model(model_path: Optional[str], scaler_path: Optional[str] = None):
+    """
+    Charge le modèle picklé (et le scaler optionnel)
+    Sans modèle, entraîne un RandomForest Iris avec les paramètres du pipeline
+    """
+    if model_path:
+        with open(model_path, "rb") as f:
+            model = pickle.load(f)
+    else:
+        from sklearn.datasets import load_iris
+        from sklearn.ensemble import RandomForestClassifier
+
+        iris = load_iris()
+        model = RandomForestClassifier(n_estimators=100, random_state=42)
+        model.fit(iris.data, iris.target)
+
+    scaler = None
+    if scaler_path:
+        with open(scaler_path, "rb") as f:
+            scaler = pickle.load(f)
+    return model, scaler
+
+class DynamicBatcher:
+    """
+    Batching dynamique côté serveur: les requêtes concurrentes sont fusionnées
+    en un seul appel predict_proba (max_batch_size lignes, max_queue_delay au plus)
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int, max_queue_delay_us: int):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_queue_delay = max_queue_delay_us / 1e6
+        self._queue: "queue.Queue[Tuple[np.ndarray, Dict[str, Any]]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        slot = {"event": threading.Event(), "result": None, "error": None}
+        self._queue.put((features, slot))
+        slot["event"].wait()
+        if slot["error"] is not None:
+            raise slot["error"]
+        return slot["result"]
+
+    def _run(self) -> None:
+        while True:
+            pending = [self._queue.get()]
+            rows = len(pending[0][0])
+            deadline = time.perf_counter() + self.max_queue_delay
+            while rows < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                rows += len(item[0])
+
+            try:
+                probabilities = self.predict_fn(np.concatenate([f for f, _ in pending]))
+                offset = 0
+                for features, slot in pending:
+                    slot["result"] = probabilities[offset:offset + len(features)]
+                    offset += len(features)
+            except Exception as e:
+                for _, slot in pending:
+                    slot["error"] = e
+            for _, slot in pending:
+                slot["event"].set()
+
+class LocalTritonModel:
+    """
+    Modèle servi: applique le scaler éventuel puis predict_proba
+    """
+
+    def __init__(self, model, scaler=None, name: str = DEFAULT_MODEL_NAME,
+                 version: str = DEFAULT_MODEL_VERSION,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 dynamic_batching: bool = False, max_queue_delay_us: int = 100):
+        self.model = model
+        self.scaler = scaler
+        self.name = name
+        self.version = version
+        self.max_batch_size = max_batch_size
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.n_features = getattr(model, "n_features_in_", 4)
+        self.n_classes = len(getattr(model, "classes_", [0, 1, 2]))
+        self.batcher = (DynamicBatcher(self._predict_proba, max_batch_size, max_queue_delay_us)
+                        if dynamic_batching else None)
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "versions": [self.version],
+            "platform": "local_sklearn",
+            "inputs": [{"name": "input_features", "datatype": "FP32",
+                        "shape": [-1, self.n_features]}],
+            "outputs": [
+                {"name": "predictions", "datatype": "INT64", "shape": [-1]},
+                {"name": "probabilities", "datatype": "FP32", "shape": [-1, self.n_classes]}
+            ]
+        }
+
+    def _predict_proba(self, features: np.ndarray) -> np.ndarray:
+        if self.scaler is not None:
+            features = self.scaler.transform(features)
+        return self.model.predict_proba(features).astype(np.float32)
+
+    def infer(self, features: np.ndarray) -> Dict[str, np.ndarray]:
+        if self.max_batch_size and len(features) > self.max_batch_size:
+            raise ValueError(f"inference request batch-size must be <= {self.max_batch_size} "
+                             f"for '{self.name}'")
+
+        # Latence artificielle (temps de calcul simulé côté serveur)
+        if self.latency or self.jitter:
+            time.sleep(max(self.latency + random.uniform(-self.jitter, self.jitter), 0))
+
+        if self.batcher is not None:
+            probabilities = self.batcher.predict(features)
+        else:
+            probabilities = self._predict_proba(features)
+        return {
+            "predictions": probabilities.argmax(axis=1).astype(np.int64),
+            "probabilities": probabilities
+        }
+
+def decode_infer_request(body: bytes, header_length: Optional[str]) -> Tuple[Dict[str, Any],
+                                                                            np.ndarray]:
+    """
+    Décode une requête /infer (JSON ou extension binary data) en tableau 2D
+    """
+    if header_length is None:
+        request = json.loads(body)
+        binary_offset = None
+    else:
+        request = json.loads(body[:int(header_length)])
+        binary_offset = int(header_length)
+
+    tensor = request["inputs"][0]
+    dtype = np.dtype(TRITON_DTYPES[tensor["datatype"]])
+    binary_size = tensor.get("parameters", {}).get("binary_data_size")
+    if binary_size is not None:
+        features = np.frombuffer(body, dtype=dtype, count=binary_size // dtype.itemsize,
+                                 offset=binary_offset)
+    else:
+        features = np.asarray(tensor["data"], dtype=dtype)
+    return request, features.reshape(tensor["shape"]).astype(np.float32, copy=False)
+
+def encode_infer_response(model: LocalTritonModel, request: Dict[str, Any],
+                          outputs: Dict[str, np.ndarray]) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Encode la réponse en JSON, ou en binaire pour les sorties demandées avec binary_data
+    """
+    requested = request.get("outputs") or [{"name": name} for name in outputs]
+    binary_default = request.get("parameters", {}).get("binary_data_output", False)
+    datatypes = {"predictions": "INT64", "probabilities": "FP32"}
+
+    entries, buffers = [], []
+    for output in requested:
+        array = outputs[output["name"]]
+        entry = {"name": output["name"], "datatype": datatypes[output["name"]],
+                 "shape": list(array.shape)}
+        if output.get("parameters", {}).get("binary_data", binary_default):
+            entry["parameters"] = {"binary_data_size": array.nbytes}
+            buffers.append(np.ascontiguousarray(array).tobytes())
+        else:
+            entry["data"] = array.ravel().tolist()
+        entries.append(entry)
+
+    header = json.dumps({"model_name": model.name, "model_version": model.version,
+                         "id": request.get("id", ""), "outputs": entries}).encode("utf-8")
+    if not buffers:
+        return header, {"Content-Type": "application/json"}
+    return b"".join([header] + buffers), {
+        "Content-Type": "application/octet-stream",
+        "Inference-Header-Content-Length": str(len(header))
+    }
+
+def make_handler(model: LocalTritonModel):
+    """
+    Construit le handler HTTP lié au modèle servi
+    """
+
+    class TritonV2Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, headers: Dict[str, str]) -> None:
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+            self._send(status, json.dumps(payload).encode("utf-8"),
+                       {"Content-Type": "application/json"})
+
+        def _match_model(self) -> Optional[re.Match]:
+            match = MODEL_PATH_PATTERN.match(self.path)
+            if not match or match["name"] != model.name or \
+                    match["version"] not in (None, model.version):
+                self._send_json(404, {"error": f"Unknown model: '{self.path}'"})
+                return None
+            return match
+
+        def do_GET(self):
+            if self.path in ("/v2/health/ready", "/v2/health/live"):
+                self._send(200, b"", {})
+                return
+            if self.path == "/v2":
+                self._send_json(200, {"name": "local-triton-stand-in", "version": "0",
+                                      "extensions": ["binary_tensor_data"]})
+                return
+
+            match = self._match_model()
+            if match is None:
+                return
+            if match["action"] == "/ready":
+                self._send(200, b"", {})
+            elif match["action"] is None:
+                self._send_json(200, model.metadata())
+            else:
+                self._send_json(405, {"error": "Method not allowed"})
+
+        def do_POST(self):
+            match = self._match_model()
+            if match is None:
+                return
+            if match["action"] != "/infer":
+                self._send_json(405, {"error": "Method not allowed"})
+                return
+
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                request, features = decode_infer_request(
+                    body, self.headers.get("Inference-Header-Content-Length"))
+                outputs = model.infer(features)
+                payload, headers = encode_infer_response(model, request, outputs)
+            except (KeyError, ValueError, IndexError, TypeError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            self._send(200, payload, headers)
+
+    return TritonV2Handler
+
+def start_server(model: LocalTritonModel, host: str = "127.0.0.1",
+                 port: int = 0) -> Tuple[ThreadingHTTPServer, threading.Thread]:
+    """
+    Démarre le serveur dans un thread (port=0 choisit un port libre)
+    L'URL de base est http://{host}:{server.server_address[1]}
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(model))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur local v2 (stand-in Triton) pour le modèle Iris")
+    parser.add_argument("--host", default="127.0.0.1",
+                       help="Adresse d'écoute")
+    parser.add_argument("--port", "-p", type=int, default=DEFAULT_PORT,
+                       help="Port d'écoute")
+    parser.add_argument("--model",
+                       help="Modèle picklé (iris_model.pkl); par défaut un RandomForest est entraîné")
+    parser.add_argument("--scaler",
+                       help="StandardScaler picklé appliqué avant la prédiction")
+    parser.add_argument("--model-name", "-m", default=DEFAULT_MODEL_NAME,
+                       help="Nom du modèle servi")
+    parser.add_argument("--model-version", "-v", default=DEFAULT_MODEL_VERSION,
+                       help="Version du modèle servi")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                       help="Taille maximale de batch acceptée (0 = illimitée)")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                       help="Latence artificielle ajoutée à chaque inférence (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0,
+                       help="Variation aléatoire de la latence artificielle (ms)")
+    parser.add_argument("--dynamic-batching", action="store_true",
+                       help="Fusionner les requêtes concurrentes (batching dynamique)")
+    parser.add_argument("--max-queue-delay-us", type=int, default=100,
+                       help="Délai maximal d'attente du batching dynamique (µs)")
+
+    args = parser.parse_args()
+
+    sklearn_model, scaler = load_sklearn_model(args.model, args.scaler)
+    model = LocalTritonModel(sklearn_model, scaler,
+                             name=args.model_name,
+                             version=args.model_version,
+                             max_batch_size=args.max_batch_size,
+                             latency_ms=args.latency_ms,
+                             jitter_ms=args.jitter_ms,
+                             dynamic_batching=args.dynamic_batching,
+                             max_queue_delay_us=args.max_queue_delay_us)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(model))
+    server.daemon_threads = True
+    print(f"🚀 Serveur v2 local: http://{args.host}:{server.server_address[1]}")
+    print(f"   Modèle: {model.name} v{model.version} ({type(sklearn_model).__name__})")
+    print(f"   max_batch_size: {args.max_batch_size}, latence: {args.latency_ms} ms, "
+          f"batching dynamique: {'oui' if args.dynamic_batching else 'non'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Arrêt du serveur")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
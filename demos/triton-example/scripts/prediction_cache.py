@@ -0,0 +1,222 @@
+"""
+Cache de prédictions adressé par contenu, placé devant l'endpoint d'inférence
+Clé: empreinte de la ligne FP32 + nom et version du modèle. Les lignes en
+cache ne touchent pas le réseau; un batch n'envoie que les lignes absentes
+Borne en octets (LRU), TTL, invalidation au changement de version
+La version servie n'est relue que sur un miss: le TTL borne la durée
+pendant laquelle un redéploiement peut passer inaperçu
+"""
+
+import collections
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import requests
+
+from test_inference import (
+    DEFAULT_MODEL_NAME,
+    DEFAULT_MODEL_VERSION,
+    DEFAULT_PREDICTION_CACHE_TTL,
+    TRITON_DTYPES,
+    TritonHttpClient,
+    decode_predictions,
+    parse_triton_response,
+    prepare_triton_request,
+    send_inference_request
+)
+
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Coût fixe estimé d'une entrée (clé, tuple, nœud de l'OrderedDict)
+ENTRY_OVERHEAD_BYTES = 160
+
+class PredictionCache:
+    """
+    Cache LRU borné en octets; thread-safe
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+                 ttl: Optional[float] = DEFAULT_PREDICTION_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size_bytes = 0
+        self._entries: "collections.OrderedDict[bytes, Tuple[str, int, Optional[np.ndarray], float]]" = \
+            collections.OrderedDict()
+        self._versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0,
+                      "invalidations": 0}
+
+    @staticmethod
+    def row_keys(rows: np.ndarray, model_name: str, model_version: str) -> List[bytes]:
+        """
+        Empreintes BLAKE2b (128 bits) des lignes FP32 little-endian
+        """
+        prefix = f"{model_name}\0{model_version}\0".encode("utf-8")
+        rows = np.ascontiguousarray(rows, dtype=TRITON_DTYPES["FP32"])
+        return [hashlib.blake2b(prefix + row.tobytes(), digest_size=16).digest()
+                for row in rows]
+
+    @staticmethod
+    def _entry_size(probabilities: Optional[np.ndarray]) -> int:
+        return ENTRY_OVERHEAD_BYTES + (probabilities.nbytes if probabilities is not None else 0)
+
+    def observe_version(self, model_name: str, model_version: str) -> None:
+        """
+        Invalide les entrées d'un modèle dès que sa version servie change
+        """
+        with self._lock:
+            previous = self._versions.get(model_name)
+            self._versions[model_name] = model_version
+            if previous is None or previous == model_version:
+                return
+            stale = [key for key, entry in self._entries.items() if entry[0] == model_name]
+            for key in stale:
+                self._remove(key)
+            self.stats["invalidations"] += len(stale)
+
+    def _remove(self, key: bytes) -> None:
+        _, _, probabilities, _ = self._entries.pop(key)
+        self.size_bytes -= self._entry_size(probabilities)
+
+    def get(self, key: bytes) -> Optional[Tuple[int, Optional[np.ndarray]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and \
+                    time.monotonic() - entry[3] > self.ttl:
+                self._remove(key)
+                self.stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1], entry[2]
+
+    def put(self, key: bytes, model_name: str, prediction: int,
+            probabilities: Optional[np.ndarray]) -> None:
+        size = self._entry_size(probabilities)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (model_name, prediction, probabilities, time.monotonic())
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats["evictions"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0
+            }
+
+    def print_metrics(self) -> None:
+        metrics = self.metrics()
+        print("\n🗃️  CACHE DE PRÉDICTIONS")
+        print("=" * 50)
+        print(f"Hits: {metrics['hits']}, misses: {metrics['misses']} "
+              f"(taux de hit: {metrics['hit_rate']*100:.1f}%)")
+        print(f"Entrées: {metrics['entries']} ({metrics['size_bytes'] / 1024:.1f} Ko "
+              f"/ {self.max_bytes / 1024:.0f} Ko)")
+        print(f"Évictions: {metrics['evictions']}, expirations: {metrics['expirations']}, "
+              f"invalidations: {metrics['invalidations']}")
+
+class CachedInferenceClient:
+    """
+    Client d'inférence consultant le cache ligne par ligne; seules les lignes
+    absentes sont envoyées, en une seule requête
+    """
+
+    def __init__(self, client: TritonHttpClient, base_url: str, cache: PredictionCache,
+                 model_name: str = DEFAULT_MODEL_NAME,
+                 model_version: str = DEFAULT_MODEL_VERSION,
+                 binary_data: bool = False, signature: Optional[Dict[str, Any]] = None,
+                 timeout: int = 30,
+                 sender: Optional[Callable[[Dict[str, Any]], requests.Response]] = None,
+                 refresher: Optional[Any] = None):
+        self.client = client
+        self.cache = cache
+        self.model_name = model_name
+        self.model_version = model_version
+        self.binary_data = binary_data
+        self.signature = signature
+        self.timeout = timeout
+        self.inference_url = f"{base_url}/v2/models/{model_name}/versions/{model_version}/infer"
+        # Envoi des lignes absentes (ex: ResilientInferenceClient.send), direct par défaut
+        self.sender = sender or self._send
+        # SignatureRefresher: les lignes absentes suivent le rafraîchissement de signature
+        self.refresher = refresher
+        # Version annoncée par la dernière réponse (clé des lignes en cache)
+        self.served_version: Optional[str] = None
+
+    def _send(self, data: Dict[str, Any]) -> requests.Response:
+        return send_inference_request(self.inference_url, data, self.timeout,
+                                      exit_on_error=False, client=self.client)
+
+    def _infer(self, rows: np.ndarray) -> Dict[str, Any]:
+        if self.refresher is not None:
+            response = self.refresher.send_rows(rows, self.sender)
+        else:
+            response = self.sender(prepare_triton_request(rows, self.model_name,
+                                                          binary_data=self.binary_data,
+                                                          signature=self.signature))
+        return parse_triton_response(response, exit_on_error=False)
+
+    def predict(self, input_data: Union[List[List[float]], np.ndarray]) -> Dict[str, Any]:
+        """
+        Retourne une réponse au format de parse_triton_response (predictions,
+        probabilities, shapes), servie depuis le cache pour les lignes connues
+        """
+        rows = np.ascontiguousarray(input_data, dtype=np.float32)
+        version = self.served_version or self.model_version
+        keys = self.cache.row_keys(rows, self.model_name, version)
+        cached = [self.cache.get(key) for key in keys]
+
+        # Lignes absentes, dédoublonnées: une ligne répétée n'est envoyée qu'une fois
+        missing: Dict[bytes, List[int]] = {}
+        for index, entry in enumerate(cached):
+            if entry is None:
+                missing.setdefault(keys[index], []).append(index)
+
+        if missing:
+            first_rows = [indices[0] for indices in missing.values()]
+            parsed = self._infer(rows[first_rows])
+            # Version réellement servie: un redéploiement invalide les entrées du modèle
+            served = str(parsed.get("model_version") or self.model_version)
+            self.cache.observe_version(self.model_name, served)
+            self.served_version = served
+            fresh_keys = (list(missing) if served == version
+                          else self.cache.row_keys(rows[first_rows], self.model_name, served))
+            decoded = decode_predictions(parsed)
+            probabilities = decoded["probabilities"]
+            for position, (key, indices) in enumerate(zip(fresh_keys, missing.values())):
+                row_probabilities = (probabilities[position].copy()
+                                     if probabilities is not None else None)
+                entry = (int(decoded["class_indices"][position]), row_probabilities)
+                self.cache.put(key, self.model_name, *entry)
+                for index in indices:
+                    cached[index] = entry
+
+        predictions = np.array([entry[0] for entry in cached], dtype=np.int64)
+        # Probabilités seulement si chaque ligne en a (entrées issues d'exports différents)
+        probabilities = None
+        if cached and all(entry[1] is not None for entry in cached):
+            probabilities = np.stack([entry[1] for entry in cached])
+        return {
+            "predictions": predictions,
+            "probabilities": probabilities,
+            "shape": [len(predictions)],
+            "probabilities_shape": list(probabilities.shape) if probabilities is not None else None
+        }
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Exécution locale du modèle backend python (pipelines/triton_python_backend/model.py)
+hors de Triton: triton_python_backend_utils est remplacé par un module minimal,
+le modèle (model.py, compact_forest.py et la forêt) est exporté dans un dépôt
+temporaire puis initialize()/execute() sont appelés avec des requêtes
+simulées, comme le ferait le batching dynamique
+
+Utilisation:
+    python python_backend_local.py --requests 8 --rows 4
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+import numpy as np
+
+from benchmark_export import train_reference
+
+PIPELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pipelines")
+MODEL_SOURCE = os.path.join(PIPELINES_DIR, "triton_python_backend", "model.py")
+COMPACT_FOREST_SOURCE = os.path.join(PIPELINES_DIR, "compact_forest.py")
+
+NUMPY_DTYPES = {"TYPE_FP32": np.float32, "TYPE_FP64": np.float64, "TYPE_INT64": np.int64}
+
+class StubTensor:
+    def __init__(self, name: str, array: np.ndarray):
+        self._name = name
+        self._array = array
+
+    def name(self) -> str:
+        return self._name
+
+    def as_numpy(self) -> np.ndarray:
+        return self._array
+
+class StubInferenceRequest:
+    def __init__(self, inputs):
+        self.inputs = {tensor.name(): tensor for tensor in inputs}
+
+class StubInferenceResponse:
+    def __init__(self, output_tensors, error=None):
+        self.output_tensors = {tensor.name(): tensor for tensor in output_tensors}
+        self.error = error
+
+def make_pb_utils() -> types.ModuleType:
+    """
+    Sous-ensemble de triton_python_backend_utils utilisé par model.py
+    """
+    pb_utils = types.ModuleType("triton_python_backend_utils")
+    pb_utils.Tensor = StubTensor
+    pb_utils.InferenceRequest = StubInferenceRequest
+    pb_utils.InferenceResponse = StubInferenceResponse
+    pb_utils.get_input_tensor_by_name = lambda request, name: request.inputs.get(name)
+    pb_utils.get_output_tensor_by_name = lambda response, name: response.output_tensors.get(name)
+    pb_utils.get_output_config_by_name = lambda config, name: next(
+        (output for output in config["output"] if output["name"] == name), None)
+    pb_utils.triton_string_to_numpy = lambda data_type: NUMPY_DTYPES[data_type]
+    return pb_utils
+
+def load_backend(version_dir: str):
+    """
+    Importe model.py depuis le répertoire de version, comme le backend python
+    """
+    sys.modules["triton_python_backend_utils"] = make_pb_utils()
+    spec = importlib.util.spec_from_file_location("iris_python_backend",
+                                                  os.path.join(version_dir, "model.py"))
+    backend = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(backend)
+    return backend
+
+def main():
+    parser = argparse.ArgumentParser(description="Test local du modèle backend python Triton")
+    parser.add_argument("--requests", type=int, default=8,
+                       help="Nombre de requêtes par appel execute()")
+    parser.add_argument("--rows", type=int, default=4,
+                       help="Nombre de lignes par requête")
+    parser.add_argument("--iterations", type=int, default=200,
+                       help="Nombre d'appels execute() mesurés")
+    parser.add_argument("--instances", type=int, default=2,
+                       help="Nombre d'instances initialisées sur les mêmes fichiers")
+    parser.add_argument("--precision", choices=["full", "reduced"], default="full",
+                       help="Précision de la forêt exportée")
+
+    args = parser.parse_args()
+
+    model, scaler, test_rows = train_reference()
+
+    with tempfile.TemporaryDirectory() as repository:
+        version_dir = os.path.join(repository, "iris_classifier", "1")
+        os.makedirs(version_dir)
+        shutil.copy(MODEL_SOURCE, version_dir)
+        shutil.copy(COMPACT_FOREST_SOURCE, version_dir)
+        backend = load_backend(version_dir)
+        compact_forest = sys.modules["compact_forest"]
+
+        forest_dir = os.path.join(version_dir, backend.FOREST_DIR)
+        compact_forest.CompactForest.from_sklearn(model, scaler, args.precision).save(forest_dir)
+        forest_bytes = sum(os.path.getsize(os.path.join(forest_dir, name))
+                           for name in os.listdir(forest_dir))
+        print(f"📦 Forêt exportée: {forest_bytes / 1024:.1f} Ko ({forest_dir})")
+
+        model_args = {
+            "model_config": json.dumps({
+                "name": "iris_classifier",
+                "output": [{"name": "probabilities", "data_type": "TYPE_FP32", "dims": [3]}]
+            }),
+            "model_repository": os.path.join(repository, "iris_classifier"),
+            "model_version": "1",
+            "model_name": "iris_classifier",
+            "model_instance_kind": "CPU",
+            "model_instance_name": "iris_classifier_0"
+        }
+        instances = []
+        for _ in range(args.instances):
+            instance = backend.TritonPythonModel()
+            instance.initialize(model_args)
+            instances.append(instance)
+        shared = all(isinstance(instance.forest.arrays["threshold"], np.memmap)
+                     for instance in instances)
+        print(f"🧩 {args.instances} instance(s) initialisée(s), tableaux mappés en mémoire: {shared}")
+
+        batches = [np.resize(test_rows, (args.rows, test_rows.shape[1])) + i * 0.01
+                   for i in range(args.requests)]
+        requests = [StubInferenceRequest([StubTensor("x", batch.astype(np.float32))])
+                    for batch in batches]
+        responses = instances[0].execute(requests)
+
+        outputs = [response.output_tensors["probabilities"].as_numpy() for response in responses]
+        if len(outputs) != len(requests) or \
+                any(output.shape != (args.rows, 3) for output in outputs):
+            print("❌ Nombre ou forme des réponses incorrects")
+            sys.exit(1)
+
+        expected = model.predict_proba(scaler.transform(np.concatenate(batches))).astype(np.float32)
+        parity = compact_forest.check_parity(np.concatenate(outputs), expected, args.precision)
+        print(f"🔍 Écart max avec sklearn: {parity['max_abs_diff']:.2e}, "
+              f"accord des classes {parity['class_agreement'] * 100:.1f}%")
+        if not parity["ok"]:
+            print("❌ Sorties non conformes à sklearn")
+            sys.exit(1)
+
+        timings = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            instances[0].execute(requests)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        rows = args.requests * args.rows
+        print(f"⏱️  execute() sur {args.requests}×{args.rows} lignes: "
+              f"p50 {timings[len(timings) // 2] * 1000:.3f} ms, "
+              f"{rows * len(timings) / sum(timings):.0f} éch/s")
+
+        for instance in instances:
+            instance.finalize()
+
+    print("✅ Modèle backend python fonctionnel")
+
+if __name__ == "__main__":
+    main()
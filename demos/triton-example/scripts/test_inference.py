@@ -8,8 +8,22 @@ import requests
 import json
 import numpy as np
 import argparse
+import asyncio
+import functools
+import math
+import os
 import sys
-from typing import Dict, List, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from requests.adapters import HTTPAdapter
+
+# Dépendance optionnelle: httpx (pip install "httpx[http2]") pour HTTP/2
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
 # Configuration par défaut
 DEFAULT_MODEL_NAME = "iris_classifier"
@@ -25,151 +39,889 @@ SAMPLE_DATA = {
 # Mapping des classes
 CLASS_NAMES = ["setosa", "versicolor", "virginica"]
 
-def prepare_triton_request(input_data: List[List[float]], 
-                          model_name: str = DEFAULT_MODEL_NAME) -> Dict[str, Any]:
+# Durée de validité par défaut du cache de métadonnées (secondes)
+DEFAULT_METADATA_TTL = 300
+
+# Durée de vie par défaut des entrées du cache de prédictions (secondes): borne
+# la durée pendant laquelle un redéploiement peut passer inaperçu, un cache
+# servi à 100% ne contactant jamais le serveur
+DEFAULT_PREDICTION_CACHE_TTL = 60
+
+# Au-delà de ce nombre de lignes, seul le résumé est affiché
+SUMMARY_ROW_THRESHOLD = 100
+
+# Taille par défaut du pool de connexions HTTP
+DEFAULT_POOL_SIZE = 10
+
+# Retard au-delà duquel un créneau du débit cible est compté en retard (secondes)
+LATE_SLOT_TOLERANCE = 0.001
+
+# Erreurs de transport HTTP (requests, et httpx si installé)
+HTTP_ERRORS = (requests.exceptions.RequestException,) + ((httpx.HTTPError,) if httpx else ())
+
+# Types Triton -> dtypes NumPy little-endian (extension binary data)
+TRITON_DTYPES = {
+    "BOOL": "?",
+    "UINT8": "u1",
+    "INT8": "i1",
+    "INT16": "<i2",
+    "INT32": "<i4",
+    "INT64": "<i8",
+    "FP16": "<f2",
+    "FP32": "<f4",
+    "FP64": "<f8"
+}
+
+# Clé interne portant les buffers binaires (retirée avant sérialisation JSON)
+BINARY_INPUTS_KEY = "_binary_inputs"
+
+def prepare_triton_request(input_data: Union[List[List[float]], np.ndarray], 
+                          model_name: str = DEFAULT_MODEL_NAME,
+                          binary_data: bool = False,
+                          signature: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Prépare la requête au format Triton Inference Server v2 protocol
+    Avec binary_data=True, les entrées sont envoyées en little-endian brut
+    (extension binary data) et les sorties sont demandées au même format
+    signature (métadonnées /v2/models/...) fournit les noms et types réels
+    des entrées/sorties du modèle
     """
+    input_name, datatype = "input_features", "FP32"
+    output_names = ["predictions", "probabilities"]
+    if signature:
+        input_name = signature["inputs"][0]["name"]
+        datatype = signature["inputs"][0]["datatype"]
+        output_names = [output["name"] for output in signature["outputs"]]
+    
+    if binary_data:
+        # Aucune copie si input_data est déjà un tableau contigu du bon type
+        tensor = np.ascontiguousarray(input_data, dtype=TRITON_DTYPES[datatype])
+        return {
+            "inputs": [
+                {
+                    "name": input_name,
+                    "shape": list(tensor.shape),
+                    "datatype": datatype,
+                    "parameters": {"binary_data_size": tensor.nbytes}
+                }
+            ],
+            "outputs": [
+                {
+                    "name": output_name,
+                    "parameters": {"binary_data": True}
+                }
+                for output_name in output_names
+            ],
+            BINARY_INPUTS_KEY: [tensor]
+        }
+    
+    if isinstance(input_data, np.ndarray):
+        flat_data = input_data.ravel().tolist()
+    else:
+        flat_data = [item for sublist in input_data for item in sublist]
+    
     return {
         "inputs": [
             {
-                "name": "input_features",
-                "shape": [len(input_data), 4],
-                "datatype": "FP32",
-                "data": [item for sublist in input_data for item in sublist]
+                "name": input_name,
+                "shape": [len(input_data), len(flat_data) // max(len(input_data), 1)],
+                "datatype": datatype,
+                "data": flat_data
             }
         ],
         "outputs": [
             {
-                "name": "predictions"
-            },
-            {
-                "name": "probabilities"
+                "name": output_name
             }
+            for output_name in output_names
         ]
     }
 
+class TritonRequestBody:
+    """
+    Corps d'une requête binary data: en-tête JSON puis buffers des tenseurs,
+    émis morceau par morceau (memoryview sur les tableaux, sans concaténation)
+    La longueur est connue (Content-Length, pas d'encodage chunked) et le
+    corps est ré-itérable, donc réutilisable par les retries et le hedging
+    """
+    
+    def __init__(self, header: bytes, buffers: List[Any]):
+        self.header = header
+        self.buffers = [memoryview(buffer).cast("B") for buffer in buffers]
+    
+    def __len__(self) -> int:
+        return len(self.header) + sum(buffer.nbytes for buffer in self.buffers)
+    
+    def __iter__(self):
+        yield self.header
+        yield from self.buffers
+
+def encode_triton_request(data: Dict[str, Any]) -> Tuple[Union[bytes, TritonRequestBody],
+                                                          Dict[str, str]]:
+    """
+    Sérialise une requête Triton: JSON seul, ou en-tête JSON suivi des buffers
+    binaires avec l'en-tête Inference-Header-Content-Length
+    """
+    buffers = data.get(BINARY_INPUTS_KEY)
+    header = json.dumps({key: value for key, value in data.items()
+                         if key != BINARY_INPUTS_KEY}).encode("utf-8")
+    
+    if not buffers:
+        return header, {"Content-Type": "application/json"}
+    
+    body = TritonRequestBody(header, buffers)
+    return body, {
+        "Content-Type": "application/octet-stream",
+        "Content-Length": str(len(body)),
+        "Inference-Header-Content-Length": str(len(header))
+    }
+
+def decode_triton_response(response: requests.Response) -> Dict[str, Any]:
+    """
+    Extrait l'en-tête JSON d'une réponse Triton (model_version, outputs...)
+    Les sorties binaires sont décodées avec np.frombuffer, sans copie du corps
+    """
+    header_length = response.headers.get("Inference-Header-Content-Length")
+    if header_length is None:
+        return response.json()
+    
+    content = response.content
+    header_length = int(header_length)
+    header = json.loads(content[:header_length])
+    outputs = header.get("outputs", [])
+    
+    offset = header_length
+    for output in outputs:
+        size = output.get("parameters", {}).get("binary_data_size")
+        if size is None:
+            continue
+        dtype = np.dtype(TRITON_DTYPES[output["datatype"]])
+        output["data"] = np.frombuffer(content, dtype=dtype,
+                                       count=size // dtype.itemsize, offset=offset)
+        offset += size
+    
+    return header
+
+class TritonHttpClient:
+    """
+    Client HTTP partagé par les appels santé, métadonnées et inférence
+    Possède une session avec pool de connexions keep-alive (requests),
+    ou un client HTTP/2 (httpx) lorsque http2=True
+    httpx ne négocie HTTP/2 que via TLS (ALPN): sur http://, prior_knowledge
+    force HTTP/2 en clair (h2c), sinon la connexion reste en HTTP/1.1
+    """
+    
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, keep_alive: bool = True,
+                 http2: bool = False, prior_knowledge: bool = False):
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.http2 = http2 or prior_knowledge
+        http2 = self.http2
+        
+        if http2:
+            if httpx is None:
+                raise RuntimeError("HTTP/2 nécessite httpx: pip install \"httpx[http2]\"")
+            limits = httpx.Limits(max_connections=pool_size,
+                                  max_keepalive_connections=pool_size if keep_alive else 0)
+            self.session = httpx.Client(http1=not prior_knowledge, http2=True, limits=limits)
+        else:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+            if not keep_alive:
+                self.session.headers["Connection"] = "close"
+    
+    def __enter__(self) -> "TritonHttpClient":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        self.session.close()
+    
+    def get(self, url: str, timeout: float = 10):
+        return self.session.get(url, timeout=timeout)
+    
+    def post(self, url: str, body: Union[bytes, "TritonRequestBody"], headers: Dict[str, str],
+             timeout: float = 30):
+        if self.http2:
+            return self.session.post(url, content=body, headers=headers, timeout=timeout)
+        return self.session.post(url, data=body, headers=headers, timeout=timeout)
+
+_default_client: Optional[TritonHttpClient] = None
+
+def get_default_client() -> TritonHttpClient:
+    """
+    Client partagé utilisé quand aucun client n'est fourni explicitement
+    """
+    global _default_client
+    if _default_client is None:
+        _default_client = TritonHttpClient()
+    return _default_client
+
 def send_inference_request(url: str, data: Dict[str, Any], 
-                          timeout: int = 30) -> requests.Response:
+                          timeout: int = 30,
+                          exit_on_error: bool = True,
+                          client: Optional[TritonHttpClient] = None) -> requests.Response:
     """
     Envoie une requête d'inférence au serveur Triton
+    Avec exit_on_error=False, l'exception est propagée au lieu de quitter
     """
-    headers = {
-        "Content-Type": "application/json",
-    }
+    body, headers = encode_triton_request(data)
+    client = client or get_default_client()
     
     try:
-        response = requests.post(url, 
-                               headers=headers, 
-                               data=json.dumps(data), 
-                               timeout=timeout)
+        response = client.post(url, body, headers, timeout=timeout)
         response.raise_for_status()
         return response
-    except requests.exceptions.RequestException as e:
+    except HTTP_ERRORS as e:
+        if not exit_on_error:
+            raise
         print(f"❌ Erreur lors de la requête: {e}")
         sys.exit(1)
 
-def parse_triton_response(response: requests.Response) -> Dict[str, Any]:
+def parse_triton_response(response: requests.Response,
+                          exit_on_error: bool = True) -> Dict[str, Any]:
     """
     Parse la réponse du serveur Triton
+    Avec exit_on_error=False, l'exception est propagée au lieu de quitter
     """
     try:
-        result = response.json()
-        
         # Extraire les prédictions
         predictions_output = None
         probabilities_output = None
         
-        for output in result.get("outputs", []):
+        header = decode_triton_response(response)
+        for output in header.get("outputs", []):
             if output["name"] == "predictions":
                 predictions_output = output
             elif output["name"] == "probabilities":
                 probabilities_output = output
         
-        if not predictions_output:
-            raise ValueError("Sortie 'predictions' non trouvée dans la réponse")
+        # Un modèle n'exposant que les probabilités (export SavedModel) reste exploitable:
+        # les classes sont alors déduites par argmax dans decode_predictions
+        if not predictions_output and not probabilities_output:
+            raise ValueError("Sorties 'predictions' et 'probabilities' non trouvées dans la réponse")
         
-        predictions = predictions_output["data"]
+        predictions = predictions_output["data"] if predictions_output else None
         probabilities = probabilities_output["data"] if probabilities_output else None
         
         return {
             "predictions": predictions,
             "probabilities": probabilities,
-            "shape": predictions_output["shape"]
+            "shape": (predictions_output or probabilities_output)["shape"],
+            "probabilities_shape": probabilities_output["shape"] if probabilities_output else None,
+            "model_version": header.get("model_version")
         }
     except (json.JSONDecodeError, KeyError, ValueError) as e:
+        if not exit_on_error:
+            raise
         print(f"❌ Erreur lors du parsing de la réponse: {e}")
         print(f"Réponse brute: {response.text}")
         sys.exit(1)
 
+def class_names_for(n_classes: int) -> List[str]:
+    """
+    Noms de classes: ceux d'Iris pour 3 classes, génériques sinon
+    """
+    if n_classes == len(CLASS_NAMES):
+        return list(CLASS_NAMES)
+    return [f"class_{index}" for index in range(n_classes)]
+
+def decode_predictions(parsed_response: Dict[str, Any],
+                       class_names: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Décode une réponse parsée en tableaux NumPy, en une seule passe vectorisée:
+    probabilités (n, k) selon la shape Triton, indices de classe (argmax si la
+    sortie 'predictions' est absente), labels et confiance par ligne
+    """
+    predictions = parsed_response.get("predictions")
+    probabilities = parsed_response.get("probabilities")
+    
+    if probabilities is not None:
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        shape = parsed_response.get("probabilities_shape")
+        if shape:
+            probabilities = probabilities.reshape(shape)
+        elif probabilities.ndim == 1 and predictions is not None:
+            probabilities = probabilities.reshape(len(predictions), -1)
+        elif probabilities.ndim == 1:
+            # Ni shape ni prédictions: une colonne par classe Iris
+            probabilities = probabilities.reshape(-1, len(CLASS_NAMES))
+    
+    if predictions is not None:
+        class_indices = np.asarray(predictions).astype(np.int64, copy=False).reshape(-1)
+    else:
+        class_indices = probabilities.argmax(axis=1)
+    
+    if probabilities is not None:
+        n_classes = probabilities.shape[1]
+        confidence = probabilities[np.arange(len(class_indices)), class_indices]
+    else:
+        n_classes = int(class_indices.max()) + 1 if len(class_indices) else 0
+        confidence = None
+    
+    names = np.asarray(class_names or class_names_for(n_classes))
+    return {
+        "class_indices": class_indices,
+        "labels": names[class_indices],
+        "probabilities": probabilities,
+        "confidence": confidence,
+        "class_names": names
+    }
+
 def format_results(parsed_response: Dict[str, Any], 
                   input_samples: List[str]) -> None:
     """
     Formate et affiche les résultats
     """
-    predictions = parsed_response["predictions"]
-    probabilities = parsed_response["probabilities"]
+    decoded = decode_predictions(parsed_response)
+    class_indices = decoded["class_indices"]
+    labels = decoded["labels"]
+    probabilities = decoded["probabilities"]
+    class_names = decoded["class_names"]
     
     print("\n🔍 RÉSULTATS D'INFÉRENCE")
     print("=" * 50)
     
     for i, sample_name in enumerate(input_samples):
-        pred_class_idx = int(predictions[i])
-        pred_class_name = CLASS_NAMES[pred_class_idx]
-        
         print(f"\n📊 Échantillon: {sample_name}")
-        print(f"   Prédiction: {pred_class_name} (classe {pred_class_idx})")
+        print(f"   Prédiction: {labels[i]} (classe {class_indices[i]})")
         
-        if probabilities:
+        if probabilities is not None:
             # Afficher les probabilités pour chaque classe
             print("   Probabilités:")
-            start_idx = i * 3
-            for j, class_name in enumerate(CLASS_NAMES):
-                prob = probabilities[start_idx + j]
+            for class_name, prob in zip(class_names, probabilities[i]):
                 print(f"     - {class_name}: {prob:.4f} ({prob*100:.2f}%)")
 
-def test_health_check(base_url: str) -> bool:
+def format_summary(parsed_response: Dict[str, Any]) -> None:
+    """
+    Résumé compact pour les gros batches: histogramme des classes et
+    distribution de la confiance, sans afficher chaque ligne
+    """
+    decoded = decode_predictions(parsed_response)
+    class_indices = decoded["class_indices"]
+    class_names = decoded["class_names"]
+    confidence = decoded["confidence"]
+    total = len(class_indices)
+    
+    print("\n🔍 RÉSUMÉ D'INFÉRENCE")
+    print("=" * 50)
+    print(f"Lignes: {total}")
+    
+    print("Répartition des classes:")
+    counts = np.bincount(class_indices, minlength=len(class_names))
+    for class_name, count in zip(class_names, counts):
+        print(f"  - {class_name}: {count} ({count / total * 100 if total else 0:.2f}%)")
+    
+    if confidence is not None and total:
+        p5, p50, p95 = np.percentile(confidence, [5, 50, 95])
+        print(f"Confiance: min {confidence.min():.4f}, p5 {p5:.4f}, "
+              f"p50 {p50:.4f}, p95 {p95:.4f}")
+        bins = np.array([0.0, 0.5, 0.7, 0.9, 0.99, 1.0])
+        histogram, _ = np.histogram(confidence, bins=bins)
+        for low, high, count in zip(bins[:-1], bins[1:], histogram):
+            print(f"  - [{low:.2f}, {high:.2f}]: {count}")
+
+def show_results(args: argparse.Namespace, parsed_response: Dict[str, Any],
+                 sample_names: List[str]) -> None:
+    """
+    Détail par ligne, ou résumé avec --summary / au-delà de SUMMARY_ROW_THRESHOLD lignes
+    """
+    if args.summary or len(sample_names) > SUMMARY_ROW_THRESHOLD:
+        format_summary(parsed_response)
+    else:
+        format_results(parsed_response, sample_names)
+
+def test_health_check(base_url: str, client: Optional[TritonHttpClient] = None) -> bool:
     """
     Teste si le serveur Triton est accessible
     """
     health_url = f"{base_url}/v2/health/ready"
+    client = client or get_default_client()
     
     try:
-        response = requests.get(health_url, timeout=10)
+        response = client.get(health_url, timeout=10)
         if response.status_code == 200:
             print("✅ Serveur Triton accessible")
             return True
         else:
             print(f"⚠️  Serveur Triton non prêt (status: {response.status_code})")
             return False
-    except requests.exceptions.RequestException as e:
+    except HTTP_ERRORS as e:
         print(f"❌ Impossible de contacter le serveur: {e}")
         return False
 
-def test_model_metadata(base_url: str, model_name: str, model_version: str) -> bool:
+def fetch_model_metadata(base_url: str, model_name: str, model_version: str,
+                         client: Optional[TritonHttpClient] = None) -> Dict[str, Any]:
     """
-    Récupère les métadonnées du modèle
+    GET /v2/models/{m}/versions/{v}; lève une erreur HTTP si le modèle est absent
     """
     metadata_url = f"{base_url}/v2/models/{model_name}/versions/{model_version}"
-    
+    client = client or get_default_client()
+    response = client.get(metadata_url, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+def test_model_metadata(base_url: str, model_name: str, model_version: str,
+                        client: Optional[TritonHttpClient] = None) -> Optional[Dict[str, Any]]:
+    """
+    Récupère les métadonnées du modèle (None si indisponible)
+    """
     try:
-        response = requests.get(metadata_url, timeout=10)
-        if response.status_code == 200:
-            metadata = response.json()
-            print(f"✅ Modèle {model_name} v{model_version} disponible")
-            print(f"   Platform: {metadata.get('platform', 'N/A')}")
-            print(f"   Inputs: {len(metadata.get('inputs', []))}")
-            print(f"   Outputs: {len(metadata.get('outputs', []))}")
+        metadata = fetch_model_metadata(base_url, model_name, model_version, client)
+        print(f"✅ Modèle {model_name} v{model_version} disponible")
+        print(f"   Platform: {metadata.get('platform', 'N/A')}")
+        print(f"   Inputs: {len(metadata.get('inputs', []))}")
+        print(f"   Outputs: {len(metadata.get('outputs', []))}")
+        return metadata
+    except HTTP_ERRORS as e:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+        if status is not None:
+            print(f"❌ Modèle non trouvé (status: {status})")
+        else:
+            print(f"❌ Erreur métadonnées: {e}")
+        return None
+
+class ModelMetadataCache:
+    """
+    Cache TTL des métadonnées (signature) du modèle, clé (URL, modèle, version)
+    En mémoire, et optionnellement persisté dans un fichier JSON partagé
+    entre les exécutions: un run court évite alors santé + métadonnées
+    """
+    
+    def __init__(self, ttl: float = DEFAULT_METADATA_TTL, cache_file: Optional[str] = None):
+        self.ttl = ttl
+        self.cache_file = cache_file
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        if cache_file and os.path.exists(cache_file):
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self._entries = {}
+    
+    @staticmethod
+    def _key(base_url: str, model_name: str, model_version: str) -> str:
+        return f"{base_url.rstrip('/')}|{model_name}|{model_version}"
+    
+    def get(self, base_url: str, model_name: str,
+            model_version: str) -> Optional[Dict[str, Any]]:
+        """
+        Métadonnées en cache si elles n'ont pas expiré, sinon None
+        """
+        if self.ttl <= 0:
+            return None
+        entry = self._entries.get(self._key(base_url, model_name, model_version))
+        if entry is None or time.time() - entry["fetched_at"] > self.ttl:
+            return None
+        return entry["metadata"]
+    
+    def age(self, base_url: str, model_name: str, model_version: str) -> float:
+        entry = self._entries.get(self._key(base_url, model_name, model_version))
+        return time.time() - entry["fetched_at"] if entry else float("inf")
+    
+    def put(self, base_url: str, model_name: str, model_version: str,
+            metadata: Dict[str, Any]) -> None:
+        self._entries[self._key(base_url, model_name, model_version)] = {
+            "fetched_at": time.time(),
+            "metadata": metadata
+        }
+        self._save()
+    
+    def invalidate(self, base_url: str, model_name: str, model_version: str) -> None:
+        if self._entries.pop(self._key(base_url, model_name, model_version), None) is not None:
+            self._save()
+    
+    def _save(self) -> None:
+        if not self.cache_file:
+            return
+        directory = os.path.dirname(os.path.abspath(self.cache_file))
+        os.makedirs(directory, exist_ok=True)
+        # Écriture atomique: plusieurs exécutions peuvent partager le fichier
+        temp_path = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(temp_path, self.cache_file)
+
+def is_schema_mismatch(error: Exception) -> bool:
+    """
+    Une erreur 4xx (400/404/422) sur /infer signale une signature périmée
+    """
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status in (400, 404, 422)
+
+class SignatureRefresher:
+    """
+    Requête d'inférence construite depuis la signature du modèle et
+    reconstruite quand le serveur la refuse (4xx: modèle redéployé)
+    Partagée par les workers du mode charge: un seul rafraîchissement par
+    changement de signature, les autres workers réutilisent le résultat
+    """
+    
+    def __init__(self, args: argparse.Namespace, client: TritonHttpClient,
+                 cache: ModelMetadataCache, metadata: Dict[str, Any],
+                 input_data: List[List[float]]):
+        self.args = args
+        self.client = client
+        self.cache = cache
+        self.input_data = input_data
+        self.metadata = metadata
+        self.request = self._prepare(metadata)
+        self.generation = 0
+        self._lock = threading.Lock()
+    
+    def _prepare(self, metadata: Dict[str, Any],
+                 input_data: Optional[Any] = None) -> Dict[str, Any]:
+        return prepare_triton_request(self.input_data if input_data is None else input_data,
+                                      self.args.model_name,
+                                      binary_data=self.args.binary_data,
+                                      signature=metadata)
+    
+    def refresh(self, generation: int, error: Exception) -> bool:
+        """
+        Invalide et recharge les métadonnées; False si le modèle est introuvable
+        """
+        with self._lock:
+            if generation != self.generation:
+                return True
+            print(f"⚠️  Requête refusée ({error}), rafraîchissement des métadonnées...")
+            args = self.args
+            self.cache.invalidate(args.url, args.model_name, args.model_version)
+            metadata = test_model_metadata(args.url, args.model_name, args.model_version,
+                                           self.client)
+            if not metadata:
+                return False
+            self.cache.put(args.url, args.model_name, args.model_version, metadata)
+            self.metadata = metadata
+            self.request = self._prepare(metadata)
+            self.generation += 1
             return True
+    
+    def call(self, send: Callable[[Dict[str, Any]], Any]) -> Any:
+        """
+        Envoie la requête courante; sur signature périmée, rafraîchit puis
+        réessaie une fois
+        """
+        generation, request = self.generation, self.request
+        try:
+            return send(request)
+        except HTTP_ERRORS as e:
+            if not is_schema_mismatch(e):
+                raise
+            if not self.refresh(generation, e):
+                raise
+            return send(self.request)
+    
+    def send_rows(self, rows: Any, send: Callable[[Dict[str, Any]], Any]) -> Any:
+        """
+        Comme call, pour d'autres lignes que input_data (ex: lignes absentes
+        du cache de prédictions): requête construite avec la signature courante
+        """
+        generation = self.generation
+        try:
+            return send(self._prepare(self.metadata, rows))
+        except HTTP_ERRORS as e:
+            if not is_schema_mismatch(e):
+                raise
+            if not self.refresh(generation, e):
+                raise
+            return send(self._prepare(self.metadata, rows))
+
+def parse_duration(value: str) -> float:
+    """
+    Convertit une durée ("500ms", "60s", "2m" ou un nombre de secondes) en secondes
+    """
+    value = value.strip().lower()
+    for suffix, factor in (("ms", 0.001), ("s", 1.0), ("m", 60.0), ("h", 3600.0)):
+        if value.endswith(suffix):
+            return float(value[:-len(suffix)]) * factor
+    return float(value)
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Percentile (interpolation linéaire) d'une liste déjà triée
+    """
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+def _timed_call(infer_fn: Callable[[], Any], scheduled: Optional[float] = None) -> float:
+    """
+    Exécute une inférence complète (envoi + parsing) et retourne sa latence en secondes
+    Avec un créneau planifié (débit cible), la latence part du créneau et non
+    de l'envoi effectif: l'attente due au retard du serveur est comptée
+    """
+    start = time.perf_counter() if scheduled is None else scheduled
+    infer_fn()
+    return time.perf_counter() - start
+
+def _http_inference(url: str, data: Dict[str, Any], timeout: int,
+                    client: Optional[TritonHttpClient] = None) -> Dict[str, Any]:
+    """
+    Inférence HTTP sans sortie du processus en cas d'erreur (mode charge)
+    """
+    response = send_inference_request(url, data, timeout, exit_on_error=False, client=client)
+    return parse_triton_response(response, exit_on_error=False)
+
+async def _load_worker(infer_fn: Callable[[], Any], deadline: float, interval: float,
+                       schedule: Dict[str, float], executor: ThreadPoolExecutor,
+                       stats: Dict[str, Any]) -> None:
+    """
+    Worker asyncio: envoie des requêtes en boucle jusqu'à l'échéance
+    Avec un débit cible, chaque worker réserve le prochain créneau d'envoi partagé;
+    un créneau envoyé plus de LATE_SLOT_TOLERANCE après son heure est compté en
+    retard, l'échéance n'est jamais repoussée
+    """
+    loop = asyncio.get_running_loop()
+    slot = None
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            return
+        if interval > 0:
+            slot = schedule["next"]
+            schedule["next"] += interval
+            if slot >= deadline:
+                return
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            elif now - slot > LATE_SLOT_TOLERANCE:
+                stats["late_slots"] += 1
+
+        try:
+            latency = await loop.run_in_executor(executor, _timed_call, infer_fn, slot)
+            stats["latencies"].append(latency)
+        except Exception as e:
+            # Toute erreur (HTTP, gRPC, parsing) est comptabilisée sans arrêter la charge
+            stats["errors"] += 1
+            stats["last_error"] = str(e)
+
+async def run_load_test(url: str, data: Dict[str, Any], concurrency: int,
+                        duration: float, target_qps: float = 0.0,
+                        timeout: int = 30,
+                        infer_fn: Optional[Callable[[], Any]] = None,
+                        client: Optional[TritonHttpClient] = None) -> Dict[str, Any]:
+    """
+    Génère de la charge sur l'endpoint d'inférence avec `concurrency` workers asyncio
+    Les appels bloquants s'exécutent dans un pool de threads dédié
+    infer_fn remplace l'inférence HTTP par défaut (ex: client gRPC)
+    """
+    if infer_fn is None:
+        infer_fn = functools.partial(_http_inference, url, data, timeout, client=client)
+    interval = 1.0 / target_qps if target_qps > 0 else 0.0
+    stats = {"latencies": [], "errors": 0, "last_error": None, "late_slots": 0}
+
+    start = time.perf_counter()
+    deadline = start + duration
+    schedule = {"next": start}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        await asyncio.gather(*[
+            _load_worker(infer_fn, deadline, interval, schedule, executor, stats)
+            for _ in range(concurrency)
+        ])
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(stats["latencies"])
+    total = len(latencies) + stats["errors"]
+    # Créneaux planifiés avant l'échéance mais jamais envoyés (serveur en retard)
+    scheduled = int(math.ceil(duration / interval)) if interval > 0 else 0
+    return {
+        "requests": total,
+        "successes": len(latencies),
+        "errors": stats["errors"],
+        "error_rate": stats["errors"] / total if total else 0.0,
+        "elapsed": elapsed,
+        "qps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "p999": percentile(latencies, 99.9),
+        "last_error": stats["last_error"],
+        "target_qps": target_qps,
+        "late_slots": stats["late_slots"],
+        "skipped_slots": max(scheduled - total, 0)
+    }
+
+def format_load_report(report: Dict[str, Any]) -> None:
+    """
+    Affiche le rapport du test de charge
+    """
+    print("\n📈 RÉSULTATS DU TEST DE CHARGE")
+    print("=" * 50)
+    print(f"Requêtes:      {report['requests']} ({report['successes']} OK, {report['errors']} erreurs)")
+    print(f"Durée:         {report['elapsed']:.2f}s")
+    print(f"Débit atteint: {report['qps']:.1f} req/s")
+    print(f"Taux d'erreur: {report['error_rate']*100:.2f}%")
+    if report.get("target_qps"):
+        print(f"Créneaux:      {report['late_slots']} en retard, "
+              f"{report['skipped_slots']} non envoyés (cible {report['target_qps']:.1f} req/s)")
+    print("Latence:" + (" (depuis le créneau planifié)" if report.get("target_qps") else ""))
+    for key, label in (("p50", "p50"), ("p90", "p90"), ("p99", "p99"), ("p999", "p99.9")):
+        print(f"  - {label}: {report[key]*1000:.2f} ms")
+    if report["last_error"]:
+        print(f"Dernière erreur: {report['last_error']}")
+
+def report_latency_breakdown(recorder: Any, metrics_out: Optional[str]) -> None:
+    """
+    Affiche la décomposition par phase et l'exporte (Prometheus ou JSON) si demandé
+    """
+    recorder.print_summary()
+    if metrics_out:
+        recorder.export(metrics_out)
+        print(f"📁 Métriques exportées: {metrics_out}")
+
+def run_http_test(args: argparse.Namespace, client: TritonHttpClient,
+                  input_data: List[List[float]], sample_names: List[str]) -> None:
+    """
+    Déroulé HTTP: santé, métadonnées puis inférence unitaire ou test de charge
+    """
+    cache = ModelMetadataCache(ttl=args.metadata_ttl, cache_file=args.metadata_cache_file)
+    metadata = cache.get(args.url, args.model_name, args.model_version)
+    
+    if metadata is not None:
+        age = cache.age(args.url, args.model_name, args.model_version)
+        print(f"✅ Métadonnées en cache ({age:.0f}s), santé et métadonnées non revérifiées")
+    else:
+        # Test de santé du serveur
+        if not test_health_check(args.url, client):
+            sys.exit(1)
+        
+        # Test des métadonnées du modèle
+        metadata = test_model_metadata(args.url, args.model_name, args.model_version, client)
+        if not metadata:
+            sys.exit(1)
+        cache.put(args.url, args.model_name, args.model_version, metadata)
+    
+    print(f"\n📋 Test avec {len(input_data)} échantillon(s)")
+    
+    # Préparer la requête Triton à partir de la signature réelle du modèle,
+    # reconstruite si le modèle est redéployé avec une autre signature
+    refresher = SignatureRefresher(args, client, cache, metadata, input_data)
+    triton_request = refresher.request
+    
+    # URL d'inférence
+    inference_url = f"{args.url}/v2/models/{args.model_name}/versions/{args.model_version}/infer"
+    
+    # Décomposition de la latence par phase (sérialisation, connexion, TTFB, ...)
+    recorder = None
+    if args.latency_breakdown or args.metrics_out:
+        from latency_metrics import LatencyRecorder, install_timed_adapter
+        recorder = LatencyRecorder()
+        try:
+            install_timed_adapter(client)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    
+    # Retries avec backoff et hedging (requêtes d'inférence idempotentes)
+    resilient = None
+    if args.retries or args.hedge:
+        from triton_resilience import ResilientInferenceClient, RetryBudget
+        resilient = ResilientInferenceClient(client, inference_url,
+                                             max_attempts=args.retries + 1,
+                                             hedge=args.hedge,
+                                             budget=RetryBudget(ratio=args.retry_budget_ratio),
+                                             max_workers=2 * max(args.concurrency or 1, 1))
+    
+    # Cache de prédictions côté client (mode charge, cache en mémoire du processus):
+    # les lignes déjà vues ne touchent pas le réseau
+    cached = None
+    if args.prediction_cache_mb:
+        from prediction_cache import CachedInferenceClient, PredictionCache
+        cached = CachedInferenceClient(
+            client, args.url,
+            PredictionCache(max_bytes=int(args.prediction_cache_mb * 1024 * 1024),
+                            ttl=args.prediction_cache_ttl),
+            args.model_name, args.model_version,
+            binary_data=args.binary_data, signature=metadata,
+            sender=resilient.send if resilient is not None else None,
+            refresher=refresher)
+    
+    # Compteurs de retries/hedging et pool de threads: aussi en mode requête unique
+    try:
+        if args.concurrency:
+            duration = parse_duration(args.duration)
+            print(f"\n🔥 Test de charge: {args.concurrency} workers, {duration:.1f}s, "
+                  f"débit cible: {args.target_qps or 'illimité'}")
+            print(f"URL: {inference_url}")
+            if recorder is not None:
+                send = functools.partial(recorder.timed_inference, client, inference_url)
+            elif resilient is not None:
+                send = resilient.infer
+            else:
+                send = functools.partial(_http_inference, inference_url, timeout=30, client=client)
+            infer_fn = functools.partial(refresher.call, send)
+            if cached is not None:
+                infer_fn = functools.partial(cached.predict, input_data)
+            report = asyncio.run(run_load_test(inference_url, triton_request,
+                                               args.concurrency, duration, args.target_qps,
+                                               infer_fn=infer_fn, client=client))
+            format_load_report(report)
+            if cached is not None:
+                cached.cache.print_metrics()
+            if recorder is not None:
+                report_latency_breakdown(recorder, args.metrics_out)
+            if not report["successes"]:
+                sys.exit(1)
+            return
+    
+        if recorder is not None:
+            print(f"\n🔄 Envoi de la requête d'inférence (instrumentée)...")
+            try:
+                parsed_response = refresher.call(
+                    functools.partial(recorder.timed_inference, client, inference_url))
+            except (HTTP_ERRORS + (json.JSONDecodeError, KeyError, ValueError)) as e:
+                print(f"❌ Erreur lors de la requête: {e}")
+                sys.exit(1)
+            show_results(args, parsed_response, sample_names)
+            report_latency_breakdown(recorder, args.metrics_out)
+            return
+    
+        print(f"\n🔄 Envoi de la requête d'inférence...")
+        print(f"URL: {inference_url}")
+    
+        # Envoyer la requête (signature périmée: rafraîchir puis réessayer une fois)
+        if resilient is not None:
+            send = resilient.send
         else:
-            print(f"❌ Modèle non trouvé (status: {response.status_code})")
-            return False
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Erreur métadonnées: {e}")
-        return False
+            send = functools.partial(send_inference_request, inference_url,
+                                     exit_on_error=False, client=client)
+        try:
+            response = refresher.call(send)
+        except HTTP_ERRORS as e:
+            print(f"❌ Erreur lors de la requête: {e}")
+            sys.exit(1)
+    
+        # Parser et afficher les résultats
+        parsed_response = parse_triton_response(response)
+        show_results(args, parsed_response, sample_names)
+    
+        print(f"\n✅ Test d'inférence terminé avec succès!")
+        print(f"Status: {response.status_code}")
+        if client.http2:
+            print(f"Protocole: {response.http_version}")
+        print(f"Temps de réponse: {response.elapsed.total_seconds():.3f}s")
+    finally:
+        if resilient is not None:
+            resilient.print_counters()
+            resilient.close()
 
 def main():
-    parser = argparse.ArgumentParser(description="Test d'inférence pour le modèle Iris Triton")
+    # Sous-commande de scoring en masse: python test_inference.py score --input ...
+    if len(sys.argv) > 1 and sys.argv[1] == "score":
+        from bulk_score import main as score_main
+        score_main(sys.argv[2:])
+        return
+    
+    parser = argparse.ArgumentParser(description="Test d'inférence pour le modèle Iris Triton",
+                                     epilog="Scoring en masse: %(prog)s score --help")
     parser.add_argument("--url", "-u", 
                        default="http://iris-classifier-triton-rhods-notebooks.apps.your-cluster.com",
                        help="URL de base du service d'inférence")
@@ -186,22 +938,91 @@ def main():
                        help="Échantillons à tester")
     parser.add_argument("--custom-data", 
                        help="Données personnalisées au format JSON: [[5.1,3.5,1.4,0.2]]")
+    parser.add_argument("--concurrency", "-c",
+                       type=int,
+                       help="Mode charge: nombre de workers concurrents")
+    parser.add_argument("--duration",
+                       default="60s",
+                       help="Mode charge: durée du test (ex: 500ms, 60s, 2m)")
+    parser.add_argument("--target-qps",
+                       type=float,
+                       default=0.0,
+                       help="Mode charge: débit cible en requêtes/s (0 = illimité)")
+    parser.add_argument("--binary-data",
+                       action="store_true",
+                       help="Utiliser l'extension binary data (FP32 brut) au lieu du JSON")
+    parser.add_argument("--protocol",
+                       choices=["http", "grpc"],
+                       default="http",
+                       help="Protocole d'inférence (grpc: --url au format host:8001)")
+    parser.add_argument("--stream",
+                       action="store_true",
+                       help="gRPC: envoyer chaque échantillon sur un flux ModelStreamInfer")
+    parser.add_argument("--pool-size",
+                       type=int,
+                       default=DEFAULT_POOL_SIZE,
+                       help="Taille du pool de connexions HTTP (au moins --concurrency)")
+    parser.add_argument("--no-keep-alive",
+                       action="store_true",
+                       help="Désactiver la réutilisation des connexions HTTP")
+    parser.add_argument("--http2",
+                       action="store_true",
+                       help="Utiliser HTTP/2 (nécessite httpx[http2]; négocié via TLS, https://)")
+    parser.add_argument("--http2-prior-knowledge",
+                       action="store_true",
+                       help="Forcer HTTP/2 en clair (h2c) sur http://, sans négociation")
+    parser.add_argument("--summary",
+                       action="store_true",
+                       help="Afficher un résumé (classes, confiance) au lieu de chaque ligne")
+    parser.add_argument("--metadata-ttl",
+                       type=float,
+                       default=DEFAULT_METADATA_TTL,
+                       help="Durée de validité du cache de métadonnées en secondes (0 = désactivé)")
+    parser.add_argument("--metadata-cache-file",
+                       help="Fichier JSON de cache des métadonnées partagé entre exécutions")
+    parser.add_argument("--latency-breakdown",
+                       action="store_true",
+                       help="Mesurer sérialisation, connexion, TTFB, transfert et décodage")
+    parser.add_argument("--metrics-out",
+                       help="Exporter les histogrammes par phase (.json, sinon texte Prometheus)")
+    parser.add_argument("--retries",
+                       type=int,
+                       default=0,
+                       help="Nombre de nouvelles tentatives (backoff avec jitter) sur erreur transitoire")
+    parser.add_argument("--hedge",
+                       action="store_true",
+                       help="Envoyer un doublon quand une requête dépasse le p95 courant")
+    parser.add_argument("--retry-budget-ratio",
+                       type=float,
+                       default=0.1,
+                       help="Requêtes supplémentaires (retries + doublons) autorisées par requête")
+    parser.add_argument("--prediction-cache-mb",
+                       type=float,
+                       default=0,
+                       help="Taille (Mo) du cache de prédictions par ligne, mode charge "
+                            "uniquement (0 = désactivé)")
+    parser.add_argument("--prediction-cache-ttl",
+                       type=float,
+                       default=DEFAULT_PREDICTION_CACHE_TTL,
+                       help="Durée de vie (s) des entrées du cache de prédictions")
     
     args = parser.parse_args()
     
+    if (args.retries or args.hedge) and (args.latency_breakdown or args.metrics_out):
+        parser.error("--retries/--hedge et --latency-breakdown/--metrics-out sont exclusifs")
+    if args.prediction_cache_mb and (args.latency_breakdown or args.metrics_out):
+        parser.error("--prediction-cache-mb et --latency-breakdown/--metrics-out sont exclusifs")
+    if args.prediction_cache_ttl <= 0:
+        parser.error("--prediction-cache-ttl doit être strictement positif")
+    if args.prediction_cache_mb and not args.concurrency:
+        # Cache propre au processus: une requête unique ne peut jamais y trouver de hit
+        parser.error("--prediction-cache-mb nécessite --concurrency (mode charge)")
+    
     print("🚀 DÉMARRAGE DU TEST D'INFÉRENCE TRITON")
     print("=" * 50)
     print(f"URL: {args.url}")
     print(f"Modèle: {args.model_name} v{args.model_version}")
     
-    # Test de santé du serveur
-    if not test_health_check(args.url):
-        sys.exit(1)
-    
-    # Test des métadonnées du modèle
-    if not test_model_metadata(args.url, args.model_name, args.model_version):
-        sys.exit(1)
-    
     # Préparer les données d'entrée
     if args.custom_data:
         try:
@@ -214,27 +1035,28 @@ def main():
         input_data = [SAMPLE_DATA[sample] for sample in args.samples]
         sample_names = args.samples
     
-    print(f"\n📋 Test avec {len(input_data)} échantillon(s)")
+    if args.protocol == "grpc":
+        from triton_grpc import run_grpc_test
+        run_grpc_test(args, input_data, sample_names)
+        return
     
-    # Préparer la requête Triton
-    triton_request = prepare_triton_request(input_data, args.model_name)
+    # Sans TLS, httpx ne négocie pas HTTP/2: les mesures seraient en HTTP/1.1
+    if args.http2 and not args.http2_prior_knowledge and args.url.startswith("http://"):
+        print("⚠️  --http2 sur http://: HTTP/2 n'est négocié que via TLS, la connexion "
+              "restera en HTTP/1.1 (utiliser https:// ou --http2-prior-knowledge)")
     
-    # URL d'inférence
-    inference_url = f"{args.url}/v2/models/{args.model_name}/versions/{args.model_version}/infer"
-    
-    print(f"\n🔄 Envoi de la requête d'inférence...")
-    print(f"URL: {inference_url}")
-    
-    # Envoyer la requête
-    response = send_inference_request(inference_url, triton_request)
-    
-    # Parser et afficher les résultats
-    parsed_response = parse_triton_response(response)
-    format_results(parsed_response, sample_names)
+    # Client HTTP partagé (pool dimensionné pour le mode charge)
+    try:
+        client = TritonHttpClient(pool_size=max(args.pool_size, args.concurrency or 0),
+                                  keep_alive=not args.no_keep_alive,
+                                  http2=args.http2,
+                                  prior_knowledge=args.http2_prior_knowledge)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
     
-    print(f"\n✅ Test d'inférence terminé avec succès!")
-    print(f"Status: {response.status_code}")
-    print(f"Temps de réponse: {response.elapsed.total_seconds():.3f}s")
+    with client:
+        run_http_test(args, client, input_data, sample_names)
 
 if __name__ == "__main__":
     main()
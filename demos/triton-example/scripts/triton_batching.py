@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Micro-batching côté client pour le modèle Iris Triton
+Regroupe les appels unitaires (un échantillon) en requêtes batch Triton
+et renvoie à chaque appelant la tranche de réponse qui le concerne
+"""
+
+import argparse
+import collections
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from test_inference import (
+    DEFAULT_MODEL_NAME,
+    DEFAULT_MODEL_VERSION,
+    SAMPLE_DATA,
+    TritonHttpClient,
+    decode_predictions,
+    fetch_model_metadata,
+    parse_duration,
+    parse_triton_response,
+    percentile,
+    prepare_triton_request,
+    send_inference_request
+)
+
+# Valeurs par défaut alignées sur le config.pbtxt exporté (max_batch_size: 8)
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_DELAY_MS = 5.0
+
+# Intervalle de scrutation d'un créneau d'envoi libre pendant qu'un batch grossit
+SLOT_POLL_INTERVAL = 0.001
+
+class MicroBatcher:
+    """
+    File d'attente de prédictions unitaires envoyées par batch
+    Un batch part dès qu'il atteint max_batch_size échantillons, ou au plus
+    tard max_delay_ms après l'arrivée de son premier échantillon
+    Au plus max_inflight batches sont en vol: tant qu'aucun créneau n'est
+    libre, le batch courant continue de grossir jusqu'à max_batch_size
+    puis la file d'attente absorbe la contre-pression
+    signature (métadonnées du modèle) est lue une fois à la construction
+    si elle n'est pas fournie
+    """
+
+    def __init__(self, url: str, model_name: str = DEFAULT_MODEL_NAME,
+                 model_version: str = DEFAULT_MODEL_VERSION,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_delay_ms: float = DEFAULT_MAX_DELAY_MS,
+                 max_inflight: int = 2, binary_data: bool = False,
+                 client: Optional[TritonHttpClient] = None, timeout: int = 30,
+                 signature: Optional[Dict[str, Any]] = None):
+        self.inference_url = f"{url}/v2/models/{model_name}/versions/{model_version}/infer"
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000.0
+        self.binary_data = binary_data
+        self.timeout = timeout
+        self._owns_client = client is None
+        self.client = client or TritonHttpClient(pool_size=max_inflight)
+        self.signature = signature or fetch_model_metadata(url, model_name, model_version,
+                                                           self.client)
+
+        self._queue: "queue.Queue[Optional[Tuple[List[float], Future]]]" = queue.Queue()
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._senders = ThreadPoolExecutor(max_workers=max_inflight)
+        self._lock = threading.Lock()
+        # Histogramme des tailles de batch (au plus max_batch_size valeurs distinctes)
+        self._stats = {"batches": 0, "samples": 0, "flush_full": 0,
+                       "flush_timeout": 0, "slot_waits": 0, "errors": 0,
+                       "batch_sizes": collections.Counter()}
+        # Sérialise predict() et close(): aucun échantillon après la sentinelle
+        self._submit_lock = threading.Lock()
+        self._closed = False
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+    def __enter__(self) -> "MicroBatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def predict(self, sample: List[float]) -> Future:
+        """
+        Soumet un échantillon; le Future reçoit {"prediction", "probabilities"}
+        """
+        future: Future = Future()
+        with self._submit_lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher fermé")
+            self._queue.put((sample, future))
+        return future
+
+    def close(self) -> None:
+        """
+        Vide la file (les échantillons en attente sont envoyés) puis arrête les threads
+        """
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._dispatcher.join()
+        self._senders.shutdown(wait=True)
+        if self._owns_client:
+            self.client.close()
+
+    def _dispatch_loop(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = time.perf_counter() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 \
+                        else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            # Contre-pression: le batch grossit tant que tous les créneaux sont occupés
+            waited = False
+            while not self._slots.acquire(blocking=False):
+                waited = True
+                if stopping or len(batch) >= self.max_batch_size:
+                    self._slots.acquire()
+                    break
+                try:
+                    item = self._queue.get(timeout=SLOT_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    stopping = True
+                    continue
+                batch.append(item)
+
+            self._record_flush(len(batch), waited)
+            future = self._senders.submit(self._send_batch, batch)
+            future.add_done_callback(lambda _: self._slots.release())
+
+    def _record_flush(self, size: int, waited: bool) -> None:
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["slot_waits"] += int(waited)
+            self._stats["samples"] += size
+            self._stats["batch_sizes"][size] += 1
+            if size >= self.max_batch_size:
+                self._stats["flush_full"] += 1
+            else:
+                self._stats["flush_timeout"] += 1
+
+    def _send_batch(self, batch: List[Tuple[List[float], Future]]) -> None:
+        samples = [sample for sample, _ in batch]
+        futures = [future for _, future in batch]
+        try:
+            request = prepare_triton_request(samples, self.model_name,
+                                             binary_data=self.binary_data,
+                                             signature=self.signature)
+            response = send_inference_request(self.inference_url, request, self.timeout,
+                                              exit_on_error=False, client=self.client)
+            decoded = decode_predictions(parse_triton_response(response, exit_on_error=False))
+            predictions = decoded["class_indices"]
+            probabilities = decoded["probabilities"]
+
+            for index, future in enumerate(futures):
+                future.set_result({
+                    "prediction": int(predictions[index]),
+                    "probabilities": probabilities[index] if probabilities is not None else None
+                })
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            for future in futures:
+                future.set_exception(e)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Statistiques de remplissage des batches
+        """
+        with self._lock:
+            histogram = sorted(self._stats["batch_sizes"].items())
+            batches = self._stats["batches"]
+            # Médiane lue sur l'histogramme cumulé
+            p50_batch_size, seen = 0, 0
+            for size, count in histogram:
+                seen += count
+                if seen * 2 >= batches:
+                    p50_batch_size = size
+                    break
+            return {
+                "batches": batches,
+                "samples": self._stats["samples"],
+                "errors": self._stats["errors"],
+                "flush_full": self._stats["flush_full"],
+                "flush_timeout": self._stats["flush_timeout"],
+                "slot_waits": self._stats["slot_waits"],
+                "mean_batch_size": self._stats["samples"] / batches if batches else 0.0,
+                "fill_ratio": (self._stats["samples"] / (batches * self.max_batch_size)
+                               if batches else 0.0),
+                "p50_batch_size": p50_batch_size,
+                "batch_size_histogram": dict(histogram)
+            }
+
+def _caller_loop(batcher: MicroBatcher, sample: List[float], deadline: float,
+                 latencies: List[float], errors: List[str]) -> None:
+    """
+    Appelant synthétique: une prédiction unitaire à la fois jusqu'à l'échéance
+    """
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            batcher.predict(sample).result()
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(str(e))
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching client pour le modèle Iris Triton")
+    parser.add_argument("--url", "-u", required=True,
+                       help="URL de base du service d'inférence")
+    parser.add_argument("--model-name", "-m", default=DEFAULT_MODEL_NAME,
+                       help="Nom du modèle")
+    parser.add_argument("--model-version", "-v", default=DEFAULT_MODEL_VERSION,
+                       help="Version du modèle")
+    parser.add_argument("--callers", type=int, default=32,
+                       help="Nombre d'appelants unitaires simultanés")
+    parser.add_argument("--duration", default="10s",
+                       help="Durée du test (ex: 500ms, 10s, 1m)")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                       help="Nombre maximal d'échantillons par batch")
+    parser.add_argument("--max-delay-ms", type=float, default=DEFAULT_MAX_DELAY_MS,
+                       help="Fenêtre maximale d'attente avant envoi d'un batch (ms)")
+    parser.add_argument("--max-inflight", type=int, default=2,
+                       help="Nombre de batches envoyés en parallèle")
+    parser.add_argument("--binary-data", action="store_true",
+                       help="Utiliser l'extension binary data")
+
+    args = parser.parse_args()
+
+    duration = parse_duration(args.duration)
+    print(f"🚀 Micro-batching: {args.callers} appelants, batch ≤ {args.max_batch_size}, "
+          f"fenêtre {args.max_delay_ms} ms, {duration:.1f}s")
+
+    latencies: List[float] = []
+    errors: List[str] = []
+    samples = list(SAMPLE_DATA.values())
+
+    with MicroBatcher(args.url, args.model_name, args.model_version,
+                      max_batch_size=args.max_batch_size,
+                      max_delay_ms=args.max_delay_ms,
+                      max_inflight=args.max_inflight,
+                      binary_data=args.binary_data) as batcher:
+        deadline = time.perf_counter() + duration
+        callers = [
+            threading.Thread(target=_caller_loop,
+                             args=(batcher, samples[i % len(samples)], deadline,
+                                   latencies, errors))
+            for i in range(args.callers)
+        ]
+        for caller in callers:
+            caller.start()
+        for caller in callers:
+            caller.join()
+        metrics = batcher.metrics()
+
+    latencies.sort()
+    print("\n📈 RÉSULTATS DU MICRO-BATCHING")
+    print("=" * 50)
+    print(f"Prédictions:      {len(latencies)} OK, {len(errors)} erreurs")
+    print(f"Débit:            {len(latencies) / duration:.1f} prédictions/s")
+    print(f"Batches envoyés:  {metrics['batches']} "
+          f"(pleins: {metrics['flush_full']}, fenêtre expirée: {metrics['flush_timeout']})")
+    print(f"Attente créneau:  {metrics['slot_waits']} batches")
+    print(f"Taille moyenne:   {metrics['mean_batch_size']:.2f}")
+    print(f"Taux de remplissage: {metrics['fill_ratio']*100:.1f}%")
+    print(f"Latence p50: {percentile(latencies, 50)*1000:.2f} ms  "
+          f"p99: {percentile(latencies, 99)*1000:.2f} ms")
+    if errors:
+        print(f"Dernière erreur: {errors[-1]}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
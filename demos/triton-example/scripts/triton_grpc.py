@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Client gRPC (protocole v2 KServe/Triton) pour le modèle Iris Triton
+Utilise le port gRPC du ServingRuntime nvidia-triton-runtime (8001)
+Inclut un serveur gRPC local en processus pour mesurer l'écart protobuf/JSON
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import sys
+import time
+from concurrent import futures
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import grpc
+import numpy as np
+from tritonclient.grpc import service_pb2, service_pb2_grpc
+
+from test_inference import (
+    CLASS_NAMES,
+    DEFAULT_MODEL_NAME,
+    DEFAULT_MODEL_VERSION,
+    SAMPLE_DATA,
+    TRITON_DTYPES,
+    SUMMARY_ROW_THRESHOLD,
+    format_load_report,
+    format_results,
+    format_summary,
+    parse_duration,
+    percentile,
+    prepare_triton_request,
+    run_load_test
+)
+
+DEFAULT_GRPC_PORT = 8001
+
+# Taille maximale des messages (les gros batches dépassent la limite gRPC de 4 Mo)
+MAX_MESSAGE_LENGTH = 256 * 1024 * 1024
+
+CHANNEL_OPTIONS = [
+    ("grpc.max_send_message_length", MAX_MESSAGE_LENGTH),
+    ("grpc.max_receive_message_length", MAX_MESSAGE_LENGTH),
+    ("grpc.keepalive_time_ms", 30000)
+]
+
+def normalize_grpc_target(url: str) -> str:
+    """
+    Convertit une URL (http://host[:port]) en cible gRPC host:port
+    """
+    target = url.split("://", 1)[-1].rstrip("/")
+    if ":" not in target:
+        target = f"{target}:{DEFAULT_GRPC_PORT}"
+    return target
+
+def signature_from_metadata(metadata: service_pb2.ModelMetadataResponse) -> Dict[str, Any]:
+    """
+    Convertit une réponse ModelMetadata au format des métadonnées HTTP
+    (signature attendue par prepare_triton_request et build_model_infer_request)
+    """
+    def tensors(entries) -> List[Dict[str, Any]]:
+        return [{"name": entry.name, "datatype": entry.datatype, "shape": list(entry.shape)}
+                for entry in entries]
+
+    return {
+        "name": metadata.name,
+        "versions": list(metadata.versions),
+        "platform": metadata.platform,
+        "inputs": tensors(metadata.inputs),
+        "outputs": tensors(metadata.outputs)
+    }
+
+def build_model_infer_request(input_data: Union[List[List[float]], np.ndarray],
+                              model_name: str = DEFAULT_MODEL_NAME,
+                              model_version: str = DEFAULT_MODEL_VERSION,
+                              signature: Optional[Dict[str, Any]] = None
+                              ) -> service_pb2.ModelInferRequest:
+    """
+    Prépare une requête ModelInfer, le tenseur étant transmis dans raw_input_contents
+    signature (signature_from_metadata) fournit les noms et types réels
+    des entrées/sorties du modèle
+    """
+    input_name, datatype = "input_features", "FP32"
+    output_names = ["predictions", "probabilities"]
+    if signature:
+        input_name = signature["inputs"][0]["name"]
+        datatype = signature["inputs"][0]["datatype"]
+        output_names = [output["name"] for output in signature["outputs"]]
+
+    tensor = np.ascontiguousarray(input_data, dtype=TRITON_DTYPES[datatype])
+
+    request = service_pb2.ModelInferRequest(model_name=model_name,
+                                            model_version=model_version)
+    input_tensor = request.inputs.add()
+    input_tensor.name = input_name
+    input_tensor.datatype = datatype
+    input_tensor.shape.extend(tensor.shape)
+
+    for output_name in output_names:
+        request.outputs.add().name = output_name
+
+    request.raw_input_contents.append(tensor.tobytes())
+    return request
+
+def parse_model_infer_response(response: service_pb2.ModelInferResponse) -> Dict[str, Any]:
+    """
+    Parse une réponse ModelInfer au même format que parse_triton_response
+    """
+    outputs = {}
+    for index, output in enumerate(response.outputs):
+        outputs[output.name] = (
+            np.frombuffer(response.raw_output_contents[index],
+                          dtype=TRITON_DTYPES[output.datatype]),
+            list(output.shape)
+        )
+
+    if "predictions" not in outputs and "probabilities" not in outputs:
+        raise ValueError("Sorties 'predictions' et 'probabilities' non trouvées dans la réponse")
+
+    predictions, shape = outputs.get("predictions", (None, None))
+    probabilities, probabilities_shape = outputs.get("probabilities", (None, None))
+
+    return {
+        "predictions": predictions,
+        "probabilities": probabilities,
+        "shape": shape or probabilities_shape,
+        "probabilities_shape": probabilities_shape,
+        "model_version": response.model_version or None
+    }
+
+class TritonGrpcClient:
+    """
+    Client gRPC conservant un unique canal ouvert entre les requêtes
+    """
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.target = normalize_grpc_target(url)
+        self.timeout = timeout
+        self.channel = grpc.insecure_channel(self.target, options=CHANNEL_OPTIONS)
+        self.stub = service_pb2_grpc.GRPCInferenceServiceStub(self.channel)
+
+    def __enter__(self) -> "TritonGrpcClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.channel.close()
+
+    def server_ready(self) -> bool:
+        response = self.stub.ServerReady(service_pb2.ServerReadyRequest(),
+                                         timeout=self.timeout)
+        return response.ready
+
+    def model_metadata(self, model_name: str,
+                       model_version: str) -> service_pb2.ModelMetadataResponse:
+        return self.stub.ModelMetadata(
+            service_pb2.ModelMetadataRequest(name=model_name, version=model_version),
+            timeout=self.timeout
+        )
+
+    def infer(self, input_data: Union[List[List[float]], np.ndarray],
+              model_name: str = DEFAULT_MODEL_NAME,
+              model_version: str = DEFAULT_MODEL_VERSION,
+              signature: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        request = build_model_infer_request(input_data, model_name, model_version, signature)
+        return parse_model_infer_response(self.stub.ModelInfer(request, timeout=self.timeout))
+
+    def stream_infer(self, batches: Iterable[Union[List[List[float]], np.ndarray]],
+                     model_name: str = DEFAULT_MODEL_NAME,
+                     model_version: str = DEFAULT_MODEL_VERSION,
+                     signature: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Envoie chaque batch sur un même flux bidirectionnel ModelStreamInfer
+        Les réponses sont produites dans l'ordre de réception
+        """
+        requests_iterator = (
+            build_model_infer_request(batch, model_name, model_version, signature)
+            for batch in batches
+        )
+        for stream_response in self.stub.ModelStreamInfer(requests_iterator):
+            if stream_response.error_message:
+                raise RuntimeError(stream_response.error_message)
+            yield parse_model_infer_response(stream_response.infer_response)
+
+def test_grpc_health_check(client: TritonGrpcClient) -> bool:
+    """
+    Équivalent gRPC de test_health_check (ServerReady)
+    """
+    try:
+        if client.server_ready():
+            print("✅ Serveur Triton accessible (gRPC)")
+            return True
+        print("⚠️  Serveur Triton non prêt (gRPC)")
+        return False
+    except grpc.RpcError as e:
+        print(f"❌ Impossible de contacter le serveur gRPC: {e.code().name} {e.details()}")
+        return False
+
+def test_grpc_model_metadata(client: TritonGrpcClient, model_name: str,
+                             model_version: str) -> Optional[Dict[str, Any]]:
+    """
+    Équivalent gRPC de test_model_metadata (ModelMetadata)
+    Retourne la signature du modèle (None si indisponible)
+    """
+    try:
+        signature = signature_from_metadata(client.model_metadata(model_name, model_version))
+        print(f"✅ Modèle {model_name} v{model_version} disponible (gRPC)")
+        print(f"   Platform: {signature['platform'] or 'N/A'}")
+        print(f"   Inputs: {len(signature['inputs'])}")
+        print(f"   Outputs: {len(signature['outputs'])}")
+        return signature
+    except grpc.RpcError as e:
+        print(f"❌ Erreur métadonnées gRPC: {e.code().name} {e.details()}")
+        return None
+
+def run_grpc_test(args: argparse.Namespace, input_data: List[List[float]],
+                  sample_names: List[str]) -> None:
+    """
+    Déroulé de test_inference.py en gRPC: santé, métadonnées puis inférence,
+    en unaire, en flux (--stream) ou en charge (--concurrency)
+    """
+    with TritonGrpcClient(args.url) as client:
+        print(f"Cible gRPC: {client.target}")
+
+        if not test_grpc_health_check(client):
+            sys.exit(1)
+        signature = test_grpc_model_metadata(client, args.model_name, args.model_version)
+        if signature is None:
+            sys.exit(1)
+
+        print(f"\n📋 Test avec {len(input_data)} échantillon(s)")
+
+        if args.concurrency:
+            duration = parse_duration(args.duration)
+            print(f"\n🔥 Test de charge gRPC: {args.concurrency} workers, {duration:.1f}s, "
+                  f"débit cible: {args.target_qps or 'illimité'}")
+            infer_fn = functools.partial(client.infer, input_data, args.model_name,
+                                         args.model_version, signature)
+            report = asyncio.run(run_load_test(client.target, {}, args.concurrency, duration,
+                                               args.target_qps, infer_fn=infer_fn))
+            format_load_report(report)
+            if not report["successes"]:
+                sys.exit(1)
+            return
+
+        start = time.perf_counter()
+        try:
+            if args.stream:
+                print("\n🔄 Envoi des échantillons sur un flux ModelStreamInfer...")
+                for name, row in zip(sample_names,
+                                     client.stream_infer(([row] for row in input_data),
+                                                         args.model_name, args.model_version,
+                                                         signature)):
+                    format_results(row, [name])
+            else:
+                print("\n🔄 Envoi de la requête ModelInfer...")
+                parsed = client.infer(input_data, args.model_name, args.model_version,
+                                      signature)
+                if args.summary or len(sample_names) > SUMMARY_ROW_THRESHOLD:
+                    format_summary(parsed)
+                else:
+                    format_results(parsed, sample_names)
+        except (grpc.RpcError, RuntimeError, ValueError) as e:
+            print(f"❌ Erreur lors de l'inférence gRPC: {e}")
+            sys.exit(1)
+
+        print(f"\n✅ Test d'inférence gRPC terminé avec succès!")
+        print(f"Temps de réponse: {time.perf_counter() - start:.3f}s")
+
+# ---------------------------------------------------------------------------
+# Serveur gRPC local (stand-in en processus)
+# ---------------------------------------------------------------------------
+
+def _nearest_centroid_predict(features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Classifieur de substitution: softmax des distances aux échantillons de référence
+    """
+    centroids = np.array([SAMPLE_DATA[name] for name in CLASS_NAMES], dtype=np.float32)
+    distances = np.linalg.norm(features[:, None, :] - centroids[None, :, :], axis=2)
+    logits = -distances
+    logits -= logits.max(axis=1, keepdims=True)
+    probabilities = np.exp(logits)
+    probabilities /= probabilities.sum(axis=1, keepdims=True)
+    return probabilities.argmax(axis=1).astype(np.int64), probabilities.astype(np.float32)
+
+class LocalInferenceServicer(service_pb2_grpc.GRPCInferenceServiceServicer):
+    """
+    Implémentation minimale du service GRPCInferenceService v2
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME,
+                 model_version: str = DEFAULT_MODEL_VERSION):
+        self.model_name = model_name
+        self.model_version = model_version
+
+    def ServerReady(self, request, context):
+        return service_pb2.ServerReadyResponse(ready=True)
+
+    def ModelReady(self, request, context):
+        return service_pb2.ModelReadyResponse(ready=request.name == self.model_name)
+
+    def ModelMetadata(self, request, context):
+        if request.name != self.model_name:
+            context.abort(grpc.StatusCode.NOT_FOUND, f"Modèle inconnu: {request.name}")
+        return service_pb2.ModelMetadataResponse(
+            name=self.model_name,
+            versions=[self.model_version],
+            platform="local_stand_in",
+            inputs=[service_pb2.ModelMetadataResponse.TensorMetadata(
+                name="input_features", datatype="FP32", shape=[-1, 4])],
+            outputs=[
+                service_pb2.ModelMetadataResponse.TensorMetadata(
+                    name="predictions", datatype="INT64", shape=[-1]),
+                service_pb2.ModelMetadataResponse.TensorMetadata(
+                    name="probabilities", datatype="FP32", shape=[-1, 3])
+            ]
+        )
+
+    def _infer(self, request: service_pb2.ModelInferRequest) -> service_pb2.ModelInferResponse:
+        shape = list(request.inputs[0].shape)
+        features = np.frombuffer(request.raw_input_contents[0],
+                                 dtype=TRITON_DTYPES["FP32"]).reshape(shape)
+        predictions, probabilities = _nearest_centroid_predict(features)
+
+        response = service_pb2.ModelInferResponse(model_name=self.model_name,
+                                                  model_version=self.model_version,
+                                                  id=request.id)
+        for name, datatype, array in (("predictions", "INT64", predictions),
+                                      ("probabilities", "FP32", probabilities)):
+            output = response.outputs.add()
+            output.name = name
+            output.datatype = datatype
+            output.shape.extend(array.shape)
+            response.raw_output_contents.append(array.tobytes())
+        return response
+
+    def ModelInfer(self, request, context):
+        return self._infer(request)
+
+    def ModelStreamInfer(self, request_iterator, context):
+        for request in request_iterator:
+            try:
+                yield service_pb2.ModelStreamInferResponse(infer_response=self._infer(request))
+            except (ValueError, IndexError) as e:
+                yield service_pb2.ModelStreamInferResponse(error_message=str(e))
+
+def start_local_server(port: int = 0, max_workers: int = 8) -> Tuple[grpc.Server, int]:
+    """
+    Démarre le serveur gRPC local; port=0 choisit un port libre
+    """
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers),
+                         options=CHANNEL_OPTIONS)
+    service_pb2_grpc.add_GRPCInferenceServiceServicer_to_server(LocalInferenceServicer(), server)
+    bound_port = server.add_insecure_port(f"127.0.0.1:{port}")
+    server.start()
+    return server, bound_port
+
+# ---------------------------------------------------------------------------
+# Benchmark protobuf vs JSON
+# ---------------------------------------------------------------------------
+
+def _time_calls(function, iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)
+
+def benchmark_serialization(rows: int, iterations: int) -> Dict[str, Dict[str, float]]:
+    """
+    Compare le coût de sérialisation + désérialisation d'un batch en JSON et en protobuf
+    """
+    features = np.random.default_rng(42).normal(5.0, 1.5, size=(rows, 4)).astype(np.float32)
+    rows_as_lists = features.tolist()
+
+    def json_round_trip():
+        body = json.dumps(prepare_triton_request(rows_as_lists))
+        json.loads(body)
+
+    def protobuf_round_trip():
+        body = build_model_infer_request(features).SerializeToString()
+        parsed = service_pb2.ModelInferRequest.FromString(body)
+        np.frombuffer(parsed.raw_input_contents[0], dtype=TRITON_DTYPES["FP32"])
+
+    results = {}
+    for label, function in (("json", json_round_trip), ("protobuf", protobuf_round_trip)):
+        timings = _time_calls(function, iterations)
+        results[label] = {"p50": percentile(timings, 50), "p99": percentile(timings, 99)}
+    return results
+
+def benchmark_round_trip(client: TritonGrpcClient, rows: int, iterations: int,
+                         signature: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+    """
+    Mesure la latence ModelInfer de bout en bout sur le canal du client
+    """
+    features = np.random.default_rng(0).normal(5.0, 1.5, size=(rows, 4)).astype(np.float32)
+    timings = _time_calls(
+        lambda: client.infer(features, DEFAULT_MODEL_NAME, DEFAULT_MODEL_VERSION, signature),
+        iterations
+    )
+    return {"p50": percentile(timings, 50), "p99": percentile(timings, 99)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gRPC vs JSON pour le modèle Iris Triton")
+    parser.add_argument("--url", "-u",
+                       help="Cible gRPC host:port (défaut: serveur local en processus)")
+    parser.add_argument("--rows", type=int, default=1000,
+                       help="Nombre de lignes par batch")
+    parser.add_argument("--iterations", type=int, default=200,
+                       help="Nombre d'itérations par mesure")
+
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server, port = start_local_server()
+        url = f"127.0.0.1:{port}"
+        print(f"🧪 Serveur gRPC local démarré sur {url}")
+
+    try:
+        print(f"\n📐 Sérialisation ({args.rows} lignes, {args.iterations} itérations)")
+        for label, stats in benchmark_serialization(args.rows, args.iterations).items():
+            print(f"   {label:<9} p50: {stats['p50']*1000:.3f} ms  p99: {stats['p99']*1000:.3f} ms")
+
+        with TritonGrpcClient(url) as client:
+            if not test_grpc_health_check(client):
+                sys.exit(1)
+            signature = test_grpc_model_metadata(client, DEFAULT_MODEL_NAME,
+                                                 DEFAULT_MODEL_VERSION)
+            if signature is None:
+                sys.exit(1)
+            stats = benchmark_round_trip(client, args.rows, args.iterations, signature)
+            print(f"\n🔁 ModelInfer gRPC p50: {stats['p50']*1000:.3f} ms  p99: {stats['p99']*1000:.3f} ms")
+    finally:
+        if server is not None:
+            server.stop(grace=None)
+
+if __name__ == "__main__":
+    main()
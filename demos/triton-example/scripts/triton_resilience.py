@@ -0,0 +1,192 @@
+"""
+Requêtes d'inférence résilientes: retries avec backoff exponentiel à jitter
+et requêtes "hedgées" (doublon envoyé quand la requête dépasse le p95 courant)
+Un budget borne la charge supplémentaire (retries + doublons) générée
+"""
+
+import collections
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, Optional
+
+import requests
+
+from test_inference import (
+    HTTP_ERRORS,
+    TritonHttpClient,
+    parse_triton_response,
+    percentile,
+    send_inference_request
+)
+
+# Codes HTTP pour lesquels une nouvelle tentative a du sens (surcharge, indisponibilité)
+RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+
+# Nombre de latences observées avant d'activer le hedging
+HEDGE_WARMUP_SAMPLES = 20
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Erreurs de transport (connexion, timeout) et réponses 429/5xx transitoires
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return isinstance(error, HTTP_ERRORS)
+    return response.status_code in RETRYABLE_STATUS_CODES
+
+class RetryBudget:
+    """
+    Budget de requêtes supplémentaires: chaque requête primaire crédite `ratio`
+    jeton, chaque retry ou doublon en consomme un; min_tokens autorise les
+    retries au démarrage, max_tokens évite l'accumulation
+    """
+
+    def __init__(self, ratio: float = 0.1, min_tokens: float = 10.0,
+                 max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = min_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self._tokens + self.ratio, self.max_tokens)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+class ResilientInferenceClient:
+    """
+    Envoi d'inférences (idempotentes) avec retries et hedging optionnel
+    """
+
+    def __init__(self, client: TritonHttpClient, inference_url: str,
+                 max_attempts: int = 3, base_delay: float = 0.05, max_delay: float = 1.0,
+                 hedge: bool = False, hedge_min_delay: float = 0.005,
+                 hedge_window: int = 1000, budget: Optional[RetryBudget] = None,
+                 timeout: int = 30, max_workers: int = 32):
+        self.client = client
+        self.inference_url = inference_url
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.budget = budget or RetryBudget()
+        self.timeout = timeout
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers) if hedge else None
+        self._latencies: Deque[float] = collections.deque(maxlen=hedge_window)
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "retries": 0, "retry_successes": 0,
+                         "hedges_fired": 0, "hedges_won": 0,
+                         "budget_exhausted": 0, "failures": 0}
+
+    def __enter__(self) -> "ResilientInferenceClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Délai avant doublon: p95 des latences récentes (plancher hedge_min_delay)
+        None tant que l'historique est insuffisant (pas de doublon)
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < HEDGE_WARMUP_SAMPLES:
+            return None
+        return max(percentile(latencies, 95), self.hedge_min_delay)
+
+    def _send_once(self, data: Dict[str, Any]) -> requests.Response:
+        start = time.perf_counter()
+        response = send_inference_request(self.inference_url, data, self.timeout,
+                                          exit_on_error=False, client=self.client)
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+        return response
+
+    def _send_hedged(self, data: Dict[str, Any]) -> requests.Response:
+        """
+        Envoie la requête; si elle dépasse le p95 courant, envoie un doublon
+        (si le budget le permet) et retourne la première réponse réussie
+        """
+        primary = self._executor.submit(self._send_once, data)
+        delay = self.hedge_delay()
+        if delay is None:
+            return primary.result()
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.budget.try_withdraw():
+            if not done:
+                self._count("budget_exhausted")
+            return primary.result()
+
+        self._count("hedges_fired")
+        hedged = self._executor.submit(self._send_once, data)
+        pending = {primary, hedged}
+        last_error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    if future is hedged:
+                        self._count("hedges_won")
+                    return future.result()
+                last_error = error
+        raise last_error
+
+    def send(self, data: Dict[str, Any]) -> requests.Response:
+        """
+        Envoi avec retries (backoff exponentiel, jitter complet) dans la limite du budget
+        """
+        self._count("requests")
+        self.budget.deposit()
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = self._send_hedged(data) if self.hedge else self._send_once(data)
+                if attempt > 1:
+                    self._count("retry_successes")
+                return response
+            except HTTP_ERRORS as e:
+                if attempt == self.max_attempts or not is_retryable(e):
+                    self._count("failures")
+                    raise
+                if not self.budget.try_withdraw():
+                    self._count("budget_exhausted")
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                time.sleep(random.uniform(0, delay))
+
+    def infer(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return parse_triton_response(self.send(data), exit_on_error=False)
+
+    def print_counters(self) -> None:
+        counters = dict(self.counters)
+        print("\n🛡️  RETRIES / HEDGING")
+        print("=" * 50)
+        print(f"Requêtes:          {counters['requests']}")
+        print(f"Retries:           {counters['retries']} "
+              f"(succès après retry: {counters['retry_successes']})")
+        print(f"Doublons envoyés:  {counters['hedges_fired']} "
+              f"(gagnants: {counters['hedges_won']})")
+        print(f"Budget épuisé:     {counters['budget_exhausted']}")
+        print(f"Échecs définitifs: {counters['failures']}")